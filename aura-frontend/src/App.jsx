@@ -30,6 +30,8 @@ import {
   Campaign, AccountTree, Assignment 
 } from '@mui/icons-material';
 
+const GRAPH_INITIAL_NODES = 300;
+
 function App() {
   const [url, setUrl] = useState('');
   const [repoName, setRepoName] = useState('');
@@ -47,6 +49,7 @@ function App() {
   const [page, setPage] = useState('notes'); 
   const [chatHistory, setChatHistory] = useState([]);
   const [chatInput, setChatInput] = useState('');
+  const [chatSessionId, setChatSessionId] = useState('');
   const [isChatting, setIsChatting] = useState(false);
   
   const [highlightNodes, setHighlightNodes] = useState(new Set());
@@ -97,27 +100,11 @@ function App() {
   }, []);
 
   useEffect(() => {
-    let interval;
     if (loading) {
-      const messages = [
-        "Cloning repository...",
-        "Mapping AST dependencies in Neo4j...",
-        "Vectorizing code into FAISS Database...",
-        "Consulting AURA AI Agents...",
-        "Drafting architectural chapters...",
-        "Visualizing the network graph...",
-        "Applying finishing touches..."
-      ];
-      let i = 0;
-      setLoadingMessage(messages[0]);
-      interval = setInterval(() => {
-        i = (i + 1) % messages.length;
-        setLoadingMessage(messages[i]);
-      }, 6000); 
+      setLoadingMessage("Queueing analysis job...");
     } else {
       setLoadingMessage('');
     }
-    return () => clearInterval(interval);
   }, [loading]);
 
   const fetchHistory = async () => {
@@ -127,12 +114,32 @@ function App() {
     } catch {}
   };
 
+  // Follows the analysis job's server-sent progress events until it finishes.
+  const waitForJob = (jobId) => new Promise((resolve, reject) => {
+    const source = new EventSource(`http://localhost:8000/api/jobs/${jobId}/events`);
+    source.addEventListener('progress', (e) => {
+      const event = JSON.parse(e.data);
+      if (mounted.current) setLoadingMessage(event.message);
+    });
+    source.addEventListener('done', (e) => {
+      source.close();
+      const job = JSON.parse(e.data);
+      if (job.status === 'succeeded') resolve(job);
+      else reject(new Error(job.error || 'Analysis failed'));
+    });
+    source.onerror = () => {
+      // EventSource reconnects on its own (resuming via Last-Event-ID); give up only once it is closed.
+      if (source.readyState === EventSource.CLOSED) reject(new Error('Lost connection to analysis job'));
+    };
+  });
+
   const analyze = async (e) => {
     e.preventDefault();
     if (!url) return;
     setLoading(true);
     try {
       const res = await axios.post('http://localhost:8000/api/analyze', { url, doc_type: docType });
+      if (res.data.job_id) await waitForJob(res.data.job_id);
       setRepoName(res.data.repo_name);
       await load(res.data.repo_name);
       fetchHistory();
@@ -166,8 +173,9 @@ function App() {
     }
 
     try {
-        const g = await axios.get(`http://localhost:8000/api/graph/${name}`);
-        setGraph(g.data);
+        // Start with the most connected files; the rest is loaded by clicking nodes.
+        const g = await axios.get(`http://localhost:8000/api/graph/${name}`, { params: { top_k: GRAPH_INITIAL_NODES } });
+        setGraph({ nodes: g.data.nodes, links: g.data.links });
     } catch (e) {
         setGraph({ nodes: [], links: [] });
     }
@@ -175,6 +183,8 @@ function App() {
     if (!mounted.current) return;
     
     setHighlightNodes(new Set());
+    // A fresh chat session per opened repository keeps each conversation's history separate.
+    setChatSessionId(crypto.randomUUID ? crypto.randomUUID() : `${Date.now()}-${Math.random().toString(36).slice(2)}`);
     setChatHistory([{ role: 'bot', text: `Hello! I am AURA. You can ask me anything about the **${name}** codebase.` }]);
     setPage('notes'); 
   };
@@ -198,7 +208,7 @@ function App() {
       const response = await fetch('http://localhost:8000/api/chat', {
         method: 'POST',
         headers: { 'Content-Type': 'application/json' },
-        body: JSON.stringify({ repo_name: repoName, question: userMessage })
+        body: JSON.stringify({ repo_name: repoName, question: userMessage, session_id: chatSessionId })
       });
 
       if (!response.ok) throw new Error("Network response was not ok");
@@ -274,6 +284,24 @@ function App() {
     return match ? match[1].trim() : '';
   };
 
+  const expandNode = async (node) => {
+    try {
+      const res = await axios.get(`http://localhost:8000/api/graph/${repoName}`, { params: { node: node.id, depth: 1 } });
+      setGraph(prev => {
+        // ForceGraph2D replaces link endpoints with node objects once laid out.
+        const endpoint = (end) => (typeof end === 'object' ? end.id : end);
+        const nodeIds = new Set(prev.nodes.map(n => n.id));
+        const linkIds = new Set(prev.links.map(l => `${endpoint(l.source)}->${endpoint(l.target)}`));
+        return {
+          nodes: [...prev.nodes, ...res.data.nodes.filter(n => !nodeIds.has(n.id))],
+          links: [...prev.links, ...res.data.links.filter(l => !linkIds.has(`${l.source}->${l.target}`))],
+        };
+      });
+    } catch (e) {
+      console.error("Failed to expand graph node", e);
+    }
+  };
+
   const getGraphProps = () => ({
     nodeColor: (node) => {
       const nodeIdRaw = String(node.id || '');
@@ -339,7 +367,8 @@ function App() {
         ctx.fillText(label, node.x, node.y + 8);
       }
     },
-    onNodeHover: setHoverNode
+    onNodeHover: setHoverNode,
+    onNodeClick: expandNode
   });
 
   return (
@@ -0,0 +1,162 @@
+import os
+import glob
+import gzip
+import json
+import time
+import threading
+from collections import OrderedDict
+from email.utils import formatdate, parsedate_to_datetime
+
+from fastapi import Response
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# Small bodies are not worth a compression round trip.
+MIN_COMPRESS_BYTES = 1024
+
+
+class Artifact:
+    """A rendered file body with its validators and precompressed variants."""
+
+    def __init__(self, version, body, media_type):
+        self.version = version
+        self.body = body
+        self.media_type = media_type
+        mtime_ns, size = version
+        self.etag = f'W/"{mtime_ns:x}-{size:x}"'
+        self.mtime = mtime_ns // 1_000_000_000
+        self.last_modified = formatdate(self.mtime, usegmt=True)
+        compress = len(body) >= MIN_COMPRESS_BYTES
+        self.gzip = gzip.compress(body, compresslevel=6) if compress else None
+        self.br = brotli.compress(body) if compress and brotli else None
+
+    @property
+    def bytes(self):
+        return len(self.body) + len(self.gzip or b"") + len(self.br or b"")
+
+
+class ArtifactCache:
+    """In-memory cache of rendered files, revalidated against (mtime, size) on every lookup.
+
+    `render(raw_bytes)` turns the file into the response body once per file version,
+    so repeated requests cost one stat() instead of a read, a JSON encode and a compress.
+    """
+
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self.entries = OrderedDict()
+        self.total_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    def get(self, path, render, media_type="application/json"):
+        try:
+            st = os.stat(path)
+        except OSError:
+            with self._lock: self._drop(path)
+            return None
+        version = (st.st_mtime_ns, st.st_size)
+        with self._lock:
+            artifact = self.entries.get(path)
+            if artifact and artifact.version == version:
+                self.entries.move_to_end(path)
+                self.hits += 1
+                return artifact
+            self.misses += 1
+
+        try:
+            with open(path, "rb") as f:
+                artifact = Artifact(version, render(f.read()), media_type)
+        except OSError:
+            return None
+        with self._lock:
+            self._drop(path)
+            self.entries[path] = artifact
+            self.total_bytes += artifact.bytes
+            while self.total_bytes > self.max_bytes and len(self.entries) > 1:
+                _, old = self.entries.popitem(last=False)
+                self.total_bytes -= old.bytes
+        return artifact
+
+    def _drop(self, path):
+        artifact = self.entries.pop(path, None)
+        if artifact: self.total_bytes -= artifact.bytes
+
+    def stats(self):
+        with self._lock:
+            return {"entries": len(self.entries), "bytes": self.total_bytes, "hits": self.hits, "misses": self.misses}
+
+
+def _not_modified(request, artifact):
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        tags = [t.strip() for t in if_none_match.split(",")]
+        return "*" in tags or artifact.etag in tags or artifact.etag[2:] in tags
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since:
+        try: return artifact.mtime <= parsedate_to_datetime(if_modified_since).timestamp()
+        except (TypeError, ValueError): return False
+    return False
+
+
+def artifact_response(request, artifact):
+    """Serve an artifact honouring If-None-Match / If-Modified-Since and Accept-Encoding."""
+    headers = {
+        "ETag": artifact.etag,
+        "Last-Modified": artifact.last_modified,
+        # Browsers may keep the copy but must revalidate it, which is a cheap 304.
+        "Cache-Control": "no-cache",
+        "Vary": "Accept-Encoding",
+    }
+    if _not_modified(request, artifact):
+        return Response(status_code=304, headers=headers)
+
+    accept = request.headers.get("accept-encoding", "")
+    body = artifact.body
+    if artifact.br and "br" in accept:
+        body, headers["Content-Encoding"] = artifact.br, "br"
+    elif artifact.gzip and "gzip" in accept:
+        body, headers["Content-Encoding"] = artifact.gzip, "gzip"
+    return Response(content=body, media_type=artifact.media_type, headers=headers)
+
+
+_manifest_lock = threading.Lock()
+
+
+def _write_json_atomic(path, data):
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(data, f, indent=2)
+    os.replace(tmp_path, path)
+
+
+def update_reports_manifest(manifest_path, repo_name, documents):
+    """Record a finished analysis so /api/repos never has to scan the reports directory."""
+    with _manifest_lock:
+        try:
+            with open(manifest_path, "r", encoding="utf-8") as f:
+                manifest = json.load(f)
+        except (OSError, ValueError):
+            manifest = {"repos": {}}
+        manifest["repos"][repo_name] = {
+            "updated_at": time.time(),
+            "documents": [os.path.basename(d) for d in documents],
+        }
+        _write_json_atomic(manifest_path, manifest)
+
+
+def ensure_reports_manifest(manifest_path, reports_dir):
+    """Create the manifest from existing release notes once, for reports written before it existed."""
+    if os.path.exists(manifest_path): return
+    with _manifest_lock:
+        if os.path.exists(manifest_path): return
+        repos = {}
+        for path in glob.glob(os.path.join(reports_dir, "RELEASE_NOTES_*.md")):
+            name = os.path.basename(path)[len("RELEASE_NOTES_"):-len(".md")]
+            repos[name] = {"updated_at": os.path.getmtime(path), "documents": [os.path.basename(path)]}
+        _write_json_atomic(manifest_path, {"repos": repos})
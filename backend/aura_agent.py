@@ -1,109 +1,285 @@
 import os
-import ast
 import shutil
 import stat
 import subprocess
 import networkx as nx
-import concurrent.futures
 import time
 import asyncio
 import json
 import re
-
-# 🔥 FIX: Tell matplotlib to run headless (no GUI popups) before importing pyplot
-import matplotlib
-matplotlib.use('Agg') 
-import matplotlib.pyplot as plt 
+import uuid
 
 from dotenv import load_dotenv
 from neo4j import GraphDatabase
 from langchain_nvidia_ai_endpoints import NVIDIAEmbeddings, ChatNVIDIA
 from langchain_community.vectorstores import FAISS
-from langchain_community.document_loaders import TextLoader
-from langchain_text_splitters import RecursiveCharacterTextSplitter
 from langchain_mcp_adapters.client import MultiServerMCPClient
 
+from ingestion import ingest_files, SourceRecord
+from chunking import chunk_records
+from context_packing import pack_context
+from lexical_index import LexicalIndex
+from graph_metrics import compute_metrics, display_size
+from diagram_renderer import DiagramRenderer
+from graph_export import export_graph
+from disk_cache import EmbeddingCache, LLMResponseCache
+from embedding_pipeline import EmbeddingPipeline
+from throttling import TokenBucket, is_retryable_error, backoff_delay
+from metrics import Timings, track, record_llm_call, VECTOR_SEARCH_SECONDS, EMBEDDING_CACHE_STATS, LLM_CACHE_STATS
+
 load_dotenv()
 
 BASE_REPOS_DIR = os.path.abspath("./cloned_repos")
+NEO4J_BATCH_SIZE = int(os.getenv("NEO4J_BATCH_SIZE", "1000"))
+MANIFEST_FILENAME = "aura_manifest.json"
+
+EMBEDDING_MODEL = "nvidia/nv-embed-v1"
+EMBEDDING_MODEL_TYPE = "passage"
+EMBEDDING_CACHE_PATH = os.getenv("AURA_EMBEDDING_CACHE_PATH", os.path.join("faiss_dbs", "embedding_cache.sqlite"))
+EMBEDDING_CACHE_MAX_BYTES = int(os.getenv("AURA_EMBEDDING_CACHE_MAX_MB", "2048")) * 1024 * 1024
+LAYOUT_CACHE_PATH = os.getenv("AURA_LAYOUT_CACHE_PATH", os.path.join("images", ".cache", "layouts.sqlite"))
+
+# Tune these to the embedding provider's quota.
+EMBED_CONCURRENCY = int(os.getenv("AURA_EMBED_CONCURRENCY", "4"))
+EMBED_REQUESTS_PER_SECOND = float(os.getenv("AURA_EMBED_RPS", "8"))
+EMBED_BATCH_SIZE = int(os.getenv("AURA_EMBED_BATCH_SIZE", "32"))
+EMBED_MAX_BATCH_SIZE = int(os.getenv("AURA_EMBED_MAX_BATCH_SIZE", "50"))
+
+# Report generation: how many LLM calls may be in flight at once, and how fast new ones may start.
+LLM_CONCURRENCY = int(os.getenv("AURA_LLM_CONCURRENCY", "4"))
+LLM_REQUESTS_PER_SECOND = float(os.getenv("AURA_LLM_RPS", "2"))
+LLM_MAX_RETRIES = 3
+
+LLM_MODEL = "meta/llama-3.1-8b-instruct"
+LLM_TEMPERATURE = 0.1
+# Identical prompts (same repo context, same model) are answered from disk instead of the LLM.
+LLM_CACHE_PATH = os.getenv("AURA_LLM_CACHE_PATH", os.path.join("faiss_dbs", "llm_cache.sqlite"))
+LLM_CACHE_MAX_BYTES = int(os.getenv("AURA_LLM_CACHE_MAX_MB", "256")) * 1024 * 1024
+LLM_CACHE_TTL_SECONDS = int(os.getenv("AURA_LLM_CACHE_TTL", str(7 * 24 * 3600)))
+
+# Token budgets for retrieved context, per prompt (see context_packing.pack_context).
+CHAPTER_CONTEXT_TOKENS = int(os.getenv("AURA_CHAPTER_CONTEXT_TOKENS", "3000"))
+PLANNING_CONTEXT_TOKENS = int(os.getenv("AURA_PLANNING_CONTEXT_TOKENS", "1200"))
+MANUAL_CONTEXT_TOKENS = int(os.getenv("AURA_MANUAL_CONTEXT_TOKENS", "3000"))
+PLANNING_QUERY = "architecture overview main core modules entry point"
+RELEASE_NOTES_QUERY = "routes, endpoints, main features, core business logic, user interface, API"
+
+NEO4J_SCHEMA = [
+    "CREATE CONSTRAINT repository_name IF NOT EXISTS FOR (r:Repository) REQUIRE r.name IS UNIQUE",
+    "CREATE CONSTRAINT file_repo_path IF NOT EXISTS FOR (f:File) REQUIRE (f.repo, f.path) IS UNIQUE",
+    "CREATE INDEX file_repo IF NOT EXISTS FOR (f:File) ON (f.repo)",
+]
+_schema_ready = set()
+
+GRAPH_NODE_FIELDS = ("f.path AS id, f.name AS name, f.pagerank AS pagerank, f.in_degree AS in_degree, "
+                     "f.out_degree AS out_degree, f.betweenness AS betweenness, f.in_cycle AS in_cycle")
+
+def _graph_nodes(records):
+    """Graph API nodes with their stored metrics; `val` (node size) scales with PageRank."""
+    nodes = [{"id": r["id"], "name": r["name"], "pagerank": r["pagerank"], "in_degree": r["in_degree"],
+              "out_degree": r["out_degree"], "betweenness": r["betweenness"], "in_cycle": r["in_cycle"]} for r in records]
+    max_rank = max((n["pagerank"] or 0 for n in nodes), default=0)
+    for n in nodes: n["val"] = display_size(n["pagerank"], max_rank)
+    return nodes
+
+# Graph API slices (see DependencyEngine.query_graph).
+GRAPH_PAGE_SIZE = 500
+GRAPH_MAX_PAGE_SIZE = 5000
+GRAPH_MAX_DEPTH = 4
+
+def create_neo4j_driver(uri, user, password, max_pool_size=100, acquisition_timeout=60.0):
+    """One pooled driver is meant to be shared by every DependencyEngine in the process."""
+    return GraphDatabase.driver(
+        uri, auth=(user, password),
+        max_connection_pool_size=max_pool_size,
+        connection_acquisition_timeout=acquisition_timeout,
+    )
+
+def ensure_neo4j_schema(driver, key):
+    """Create the constraints/indexes every File/Repository lookup relies on (once per database)."""
+    if not driver or key in _schema_ready: return
+    try:
+        with driver.session() as session:
+            for statement in NEO4J_SCHEMA:
+                session.run(statement).consume()
+        _schema_ready.add(key)
+    except Exception as e:
+        print(f"⚠️ Failed to create Neo4j schema: {e}")
+
+def repo_name_from_url(url):
+    return url.rstrip("/").split("/")[-1].replace(".git", "")
 
 class DependencyEngine:
-    def __init__(self, root_path, neo4j_uri, neo4j_user, neo4j_password):
+    def __init__(self, root_path, neo4j_uri=None, neo4j_user=None, neo4j_password=None, batch_size=NEO4J_BATCH_SIZE, driver=None):
         self.root_path = root_path
+        self.log = print
+        self.timings = Timings()
         self.graph = nx.DiGraph()
+        self.metrics = {}
+        self.batch_size = batch_size
         self.ignored = {
             'node_modules', '.next', '.git', 'dist', 'build', 'coverage', 
             'locales', '__snapshots__', 'fonts', 'docs', 'scripts', 'tests', 'public',
             'venv', 'env', '__pycache__', 'migrations'
         }
         
-        try:
-            self.driver = GraphDatabase.driver(neo4j_uri, auth=(neo4j_user, neo4j_password))
-            print("🟢 Connected to Neo4j Database.")
-        except Exception as e:
-            print(f"🔴 Failed to connect to Neo4j: {e}")
-            self.driver = None
+        # An injected driver belongs to the caller (e.g. the FastAPI lifespan) and is never closed here.
+        self.owns_driver = driver is None
+        if driver is not None:
+            self.driver = driver
+        else:
+            try:
+                self.driver = create_neo4j_driver(neo4j_uri, neo4j_user, neo4j_password)
+                self.log("🟢 Connected to Neo4j Database.")
+            except Exception as e:
+                self.log(f"🔴 Failed to connect to Neo4j: {e}")
+                self.driver = None
+            # Whoever injects a driver sets up its schema (main.py does so per NEO4J_URI).
+            ensure_neo4j_schema(self.driver, neo4j_uri)
 
     def close(self):
-        if self.driver:
+        if self.driver and self.owns_driver:
             self.driver.close()
 
+    @staticmethod
+    def _write_repository(tx, repo_name):
+        tx.run("MERGE (r:Repository {name: $repo_name})", repo_name=repo_name).consume()
+
+    @staticmethod
+    def _write_file_batch(tx, rows, repo_name):
+        tx.run(
+            """
+            MATCH (r:Repository {name: $repo_name})
+            UNWIND $rows AS row
+            MERGE (f:File {repo: $repo_name, path: row.path})
+            SET f.name = row.name, f.language = 'Python',
+                f.pagerank = row.pagerank, f.in_degree = row.in_degree, f.out_degree = row.out_degree,
+                f.betweenness = row.betweenness, f.scc_size = row.scc_size, f.in_cycle = row.in_cycle
+            MERGE (r)-[:OWNS]->(f)
+            """,
+            rows=rows, repo_name=repo_name
+        ).consume()
+
+    @staticmethod
+    def _write_import_batch(tx, rows, repo_name):
+        tx.run(
+            """
+            UNWIND $rows AS row
+            MATCH (a:File {repo: $repo_name, path: row.source})
+            MATCH (b:File {repo: $repo_name, path: row.target})
+            MERGE (a)-[:IMPORTS]->(b)
+            """,
+            rows=rows, repo_name=repo_name
+        ).consume()
+
+    @staticmethod
+    def _delete_file_batch(tx, rows, repo_name):
+        tx.run(
+            """
+            UNWIND $rows AS path
+            MATCH (f:File {repo: $repo_name, path: path})
+            DETACH DELETE f
+            """,
+            rows=rows, repo_name=repo_name
+        ).consume()
+
+    @staticmethod
+    def _delete_import_batch(tx, rows, repo_name):
+        tx.run(
+            """
+            UNWIND $rows AS row
+            MATCH (a:File {repo: $repo_name, path: row.source})-[rel:IMPORTS]->(b:File {repo: $repo_name, path: row.target})
+            DELETE rel
+            """,
+            rows=rows, repo_name=repo_name
+        ).consume()
+
+    def _batches(self, rows):
+        for i in range(0, len(rows), self.batch_size):
+            yield rows[i : i + self.batch_size]
+
     def _save_to_neo4j(self, nodes, edges, repo_name):
         if not self.driver: return
-        print(f"💾 Saving {len(nodes)} files and {len(edges)} connections to Neo4j for '{repo_name}'...")
+        self.log(f"💾 Saving {len(nodes)} files and {len(edges)} connections to Neo4j for '{repo_name}'...")
+        node_rows = [{"path": node, "name": os.path.basename(node), **self.metrics.get(node, {})} for node in nodes]
+        edge_rows = [{"source": source, "target": target} for source, target in edges]
+        start = time.perf_counter()
         try:
             with self.driver.session() as session:
-                session.run("MERGE (r:Repository {name: $repo_name})", repo_name=repo_name)
-                for node in nodes:
-                    filename = os.path.basename(node)
-                    session.run(
-                        """
-                        MERGE (f:File {path: $path, repo: $repo_name}) 
-                        SET f.name = $name, f.language = 'Python'
-                        WITH f
-                        MATCH (r:Repository {name: $repo_name})
-                        MERGE (r)-[:OWNS]->(f)
-                        """,
-                        path=node, name=filename, repo_name=repo_name
-                    )
-                for source, target in edges:
-                    session.run(
-                        """
-                        MATCH (a:File {path: $source, repo: $repo_name}) 
-                        MATCH (b:File {path: $target, repo: $repo_name}) 
-                        MERGE (a)-[:IMPORTS]->(b)
-                        """, 
-                        source=source, target=target, repo_name=repo_name
-                    )
-            print("✅ Graph successfully grouped and stored in Neo4j!")
+                session.execute_write(self._write_repository, repo_name)
+                for batch in self._batches(node_rows):
+                    session.execute_write(self._write_file_batch, batch, repo_name)
+                for batch in self._batches(edge_rows):
+                    session.execute_write(self._write_import_batch, batch, repo_name)
+            elapsed = max(time.perf_counter() - start, 1e-9)
+            total_rows = len(node_rows) + len(edge_rows)
+            self.log(f"✅ Graph successfully grouped and stored in Neo4j! ({total_rows} rows in {elapsed:.2f}s, {total_rows / elapsed:.0f} rows/s)")
         except Exception as e:
-            print(f"⚠️ Failed to save to Neo4j: {e}")
+            self.log(f"⚠️ Failed to save to Neo4j: {e}")
 
-    def build(self, repo_name):
-        print(f"🕸️  Mapping Python Backend Dependencies (AST)...")
-        files = self._get_files()
-        
-        for f in files:
-            rel_path = os.path.relpath(f, self.root_path).replace("\\", "/")
-            self.graph.add_node(rel_path)
-        
-        for f in files:
-            rel_path = os.path.relpath(f, self.root_path).replace("\\", "/")
-            imports = self._extract_imports_via_ast(f)
-            for imp in imports:
-                target = self._resolve_python_import(f, imp, files)
-                if target:
-                    self.graph.add_edge(rel_path, target)
-        
-        print(f"✅ In-Memory Graph Built: {len(self.graph.nodes)} nodes.")
-        self._save_to_neo4j(list(self.graph.nodes), list(self.graph.edges), repo_name)
+    def _sync_to_neo4j(self, previous, repo_name):
+        """Write only the difference between the previously persisted graph and the current one."""
+        if not self.driver: return
+        prev_nodes = set(previous.get("nodes", []))
+        prev_edges = {tuple(edge) for edge in previous.get("edges", [])}
+        nodes, edges = set(self.graph.nodes), set(self.graph.edges)
+
+        removed_nodes = sorted(prev_nodes - nodes)
+        added_nodes = sorted(nodes - prev_nodes)
+        # DETACH DELETE already drops the edges of removed files.
+        removed_edges = [e for e in prev_edges - edges if e[0] in nodes and e[1] in nodes]
+        added_edges = sorted(edges - prev_edges)
+        self.log(f"💾 Syncing Neo4j for '{repo_name}': +{len(added_nodes)}/-{len(removed_nodes)} files, +{len(added_edges)}/-{len(removed_edges)} connections...")
+        try:
+            with self.driver.session() as session:
+                for batch in self._batches(removed_nodes):
+                    session.execute_write(self._delete_file_batch, batch, repo_name)
+                for batch in self._batches([{"source": s, "target": t} for s, t in removed_edges]):
+                    session.execute_write(self._delete_import_batch, batch, repo_name)
+        except Exception as e:
+            self.log(f"⚠️ Failed to delete stale Neo4j records: {e}")
+        # Any structural change moves every file's centrality, so all metric rows are rewritten then.
+        changed = added_nodes or removed_nodes or added_edges or removed_edges
+        self._save_to_neo4j(sorted(nodes) if changed else [], added_edges, repo_name)
+
+    def ranked_nodes(self, limit=None, key="pagerank"):
+        """Files ordered by a metric from the last build, most important first."""
+        ranked = sorted(self.metrics, key=lambda node: (-self.metrics[node].get(key, 0), node))
+        return ranked[:limit] if limit else ranked
+
+    def build(self, repo_name, records=None, previous=None):
+        self.log(f"🕸️  Mapping Python Backend Dependencies (AST)...")
+        if records is None:
+            records = list(ingest_files(self.root_path, self._get_files()))
+        with self.timings.stage("graph_build"):
+            self._build_module_index(r.rel_path for r in records)
+            
+            for record in records:
+                self.graph.add_node(record.rel_path)
+            
+            for record in records:
+                for imp in record.imports:
+                    for target in self._resolve_python_import(record.rel_path, imp):
+                        if target != record.rel_path:
+                            self.graph.add_edge(record.rel_path, target)
+            
+            self.log(f"✅ In-Memory Graph Built: {len(self.graph.nodes)} nodes.")
+            start = time.perf_counter()
+            self.metrics = compute_metrics(self.graph)
+            cyclic = sum(1 for m in self.metrics.values() if m["in_cycle"])
+            self.log(f"📐 Centrality computed in {time.perf_counter() - start:.2f}s ({cyclic} files in import cycles).")
+        with self.timings.stage("neo4j_write"):
+            if previous is None:
+                self._save_to_neo4j(list(self.graph.nodes), list(self.graph.edges), repo_name)
+            else:
+                self._sync_to_neo4j(previous, repo_name)
 
     def get_react_graph_data(self, repo_name):
         if not self.driver: return {"nodes": [], "links": []}
         try:
             with self.driver.session() as session:
-                nodes_result = session.run("MATCH (f:File {repo: $repo}) RETURN f.path AS id, f.name AS name", repo=repo_name)
-                nodes = [{"id": record["id"], "name": record["name"], "val": 1} for record in nodes_result]
+                nodes_result = session.run(f"MATCH (f:File {{repo: $repo}}) RETURN {GRAPH_NODE_FIELDS}", repo=repo_name)
+                nodes = _graph_nodes(nodes_result)
                 
                 links_result = session.run(
                     "MATCH (a:File {repo: $repo})-[rel:IMPORTS]->(b:File {repo: $repo}) "
@@ -114,9 +290,77 @@ class DependencyEngine:
                 
                 return {"nodes": nodes, "links": links}
         except Exception as e:
-            print(f"⚠️ Error fetching graph: {e}")
+            self.log(f"⚠️ Error fetching graph: {e}")
             return {"nodes": [], "links": []}
 
+    def load_from_neo4j(self, repo_name):
+        """Rebuild self.graph and self.metrics from the persisted graph (for readers that never ran build)."""
+        self.graph = nx.DiGraph()
+        self.metrics = {}
+        if not self.driver: return self.graph
+        with self.driver.session() as session:
+            for record in session.run(f"MATCH (f:File {{repo: $repo}}) RETURN {GRAPH_NODE_FIELDS}, f.scc_size AS scc_size", repo=repo_name):
+                self.graph.add_node(record["id"])
+                self.metrics[record["id"]] = {key: record[key] for key in ("pagerank", "in_degree", "out_degree", "betweenness", "scc_size", "in_cycle")
+                                              if record[key] is not None}
+            for record in session.run(
+                "MATCH (a:File {repo: $repo})-[:IMPORTS]->(b:File {repo: $repo}) RETURN a.path AS source, b.path AS target",
+                repo=repo_name,
+            ):
+                self.graph.add_edge(record["source"], record["target"])
+        return self.graph
+
+    def export(self, fmt, nodes=None):
+        """Stream the graph, or the subgraph induced by `nodes`, as mermaid / dot / graphml / json text."""
+        return export_graph(self.graph, fmt, nodes=nodes, metrics=self.metrics)
+
+    def query_graph(self, repo_name, node=None, depth=1, top_k=None, prefix=None, cursor=None, limit=GRAPH_PAGE_SIZE):
+        """A slice of the graph for lazy loading. Every query starts from the (repo, path) index.
+
+        node + depth: the neighbourhood of one file; top_k: the most connected files;
+        otherwise files under `prefix` in path order, `limit` at a time after `cursor`.
+        """
+        if not self.driver: return {"nodes": [], "links": [], "next_cursor": None}
+        limit = max(1, min(limit, GRAPH_MAX_PAGE_SIZE))
+        next_cursor = None
+        try:
+            with self.driver.session() as session:
+                if node:
+                    # Variable-length bounds can't be parameters; depth is clamped to an int first.
+                    depth = max(1, min(int(depth), GRAPH_MAX_DEPTH))
+                    result = session.run(
+                        f"MATCH (start:File {{repo: $repo, path: $node}})-[:IMPORTS*0..{depth}]-(f:File) "
+                        f"RETURN DISTINCT {GRAPH_NODE_FIELDS} LIMIT $limit",
+                        repo=repo_name, node=node, limit=limit,
+                    )
+                elif top_k:
+                    result = session.run(
+                        "MATCH (f:File {repo: $repo}) "
+                        f"RETURN {GRAPH_NODE_FIELDS} ORDER BY coalesce(f.pagerank, 0) DESC, id LIMIT $limit",
+                        repo=repo_name, limit=min(int(top_k), GRAPH_MAX_PAGE_SIZE),
+                    )
+                else:
+                    result = session.run(
+                        "MATCH (f:File {repo: $repo}) WHERE f.path STARTS WITH $prefix AND f.path > $cursor "
+                        f"RETURN {GRAPH_NODE_FIELDS} ORDER BY f.path LIMIT $limit",
+                        repo=repo_name, prefix=prefix or "", cursor=cursor or "", limit=limit,
+                    )
+                nodes = _graph_nodes(result)
+                if not node and not top_k and len(nodes) == limit:
+                    next_cursor = nodes[-1]["id"]
+
+                links_result = session.run(
+                    "UNWIND $paths AS path "
+                    "MATCH (a:File {repo: $repo, path: path})-[:IMPORTS]->(b:File) WHERE b.path IN $paths "
+                    "RETURN a.path AS source, b.path AS target",
+                    repo=repo_name, paths=[n["id"] for n in nodes],
+                )
+                links = [{"source": record["source"], "target": record["target"]} for record in links_result]
+                return {"nodes": nodes, "links": links, "next_cursor": next_cursor}
+        except Exception as e:
+            self.log(f"⚠️ Error fetching graph: {e}")
+            return {"nodes": [], "links": [], "next_cursor": None}
+
     def _get_files(self):
         code_files = []
         for root, dirs, files in os.walk(self.root_path):
@@ -126,41 +370,97 @@ class DependencyEngine:
                     code_files.append(os.path.abspath(os.path.join(root, f)))
         return code_files
 
-    def _extract_imports_via_ast(self, file_path):
-        found_imports = []
-        try:
-            with open(file_path, "r", encoding="utf-8") as f:
-                tree = ast.parse(f.read(), filename=file_path)
-            for node in ast.walk(tree):
-                if isinstance(node, ast.Import):
-                    for alias in node.names: found_imports.append(alias.name)
-                elif isinstance(node, ast.ImportFrom):
-                    if node.module: found_imports.append(node.module)
-        except: pass
-        return found_imports
-
-    def _resolve_python_import(self, current_file, import_str, all_files):
-        path_parts = import_str.replace('.', '/')
-        for f in all_files:
-            rel = os.path.relpath(f, self.root_path).replace("\\", "/")
-            if rel.replace(".py", "").endswith(path_parts): return rel
-            if rel.endswith("__init__.py") and os.path.dirname(rel).endswith(path_parts): return rel
-        return None
+    @staticmethod
+    def _module_name(rel_path):
+        parts = rel_path[:-len(".py")].split("/")
+        if parts[-1] == "__init__":
+            parts = parts[:-1]
+        return ".".join(parts)
+
+    def _build_module_index(self, rel_paths):
+        """Index every file once per build: dotted module name -> path, plus every
+        trailing dotted suffix -> candidate paths for imports rooted below the repo root."""
+        self.module_index = {}
+        self.suffix_index = {}
+        for rel in sorted(rel_paths, key=lambda p: (p.count("/"), p)):
+            module = self._module_name(rel)
+            if not module: continue
+            self.module_index.setdefault(module, rel)
+            parts = module.split(".")
+            for i in range(1, len(parts)):
+                self.suffix_index.setdefault(".".join(parts[i:]), []).append(rel)
+
+    def _lookup_module(self, dotted, current_rel, exact=False):
+        if not dotted: return None
+        target = self.module_index.get(dotted)
+        if target or exact: return target
+        candidates = self.suffix_index.get(dotted)
+        if not candidates: return None
+        # Several packages can ship the same submodule (utils, config...): prefer the
+        # one living next to the importing file, otherwise the shallowest one.
+        current_dir = os.path.dirname(current_rel)
+        for candidate in candidates:
+            if os.path.dirname(candidate) == current_dir:
+                return candidate
+        return candidates[0]
+
+    def _resolve_python_import(self, current_rel, import_spec):
+        module, level, names = import_spec
+        exact = level > 0
+        if level:
+            current_module = self._module_name(current_rel)
+            package = current_module.split(".") if current_module else []
+            if not current_rel.endswith("__init__.py"):
+                package = package[:-1]
+            if level - 1 > len(package): return []
+            base = package[:len(package) - (level - 1)]
+            module = ".".join(base + ([module] if module else []))
+
+        targets = []
+        unresolved_names = not names
+        for name in names:
+            target = self._lookup_module(f"{module}.{name}" if module else name, current_rel, exact)
+            if target: targets.append(target)
+            else: unresolved_names = True
+        if unresolved_names:
+            target = self._lookup_module(module, current_rel, exact)
+            if target: targets.append(target)
+        return targets
 
 class ProductionAgent:
     def __init__(self):
-        self.embeddings = NVIDIAEmbeddings(model="nvidia/nv-embed-v1", model_type="passage")
-        self.llm = ChatNVIDIA(model="meta/llama-3.1-8b-instruct", temperature=0.1)
+        self.embeddings = NVIDIAEmbeddings(model=EMBEDDING_MODEL, model_type=EMBEDDING_MODEL_TYPE)
+        self.embedding_cache = EmbeddingCache(EMBEDDING_CACHE_PATH, EMBEDDING_MODEL, EMBEDDING_MODEL_TYPE, EMBEDDING_CACHE_MAX_BYTES)
+        self.diagram_renderer = DiagramRenderer(LAYOUT_CACHE_PATH)
+        self.embedding_pipeline = EmbeddingPipeline(
+            lambda texts: self.embeddings.embed_documents(texts),
+            max_concurrency=EMBED_CONCURRENCY,
+            requests_per_second=EMBED_REQUESTS_PER_SECOND,
+            batch_size=EMBED_BATCH_SIZE,
+            max_batch_size=EMBED_MAX_BATCH_SIZE,
+        )
+        # Report searches embed their queries through the public embed_query (input type "query", as
+        # FAISS searches and chat do). The client only batches passages, so each query is one request.
+        self.query_pipeline = EmbeddingPipeline(
+            lambda texts: [self.embeddings.embed_query(text) for text in texts],
+            max_concurrency=EMBED_CONCURRENCY,
+            requests_per_second=EMBED_REQUESTS_PER_SECOND,
+            batch_size=1, min_batch_size=1, max_batch_size=1, name="queries",
+        )
+        self.llm = ChatNVIDIA(model=LLM_MODEL, temperature=LLM_TEMPERATURE)
+        self.llm_cache = LLMResponseCache(LLM_CACHE_PATH, LLM_MODEL, LLM_TEMPERATURE, LLM_CACHE_MAX_BYTES, LLM_CACHE_TTL_SECONDS)
+        self.use_llm_cache = True  # False regenerates every section (fresh answers still replace cached ones)
+        self.log = print
+        self.timings = Timings()
+        self.llm_limiter = TokenBucket(LLM_REQUESTS_PER_SECOND)
+        self._llm_semaphore = None
+        self._llm_semaphore_loop = None
         self.vector_db = None
         self.dep_engine = None
         self.current_repo_name = "UNKNOWN"
 
-    def _load_file_content(self, file_path):
-        try: return TextLoader(file_path, encoding='utf-8').load()
-        except: return []
-
     async def _mcp_clone(self, url, target_path):
-        print(f"🔌 Connecting to Git MCP Server (via uvx)...")
+        self.log(f"🔌 Connecting to Git MCP Server (via uvx)...")
         client = MultiServerMCPClient({
             "git": {
                 "command": "uvx",
@@ -170,64 +470,222 @@ class ProductionAgent:
         })
         try:
             await client.call_tool("git", "git_clone", url=url, repo_path=target_path)
-            print("   ✅ MCP Server Clone Complete.")
+            self.log("   ✅ MCP Server Clone Complete.")
         except Exception as e:
-            print(f"   ⚠️ MCP Server Note: {e}")
-            print("   🔄 Falling back to Native OS Subprocess Clone...")
+            self.log(f"   ⚠️ MCP Server Note: {e}")
+            self.log("   🔄 Falling back to Native OS Subprocess Clone...")
             subprocess.run(["git", "clone", url, target_path], check=True)
-            print("   ✅ Native Clone Complete.")
+            self.log("   ✅ Native Clone Complete.")
+
+    def _git(self, repo_path, *args):
+        result = subprocess.run(["git", "-C", repo_path, *args], check=True, capture_output=True, text=True)
+        return result.stdout.strip()
+
+    def _head_commit(self, repo_path):
+        try: return self._git(repo_path, "rev-parse", "HEAD")
+        except: return None
+
+    def _load_manifest(self, db_path):
+        if not os.path.exists(os.path.join(db_path, "index.faiss")): return None
+        try:
+            with open(os.path.join(db_path, MANIFEST_FILENAME), "r", encoding="utf-8") as f:
+                return json.load(f)
+        except: return None
+
+    def _save_manifest(self, db_path, manifest):
+        os.makedirs(db_path, exist_ok=True)
+        with open(os.path.join(db_path, MANIFEST_FILENAME), "w", encoding="utf-8") as f:
+            json.dump(manifest, f)
+
+    def _split_records(self, records):
+        return chunk_records(records)
+
+    def _vectorize(self, chunks, vector_db=None):
+        """Embed chunks into vector_db (created when None) and return their docstore ids.
+        Only chunks missing from the embedding cache reach the embedding endpoint."""
+        ids = [uuid.uuid4().hex for _ in chunks]
+        texts = [c.page_content for c in chunks]
+        hits_before = self.embedding_cache.hits
+        vectors = self.embedding_cache.embed_documents(texts, self.embedding_pipeline.embed)
+        cached = self.embedding_cache.hits - hits_before
+        EMBEDDING_CACHE_STATS.record(cached, len(chunks) - cached)
+        stats = self.embedding_pipeline.stats()
+        self.log(f"\n   📡 Vectorized {len(chunks)} chunks ({cached} from cache, {len(chunks) - cached} embedded)")
+        self.log(f"   📈 Embedding throughput: {stats['texts_per_second']:.1f} chunks/s over {stats['batches']} batches "
+              f"(batch size {stats['batch_size']}, {stats['retries']} retries, {stats['throttled']} throttled)")
+        
+        text_embeddings = list(zip(texts, vectors))
+        metadatas = [c.metadata for c in chunks]
+        if vector_db is None:
+            vector_db = FAISS.from_embeddings(text_embeddings, self.embeddings, metadatas=metadatas, ids=ids)
+        else:
+            vector_db.add_embeddings(text_embeddings, metadatas=metadatas, ids=ids)
+        self.vector_db = vector_db
+        return ids
+
+    def _manifest_files(self, records, chunks, ids):
+        doc_ids = {r.path: [] for r in records}
+        for chunk, doc_id in zip(chunks, ids):
+            doc_ids[chunk.metadata["source"]].append(doc_id)
+        return {
+            r.rel_path: {"sha256": r.sha256, "imports": r.imports, "doc_ids": doc_ids[r.path]}
+            for r in records
+        }
 
-    def initialize_repo(self, url):
-        self.current_repo_name = url.rstrip("/").split("/")[-1].replace(".git", "")
+    def initialize_repo(self, url, incremental=True):
+        self.current_repo_name = repo_name_from_url(url)
         target_path = os.path.join(BASE_REPOS_DIR, self.current_repo_name)
+        db_path = os.path.join("faiss_dbs", f"faiss_db_{self.current_repo_name}")
         
-        print(f"\n🚀 STARTING AURA GENERATION: {url}")
+        self.log(f"\n🚀 STARTING AURA GENERATION: {url}")
         os.makedirs(BASE_REPOS_DIR, exist_ok=True)
         
+        manifest = self._load_manifest(db_path) if incremental else None
+        if manifest and os.path.isdir(os.path.join(target_path, ".git")):
+            try:
+                self._refresh_repo(target_path, db_path, manifest)
+                return
+            except Exception as e:
+                self.log(f"   ⚠️ Incremental refresh failed ({e}), running a full analysis instead...")
+                self.dep_engine.graph = nx.DiGraph()
+        
         if os.path.exists(target_path):
             shutil.rmtree(target_path, onerror=lambda f,p,e: (os.chmod(p, stat.S_IWRITE), f(p)))
         
-        asyncio.run(self._mcp_clone(url, target_path))
+        with self.timings.stage("clone"):
+            asyncio.run(self._mcp_clone(url, target_path))
         
         self.dep_engine.root_path = target_path
-        self.dep_engine.build(self.current_repo_name)
+        self.log("⚡ Ingesting source files (single pass, AST parsed across cores)...")
+        with self.timings.stage("ingest"):
+            records = list(ingest_files(target_path, self.dep_engine._get_files()))
+        self.dep_engine.build(self.current_repo_name, records)
         
-        print("⚡ Loading Knowledge Base (High Density)...")
-        all_docs = []
-        files = self.dep_engine._get_files()
+        self.log("⚡ Loading Knowledge Base (High Density)...")
+        with self.timings.stage("chunking"):
+            chunks = self._split_records(records)
+        with self.timings.stage("embedding"):
+            ids = self._vectorize(chunks) if chunks else []
+        if chunks:
+            os.makedirs("faiss_dbs", exist_ok=True)
+            with self.timings.stage("index_save"):
+                self.vector_db.save_local(db_path)
+                LexicalIndex.from_vector_store(self.vector_db).save(db_path)
+            self._save_manifest(db_path, {
+                "commit": self._head_commit(target_path),
+                "files": self._manifest_files(records, chunks, ids),
+                "edges": list(self.dep_engine.graph.edges),
+            })
+            
+        self.log("✅ Knowledge Base Ready.")
+
+    def _refresh_repo(self, target_path, db_path, manifest):
+        """Bring an existing clone, graph and FAISS index up to date by re-processing only the diff."""
+        self.log("🔄 Previous analysis found. Fetching changes since the last analyzed commit...")
+        with self.timings.stage("clone"):
+            self._git(target_path, "fetch", "--quiet", "origin")
+            self._git(target_path, "reset", "--hard", "--quiet", "@{u}")
+        head = self._head_commit(target_path)
+        
+        self.dep_engine.root_path = target_path
+        current = {os.path.relpath(f, target_path).replace("\\", "/"): f for f in self.dep_engine._get_files()}
+        known = manifest["files"]
+        removed = [rel for rel in known if rel not in current]
+        candidates = [rel for rel in current if rel not in known]
+        if manifest.get("commit"):
+            diff = self._git(target_path, "diff", "--name-only", "--no-renames", manifest["commit"], head)
+            candidates += [rel for rel in diff.splitlines() if rel in current and rel in known]
+        else:
+            candidates += [rel for rel in current if rel in known]
         
-        with concurrent.futures.ThreadPoolExecutor(max_workers=10) as executor:
-            future_to_file = {executor.submit(self._load_file_content, f): f for f in files}
-            for i, future in enumerate(concurrent.futures.as_completed(future_to_file)):
-                all_docs.extend(future.result())
-                if i % 50 == 0: print(f"   📂 Loaded {i}/{len(files)}...", end="\r")
+        with self.timings.stage("ingest"):
+            ingested = list(ingest_files(target_path, [current[rel] for rel in candidates]))
+        ingested_rels = {r.rel_path for r in ingested}
+        removed += [rel for rel in candidates if rel in known and rel not in ingested_rels]
+        fresh = [r for r in ingested if known.get(r.rel_path, {}).get("sha256") != r.sha256]
+        fresh_rels = {r.rel_path for r in fresh}
+        removed_rels = set(removed)
+        self.log(f"   🔍 {len(fresh)} added/modified and {len(removed)} removed files since {str(manifest.get('commit'))[:8]}.")
         
-        splitter = RecursiveCharacterTextSplitter(chunk_size=2000, chunk_overlap=200)
-        chunks = splitter.split_documents(all_docs)
+        # Unchanged files keep their stored imports, so the full graph is rebuilt without re-reading them.
+        records = list(fresh)
+        for rel, info in known.items():
+            if rel in fresh_rels or rel in removed_rels: continue
+            imports = [(module, level, tuple(names)) for module, level, names in info["imports"]]
+            records.append(SourceRecord(path=current[rel], rel_path=rel, text="", sha256=info["sha256"], imports=imports))
+        self.dep_engine.build(self.current_repo_name, records, previous={"nodes": list(known), "edges": manifest.get("edges", [])})
         
-        print(f"\n   📡 Vectorizing {len(chunks)} chunks...")
-        if len(chunks) > 0:
-            self.vector_db = FAISS.from_documents(chunks[:20], self.embeddings)
-            for i in range(20, len(chunks), 20):
-                self.vector_db.add_documents(chunks[i : i + 20])
-                time.sleep(0.1)
-                
-            os.makedirs("faiss_dbs", exist_ok=True)
-            db_path = os.path.join("faiss_dbs", f"faiss_db_{self.current_repo_name}")
+        self.log("⚡ Updating Knowledge Base in place...")
+        self.vector_db = FAISS.load_local(db_path, self.embeddings, allow_dangerous_deserialization=True)
+        stale_ids = [doc_id for rel in removed + [rel for rel in fresh_rels if rel in known] for doc_id in known[rel]["doc_ids"]]
+        if stale_ids:
+            self.vector_db.delete(stale_ids)
+        with self.timings.stage("chunking"):
+            chunks = self._split_records(fresh)
+        with self.timings.stage("embedding"):
+            ids = self._vectorize(chunks, self.vector_db) if chunks else []
+        with self.timings.stage("index_save"):
             self.vector_db.save_local(db_path)
-            
-        print("✅ Knowledge Base Ready.")
+            LexicalIndex.from_vector_store(self.vector_db).save(db_path)
+        
+        files = {rel: info for rel, info in known.items() if rel not in removed_rels}
+        files.update(self._manifest_files(fresh, chunks, ids))
+        self._save_manifest(db_path, {"commit": head, "files": files, "edges": list(self.dep_engine.graph.edges)})
+        self.log("✅ Knowledge Base Ready (incremental).")
 
     def _safe_search(self, query, k=15):
-        try: return self.vector_db.similarity_search(query, k=k)
+        try:
+            with VECTOR_SEARCH_SECONDS.time(component="report"):
+                return self.vector_db.similarity_search(query, k=k)
         except: return []
 
+    def _llm_slots(self):
+        # asyncio primitives bind to one event loop, and every report runs its own loop.
+        loop = asyncio.get_running_loop()
+        if self._llm_semaphore_loop is not loop:
+            self._llm_semaphore = asyncio.Semaphore(LLM_CONCURRENCY)
+            self._llm_semaphore_loop = loop
+        return self._llm_semaphore
+
+    def _cached_response(self, prompt, accept=None):
+        if not self.use_llm_cache: return None
+        content = self.llm_cache.get(prompt)
+        if content is not None and accept and not accept(content):
+            content = None
+        LLM_CACHE_STATS.record(int(content is not None), int(content is None))
+        return content
+
+    async def _allm(self, prompt, accept=None):
+        """Async LLM call under the concurrency cap and rate limiter, retrying throttled requests.
+
+        With `accept`, only answers it approves are cached or replayed, so a reply the caller
+        rejects (and replaces with a fallback) is asked for again on the next run.
+        """
+        # The cache is SQLite on disk, so lookups and writes stay off the event loop.
+        cached = await asyncio.to_thread(self._cached_response, prompt, accept)
+        if cached is not None: return cached
+        attempt = 0
+        while True:
+            async with self._llm_slots():
+                await self.llm_limiter.acquire_async()
+                start = time.perf_counter()
+                try:
+                    content = (await self.llm.ainvoke(prompt)).content
+                except Exception as e:
+                    record_llm_call("report", prompt, None, time.perf_counter() - start, outcome="error")
+                    if attempt >= LLM_MAX_RETRIES or not is_retryable_error(e): raise
+                else:
+                    record_llm_call("report", prompt, content, time.perf_counter() - start)
+                    if accept is None or accept(content):
+                        await asyncio.to_thread(self.llm_cache.set, prompt, content)
+                    return content
+            await asyncio.sleep(backoff_delay(attempt))
+            attempt += 1
+
     def write_heavy_chapter(self, chapter_num, title, topic, role, doc_type="technical"):
-        print(f"   ✍️  Writing {title} ({doc_type.upper()} Mode)...")
-        
-        docs = self._safe_search(topic, k=20)
-        context = "\n".join([d.page_content[:800] for d in docs])
-        
+        return asyncio.run(self.awrite_heavy_chapter(chapter_num, title, topic, role, doc_type))
+
+    def _chapter_prompts(self, chapter_num, title, topic, role, doc_type, context):
         if doc_type == "business":
             text_prompt = (
                 f"Act as a Chief Product Officer and Business Analyst. Write a COMPREHENSIVE, ENTERPRISE-GRADE business chapter titled '{title}'.\n\n"
@@ -264,66 +722,114 @@ class ProductionAgent:
                 f"Context: {context}\n"
                 "Return ONLY the mermaid code block (inside ```mermaid ... ```)."
             )
+        return text_prompt, diag_prompt
+
+    async def awrite_heavy_chapter(self, chapter_num, title, topic, role, doc_type="technical", docs=None):
+        # Chapters are written concurrently, so only the histogram (not the job breakdown) gets them.
+        with track("chapter"):
+            self.log(f"   ✍️  Writing {title} ({doc_type.upper()} Mode)...")
         
-        try:
-            content = self.llm.invoke(text_prompt).content
-            diagram = self.llm.invoke(diag_prompt).content.replace("```mermaid", "").replace("```", "").strip()
+            if docs is None:
+                docs = await asyncio.to_thread(self._safe_search, topic, 20)
+            context = "\n".join([d.page_content for d in pack_context(docs, CHAPTER_CONTEXT_TOKENS)])
+            text_prompt, diag_prompt = self._chapter_prompts(chapter_num, title, topic, role, doc_type, context)
+        
+            try:
+                # The chapter text and its diagram only share the context, so both calls run at once.
+                content, diagram = await asyncio.gather(self._allm(text_prompt), self._allm(diag_prompt))
+                diagram = diagram.replace("```mermaid", "").replace("```", "").strip()
             
-            mermaid_block = "```mermaid\n" + diagram + "\n```"
-            diagram_title = "Business Process Flow" if doc_type == "business" else "Subsystem Architecture Flow"
+                mermaid_block = "```mermaid\n" + diagram + "\n```"
+                diagram_title = "Business Process Flow" if doc_type == "business" else "Subsystem Architecture Flow"
             
-            full_chapter = (
-                f"# {title}\n\n"
-                f"{content}\n\n"
-                f"### {chapter_num}.X {diagram_title}\n"
-                f"{mermaid_block}\n\n"
+                full_chapter = (
+                    f"# {title}\n\n"
+                    f"{content}\n\n"
+                    f"### {chapter_num}.X {diagram_title}\n"
+                    f"{mermaid_block}\n\n"
+                )
+                return full_chapter
+            except Exception as e:
+                self.log(f"   ⚠️ Error writing chapter: {e}")
+                return f"# {title}\n(Content generation failed)\n\n"
+
+    async def _awrite_chapters(self, chapters_plan, doc_type, topic_docs=None):
+        """Write all chapters concurrently; gather() keeps them in plan order."""
+        topic_docs = topic_docs or {}
+        return await asyncio.gather(*[
+            self.awrite_heavy_chapter(
+                chap.get("chapter_num", 0), chap.get("title", "Chapter"),
+                chap.get("topic", "features"), chap.get("role", "Expert"), doc_type,
+                docs=topic_docs.get(chap.get("topic", "features"))
             )
-            return full_chapter
-        except Exception as e:
-            print(f"   ⚠️ Error writing chapter: {e}")
-            return f"# {title}\n(Content generation failed)\n\n"
+            for chap in chapters_plan
+        ])
 
-    def generate_aura_report(self, doc_type="technical"):
-        print(f"\n📚 GENERATING AURA REPORT ({doc_type.upper()} EDITION)...")
-        
-        top_nodes = sorted(self.dep_engine.graph.degree, key=lambda x: x[1], reverse=True)[:40]
-        core_files = [os.path.basename(n[0]) for n in top_nodes]
-        docs = self._safe_search("architecture overview main core modules entry point", k=15)
-        context = "\n".join([d.page_content[:400] for d in docs])
+    def _search_many(self, queries):
+        """Run {query: k} searches with the queries embedded concurrently. Returns {query: docs}.
 
-        print("   🧠 Analyzing FAISS DB and Graph to dynamically outline chapters...")
+        A query whose embedding or search failed is left out, so callers fall back to searching it themselves.
+        """
+        if not queries or not self.vector_db: return {}
+        try:
+            vectors = self.query_pipeline.embed(list(queries))
+        except Exception as e:
+            self.log(f"   ⚠️ Query embedding failed ({e}), searching one query at a time...")
+            return {}
+        results = {}
+        for (query, k), vector in zip(queries.items(), vectors):
+            try:
+                with VECTOR_SEARCH_SECONDS.time(component="report"):
+                    results[query] = self.vector_db.similarity_search_by_vector(vector, k=k)
+            except Exception:
+                pass
+        return results
 
+    def _planning_prompt(self, doc_type, core_files, context):
         if doc_type == "business":
-            planning_prompt = (
+            return (
                 f"Act as a Chief Product Officer. Outline an Enterprise Business Manual for the '{self.current_repo_name}' product.\n"
                 f"Codebase Context Snippets:\n{context}\n\n"
                 "Generate a dynamic table of contents (exactly 6 chapters) tailored to the business capabilities of this app.\n\n"
                 "CRITICAL RULES: NO TECHNICAL TITLES. Use titles like 'User Access & Authentication Workflow' or 'Core E-Commerce Capabilities'.\n"
                 "Return ONLY a valid JSON array of objects. Format: [{\"chapter_num\": 1, \"title\": \"Chapter 1: [Business Name]\", \"topic\": \"[Technical keywords to search]\", \"role\": \"Product Manager\"}]"
             )
-        else:
-            planning_prompt = (
-                f"Act as a Principal Software Architect. Outline an Architectural Manual for the '{self.current_repo_name}' repository.\n"
-                f"Critical files heavily connected in this project: {', '.join(core_files)}\n"
-                f"Codebase Context Snippets:\n{context}\n\n"
-                "Generate a dynamic table of contents (exactly 6 chapters) tailored EXACTLY to this codebase's specific domain.\n\n"
-                "CRITICAL RULES: NO GENERIC TITLES. Invent highly creative, deeply technical chapter titles.\n"
-                "Return ONLY a valid JSON array of objects. Format: [{\"chapter_num\": 1, \"title\": \"Chapter 1: [Specific Name]\", \"topic\": \"[Keywords]\", \"role\": \"Lead Engineer\"}]"
-            )
-        
+        return (
+            f"Act as a Principal Software Architect. Outline an Architectural Manual for the '{self.current_repo_name}' repository.\n"
+            f"Critical files heavily connected in this project: {', '.join(core_files)}\n"
+            f"Codebase Context Snippets:\n{context}\n\n"
+            "Generate a dynamic table of contents (exactly 6 chapters) tailored EXACTLY to this codebase's specific domain.\n\n"
+            "CRITICAL RULES: NO GENERIC TITLES. Invent highly creative, deeply technical chapter titles.\n"
+            "Return ONLY a valid JSON array of objects. Format: [{\"chapter_num\": 1, \"title\": \"Chapter 1: [Specific Name]\", \"topic\": \"[Keywords]\", \"role\": \"Lead Engineer\"}]"
+        )
+
+    @staticmethod
+    def _parse_chapter_plan(response):
+        match = re.search(r'\[.*\]', response, re.DOTALL)
+        if not match:
+            raise ValueError("No JSON array found in the AI response.")
+        chapters_plan = json.loads(match.group(0))
+        if not isinstance(chapters_plan, list) or not all(isinstance(chap, dict) for chap in chapters_plan):
+            raise ValueError("The AI response is not a list of chapters.")
+        return chapters_plan
+
+    @classmethod
+    def _is_chapter_plan(cls, response):
         try:
-            plan_response = self.llm.invoke(planning_prompt).content
-            
-            match = re.search(r'\[.*\]', plan_response, re.DOTALL)
-            if not match:
-                raise ValueError("No JSON array found in the AI response.")
-                
-            clean_json = match.group(0)
-            chapters_plan = json.loads(clean_json)
-            
-            print(f"   ✅ Dynamic chapters generated for {doc_type}: {len(chapters_plan)} chapters.")
+            cls._parse_chapter_plan(response)
+            return True
+        except ValueError:
+            return False
+
+    async def _aplan_chapters(self, doc_type, core_files, context):
+        self.log(f"   🧠 Analyzing FAISS DB and Graph to dynamically outline {doc_type} chapters...")
+        try:
+            plan_response = await self._allm(self._planning_prompt(doc_type, core_files, context), accept=self._is_chapter_plan)
+            chapters_plan = self._parse_chapter_plan(plan_response)
+
+            self.log(f"   ✅ Dynamic chapters generated for {doc_type}: {len(chapters_plan)} chapters.")
         except Exception as e:
-            print(f"   ⚠️ Failed to dynamically generate chapters. Using fallback. Error: {e}")
+            self.log(f"   ⚠️ Failed to dynamically generate chapters. Using fallback. Error: {e}")
             if doc_type == "business":
                 chapters_plan = [
                     {"chapter_num": 1, "title": "Chapter 1: Core Business Capabilities", "topic": "main features overview", "role": "Product Manager"},
@@ -335,7 +841,27 @@ class ProductionAgent:
                     {"chapter_num": 1, "title": "Chapter 1: Core System Implementation", "topic": "main execution flow", "role": "Architect"},
                     {"chapter_num": 2, "title": "Chapter 2: Routing & Endpoints", "topic": "api, routes, web framework", "role": "Backend Lead"}
                 ]
+        return chapters_plan
 
+    async def _aarchitecture_section(self, ranked, rendering):
+        self.log("   🕸️  Visualizing Architecture Graph & Running AI Analysis...")
+        nodes_list = ranked[:35]
+        with track("architecture_diagram"):
+            # The image is drawn in a worker process while the LLM explains the graph.
+            graph_explanation = await self._allm(f"Explain WHY these core files are central to {self.current_repo_name}: {', '.join([os.path.basename(n) for n in nodes_list[:15]])}")
+            image_filename, image_version = await asyncio.wrap_future(rendering)
+        
+        mermaid_graph = "".join(self.dep_engine.export("mermaid", nodes=nodes_list[:20]))
+        return (
+            "# System Architecture Network\n\n"
+            f"![System Architecture](http://localhost:8000/api/images/{image_filename}?v={image_version})\n\n"
+            f"{graph_explanation}\n\n"
+            "### Critical Path Visualization (Mermaid)\n\n"
+            f"```mermaid\n{mermaid_graph}\n```\n\n"
+        )
+
+    async def _awrite_report(self, doc_type, chapters_plan, topic_docs, architecture=None):
+        self.log(f"\n📚 GENERATING AURA REPORT ({doc_type.upper()} EDITION)...")
         toc = "## 📑 Table of Contents (Index)\n\n"
         for chap in chapters_plan:
             title = chap.get("title", "Chapter")
@@ -356,48 +882,9 @@ class ProductionAgent:
             f"{toc}"
         )
 
-        for chap in chapters_plan:
-            full_document += self.write_heavy_chapter(
-                chap.get("chapter_num", 0), chap.get("title", "Chapter"),
-                chap.get("topic", "features"), chap.get("role", "Expert"), doc_type
-            )
-            time.sleep(3)
-        
+        full_document += "".join(await self._awrite_chapters(chapters_plan, doc_type, topic_docs))
         if doc_type == "technical":
-            print("   🕸️  Visualizing Architecture Graph & Running AI Analysis...")
-            top_nodes = sorted(self.dep_engine.graph.degree, key=lambda x: x[1], reverse=True)[:35]
-            nodes_list = [n[0] for n in top_nodes]
-            subgraph = self.dep_engine.graph.subgraph(nodes_list)
-            
-            plt.figure(figsize=(10, 8))
-            plt.gca().set_facecolor('#ffffff') 
-            pos = nx.spring_layout(subgraph, k=0.7, iterations=50)
-            nx.draw_networkx_edges(subgraph, pos, edge_color='#94a3b8', alpha=0.8)
-            nx.draw_networkx_nodes(subgraph, pos, node_color='#3b82f6', node_size=150)
-            labels = {n: os.path.basename(n) for n in subgraph.nodes()}
-            nx.draw_networkx_labels(subgraph, pos, labels, font_size=9, font_weight='bold')
-            
-            os.makedirs("images", exist_ok=True)
-            image_filename = f"architecture_{self.current_repo_name}.png"
-            image_path = os.path.join("images", image_filename)
-            plt.axis('off')
-            plt.savefig(image_path, format="PNG", bbox_inches='tight', dpi=300)
-            plt.close()
-
-            graph_explanation = self.llm.invoke(f"Explain WHY these core files are central to {self.current_repo_name}: {', '.join([os.path.basename(n) for n in nodes_list[:15]])}").content
-            
-            mermaid_graph = "graph TD\n"
-            for u, v in self.dep_engine.graph.edges():
-                if os.path.basename(u) in [os.path.basename(n) for n in nodes_list[:20]] and os.path.basename(v) in [os.path.basename(n) for n in nodes_list[:20]]:
-                    mermaid_graph += f"    {os.path.basename(u)} --> {os.path.basename(v)}\n"
-
-            full_document += (
-                "# System Architecture Network\n\n"
-                f"![System Architecture](http://localhost:8000/api/images/{image_filename})\n\n"
-                f"{graph_explanation}\n\n"
-                "### Critical Path Visualization (Mermaid)\n\n"
-                f"```mermaid\n{mermaid_graph}\n```\n\n"
-            )
+            full_document += await architecture
 
         os.makedirs("reports", exist_ok=True)
         # 🔥 FIX: Dynamically saves as AURA_BUSINESS_REPORT or AURA_TECHNICAL_REPORT based on the current run
@@ -405,13 +892,14 @@ class ProductionAgent:
         with open(output_filename, "w", encoding="utf-8") as f:
             f.write(full_document)
             
-        print(f"\n✨ SUCCESS: '{output_filename}' generated.")
+        self.log(f"\n✨ SUCCESS: '{output_filename}' generated.")
         return output_filename
 
-    def generate_business_manual(self):
-        print("\n   📢 Generating Customer-Facing Release Notes & Manual...")
-        docs = self._safe_search("routes, endpoints, main features, core business logic, user interface, API", k=25)
-        context = "\n".join([d.page_content[:600] for d in docs])
+    async def _awrite_release_notes(self, docs=None):
+        self.log("\n   📢 Generating Customer-Facing Release Notes & Manual...")
+        if docs is None:
+            docs = await asyncio.to_thread(self._safe_search, RELEASE_NOTES_QUERY, 25)
+        context = "\n".join([d.page_content for d in pack_context(docs, MANUAL_CONTEXT_TOKENS)])
         
         marketing_prompt = (
             f"Act as the Head of Product Marketing. I am giving you the raw codebase context for a software project called '{self.current_repo_name}'.\n\n"
@@ -427,13 +915,67 @@ class ProductionAgent:
             "Write the document now."
         )
         try:
-            content = self.llm.invoke(marketing_prompt).content
+            with track("release_notes"):
+                content = await self._allm(marketing_prompt)
             os.makedirs("reports", exist_ok=True)
             output_filename = os.path.join("reports", f"RELEASE_NOTES_{self.current_repo_name}.md")
             with open(output_filename, "w", encoding="utf-8") as f:
                 f.write(content)
-            print(f"   ✅ SUCCESS: '{output_filename}' generated.")
+            self.log(f"   ✅ SUCCESS: '{output_filename}' generated.")
             return output_filename
         except Exception as e:
-            print(f"   ⚠️ Error generating business manual: {e}")
-            return None
\ No newline at end of file
+            self.log(f"   ⚠️ Error generating business manual: {e}")
+            return None
+
+    async def _agenerate_documents(self, doc_types, release_notes):
+        # Rankings, the diagram and every search are computed once and shared by all documents.
+        ranked = self.dep_engine.ranked_nodes(40)
+        architecture = notes = None
+        if "technical" in doc_types:
+            subgraph = self.dep_engine.graph.subgraph(ranked[:35])
+            labels = {n: os.path.basename(n) for n in subgraph.nodes()}
+            rendering = self.diagram_renderer.submit(subgraph, f"architecture_{self.current_repo_name}", labels)
+            architecture = asyncio.create_task(self._aarchitecture_section(ranked, rendering))
+        try:
+            queries = {PLANNING_QUERY: 15} if doc_types else {}
+            if release_notes: queries[RELEASE_NOTES_QUERY] = 25
+            with self.timings.stage("retrieval"):
+                shared_docs = await asyncio.to_thread(self._search_many, queries)
+            if release_notes:
+                notes = asyncio.create_task(self._awrite_release_notes(shared_docs.get(RELEASE_NOTES_QUERY)))
+
+            planning_docs = shared_docs.get(PLANNING_QUERY)
+            if planning_docs is None and doc_types:
+                planning_docs = await asyncio.to_thread(self._safe_search, PLANNING_QUERY, 15)
+            context = "\n".join([d.page_content for d in pack_context(planning_docs or [], PLANNING_CONTEXT_TOKENS)])
+            core_files = [os.path.basename(n) for n in ranked]
+            with self.timings.stage("planning"):
+                plans = await asyncio.gather(*[self._aplan_chapters(doc_type, core_files, context) for doc_type in doc_types])
+
+            # Both documents' chapter topics are embedded together; shared topics are searched once.
+            topics = {chap.get("topic", "features"): 20 for plan in plans for chap in plan}
+            with self.timings.stage("retrieval"):
+                topic_docs = await asyncio.to_thread(self._search_many, topics)
+
+            with self.timings.stage("writing"):
+                documents = list(await asyncio.gather(*[
+                    self._awrite_report(doc_type, plan, topic_docs, architecture) for doc_type, plan in zip(doc_types, plans)
+                ]))
+                if notes: documents.append(await notes)
+            return documents
+        finally:
+            for task in (architecture, notes):
+                if task and not task.done(): task.cancel()
+
+    def generate_documents(self, doc_types=("technical",), release_notes=True):
+        """Write the requested reports and the release notes concurrently in one pass.
+
+        Returns the file names: one per doc type, in order, then the release notes (None if they failed).
+        """
+        return asyncio.run(self._agenerate_documents(list(doc_types), release_notes))
+
+    def generate_aura_report(self, doc_type="technical"):
+        return self.generate_documents([doc_type], release_notes=False)[0]
+
+    def generate_business_manual(self):
+        return self.generate_documents([], release_notes=True)[0]
@@ -0,0 +1,126 @@
+"""Offline stand-ins for the network services the pipeline talks to."""
+import re
+import time
+import asyncio
+import zlib
+from collections import defaultdict
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+_WORD = re.compile(r"[A-Za-z_][A-Za-z0-9_]*")
+
+
+class HashingEmbeddings(Embeddings):
+    """Deterministic bag-of-words vectors: each token is hashed into one of `dim` buckets.
+
+    Texts sharing identifiers land near each other, so retrieval over them behaves
+    roughly like it does with a real model, at no cost and without a network.
+    """
+
+    def __init__(self, dim=256):
+        self.dim = dim
+
+    def _embed(self, text):
+        vector = np.zeros(self.dim, dtype=np.float32)
+        for token in _WORD.findall(text.lower()):
+            vector[zlib.crc32(token.encode()) % self.dim] += 1.0
+        norm = np.linalg.norm(vector)
+        return (vector / norm if norm else vector).tolist()
+
+    def embed_documents(self, texts):
+        return [self._embed(t) for t in texts]
+
+    def embed_query(self, text):
+        return self._embed(text)
+
+
+class _Message:
+    def __init__(self, content):
+        self.content = content
+
+
+class StubLLM:
+    """Answers every prompt instantly (or after `latency` seconds) with fixed markdown."""
+
+    PLAN = ('[' + ", ".join(
+        f'{{"chapter_num": {n}, "title": "Chapter {n}: Subsystem {n}", "topic": "service process helper {n}", "role": "Lead Engineer"}}'
+        for n in range(1, 7)) + ']')
+
+    def __init__(self, latency=0.0):
+        self.latency = latency
+        self.calls = 0
+
+    def _answer(self, prompt):
+        self.calls += 1
+        if "table of contents" in str(prompt):
+            return _Message(self.PLAN)
+        return _Message("## Overview\n\nStub content.\n\n```mermaid\ngraph TD\n    a --> b\n```")
+
+    def invoke(self, prompt, *args, **kwargs):
+        if self.latency: time.sleep(self.latency)
+        return self._answer(prompt)
+
+    async def ainvoke(self, prompt, *args, **kwargs):
+        if self.latency: await asyncio.sleep(self.latency)
+        return self._answer(prompt)
+
+
+class _Result:
+    def consume(self):
+        return None
+
+
+class _Transaction:
+    def __init__(self, store):
+        self.store = store
+
+    def run(self, query, **params):
+        self.store.queries += 1
+        self.store.rows += len(params.get("rows", ()))
+        if "MERGE (f:File" in query:
+            for row in params["rows"]:
+                self.store.files[(params["repo_name"], row["path"])] = row
+        elif "MERGE (a)-[:IMPORTS]->(b)" in query:
+            for row in params["rows"]:
+                self.store.imports[params["repo_name"]].add((row["source"], row["target"]))
+        return _Result()
+
+
+class _Session:
+    def __init__(self, store):
+        self.store = store
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def execute_write(self, fn, *args):
+        self.store.transactions += 1
+        return fn(_Transaction(self.store), *args)
+
+    def run(self, query, **params):
+        return _Result()
+
+
+class InMemoryNeo4j:
+    """Driver-shaped store that runs the engine's real transaction functions against dicts.
+
+    Measures the client side of persistence (row building, batching, call overhead);
+    the database's own write cost is out of scope offline.
+    """
+
+    def __init__(self):
+        self.files = {}
+        self.imports = defaultdict(set)
+        self.queries = 0
+        self.rows = 0
+        self.transactions = 0
+
+    def session(self, **kwargs):
+        return _Session(self)
+
+    def close(self):
+        pass
@@ -0,0 +1,204 @@
+"""Offline benchmark of the analysis pipeline on synthetic repositories.
+
+    python -m benchmarks.run --files 100 1000 10000 --output benchmarks/results/latest.json
+
+Run from backend/. Everything external is faked (Neo4j, embeddings, LLM), so numbers
+measure AURA's own code and are comparable across commits on the same machine.
+"""
+import os
+import sys
+import json
+import time
+import platform
+import argparse
+import tempfile
+import subprocess
+import contextlib
+from datetime import datetime, timezone
+
+import aura_agent
+import diagram_renderer
+from aura_agent import DependencyEngine, ProductionAgent
+from chat_agent import ChatAgent
+from chunking import chunk_records
+from embedding_pipeline import EmbeddingPipeline
+from ingestion import ingest_files
+from lexical_index import LexicalIndex
+from throttling import TokenBucket
+from benchmarks.fakes import HashingEmbeddings, InMemoryNeo4j, StubLLM
+from benchmarks.synthetic_repo import generate_repo
+
+REPO_NAME = "bench_repo"
+UNLIMITED_RATE = 1e9
+
+# Half name symbols (bare or mostly-identifier ones are served from the symbol table), half are plain language.
+RETRIEVAL_QUESTIONS = [
+    "How is the invoice batch processed?",
+    "Where is Service{i}_0 defined?",
+    "What validates the shipping discount payload?",
+    "What does helper_{i}_1 return?",
+    "How are warehouse orders saved to the repository?",
+    "Explain Service{i}_3.process_3",
+]
+
+
+def _quiet(*args, **kwargs):
+    pass
+
+
+def _percentile(samples, q):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * q))]
+
+
+def _latency_stats(samples):
+    return {"count": len(samples), "p50_ms": round(_percentile(samples, 0.5) * 1000, 3),
+            "p95_ms": round(_percentile(samples, 0.95) * 1000, 3), "max_ms": round(max(samples) * 1000, 3)}
+
+
+def _git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+@contextlib.contextmanager
+def _timed(stages, name):
+    start = time.perf_counter()
+    yield
+    stages[name] = round(time.perf_counter() - start, 4)
+
+
+def _agent(workdir, embeddings, llm_latency, verbose):
+    aura_agent.EMBEDDING_CACHE_PATH = os.path.join(workdir, "embedding_cache.sqlite")
+    aura_agent.LAYOUT_CACHE_PATH = os.path.join(workdir, "layouts.sqlite")
+    aura_agent.LLM_CACHE_PATH = os.path.join(workdir, "llm_cache.sqlite")
+    agent = ProductionAgent()
+    agent.embeddings = embeddings
+    agent.embedding_pipeline = EmbeddingPipeline(embeddings.embed_documents, requests_per_second=UNLIMITED_RATE,
+                                                 max_concurrency=aura_agent.EMBED_CONCURRENCY,
+                                                 batch_size=aura_agent.EMBED_BATCH_SIZE,
+                                                 max_batch_size=aura_agent.EMBED_MAX_BATCH_SIZE)
+    agent.query_pipeline.limiter = TokenBucket(UNLIMITED_RATE)
+    agent.llm = StubLLM(llm_latency)
+    agent.llm_limiter = TokenBucket(UNLIMITED_RATE)
+    agent.current_repo_name = REPO_NAME
+    if not verbose: agent.log = _quiet
+    return agent
+
+
+def _retrieval(embeddings, files, queries):
+    chat = ChatAgent()
+    chat.embeddings = embeddings
+    vector_db = chat._get_vector_db(REPO_NAME)
+    chat.lexical_indexes.get(REPO_NAME)
+    questions = [q.format(i=(n * 7919) % files) for n, q in
+                 ((n, RETRIEVAL_QUESTIONS[n % len(RETRIEVAL_QUESTIONS)]) for n in range(queries))]
+    cold, warm = [], []
+    for samples in (cold, warm):
+        for question in questions:
+            start = time.perf_counter()
+            chat._retrieve(REPO_NAME, vector_db, question)
+            samples.append(time.perf_counter() - start)
+    return {"cold": _latency_stats(cold), "warm": _latency_stats(warm)}
+
+
+def run_benchmark(files, fan_out=4, file_lines=60, seed=0, queries=50, llm_latency=0.0, workdir=None, verbose=False):
+    """Run every stage once on a fresh synthetic repository of `files` modules."""
+    with tempfile.TemporaryDirectory(prefix="aura_bench_", dir=workdir) as tmp:
+        root = os.path.join(tmp, REPO_NAME)
+        cwd = os.getcwd()
+        os.chdir(tmp)  # faiss_dbs/, images/ and reports/ are relative to the working directory
+        try:
+            stages = {}
+            with _timed(stages, "generate_repo"):
+                generate_repo(root, files=files, fan_out=fan_out, file_lines=file_lines, seed=seed)
+
+            store = InMemoryNeo4j()
+            engine = DependencyEngine(root, driver=store)
+            if not verbose: engine.log = _quiet
+            with _timed(stages, "ingest"):
+                records = list(ingest_files(root, engine._get_files()))
+            # Persistence is timed on its own below, so the build runs without a driver.
+            engine.driver = None
+            with _timed(stages, "graph_build"):
+                engine.build(REPO_NAME, records)
+
+            engine.driver = store
+            with _timed(stages, "neo4j_persist"):
+                engine._save_to_neo4j(list(engine.graph.nodes), list(engine.graph.edges), REPO_NAME)
+
+            with _timed(stages, "chunking"):
+                chunks = chunk_records(records)
+
+            embeddings = HashingEmbeddings()
+            agent = _agent(tmp, embeddings, llm_latency, verbose)
+            agent.dep_engine = engine
+            db_path = os.path.join("faiss_dbs", f"faiss_db_{REPO_NAME}")
+            with _timed(stages, "faiss_build"):
+                agent._vectorize(chunks)
+                agent.vector_db.save_local(db_path)
+                LexicalIndex.from_vector_store(agent.vector_db).save(db_path)
+
+            with _timed(stages, "retrieval"):
+                retrieval = _retrieval(embeddings, files, queries)
+
+            with _timed(stages, "report"):
+                agent.generate_documents(["technical", "business"], release_notes=True)
+        finally:
+            os.chdir(cwd)
+
+    return {
+        "files": files,
+        "fan_out": fan_out,
+        "file_lines": file_lines,
+        "nodes": engine.graph.number_of_nodes(),
+        "edges": engine.graph.number_of_edges(),
+        "chunks": len(chunks),
+        "neo4j": {"transactions": store.transactions, "rows": store.rows},
+        "llm_calls": agent.llm.calls,
+        "stages": stages,
+        "retrieval": retrieval,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark AURA's ingestion, graph and retrieval paths offline.")
+    parser.add_argument("--files", type=int, nargs="+", default=[100, 1000, 10000])
+    parser.add_argument("--fan-out", type=int, default=4, help="imports per file")
+    parser.add_argument("--file-lines", type=int, default=60, help="approximate lines per file")
+    parser.add_argument("--queries", type=int, default=50, help="retrieval questions per pass")
+    parser.add_argument("--llm-latency", type=float, default=0.0, help="seconds the stub LLM waits per call")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", default=os.path.join("benchmarks", "results", "latest.json"))
+    parser.add_argument("--verbose", action="store_true", help="keep the pipeline's own log output")
+    args = parser.parse_args(argv)
+
+    output = os.path.abspath(args.output)
+    results = {
+        "commit": _git_commit(),
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "python": sys.version.split()[0],
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+        "runs": [],
+    }
+    try:
+        for files in args.files:
+            print(f"⏱️  Benchmarking {files} files...")
+            run = run_benchmark(files, args.fan_out, args.file_lines, args.seed, args.queries, args.llm_latency, verbose=args.verbose)
+            results["runs"].append(run)
+            print("   " + ", ".join(f"{stage} {seconds:.2f}s" for stage, seconds in run["stages"].items()))
+    finally:
+        diagram_renderer.shutdown()
+
+    os.makedirs(os.path.dirname(output), exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(results, f, indent=2)
+    print(f"✅ Results written to {output}")
+    return results
+
+
+if __name__ == "__main__":
+    main()
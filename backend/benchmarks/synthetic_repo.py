@@ -0,0 +1,79 @@
+import os
+import random
+
+# Files per package; imports inside a package use relative form, across packages absolute.
+PACKAGE_SIZE = 50
+
+
+def _module(i):
+    return f"pkg_{i // PACKAGE_SIZE}", f"mod_{i}"
+
+
+def _body(i, file_lines, rng):
+    """Classes and functions until the file reaches roughly `file_lines` lines."""
+    lines = [f'"""Synthetic module {i}: order processing, billing and inventory helpers."""', ""]
+    n = 0
+    while len(lines) < file_lines:
+        if n % 3 == 0:
+            lines += [
+                f"class Service{i}_{n}:",
+                f'    """Handles invoice batch {n} for warehouse {rng.randint(1, 99)}."""',
+                "",
+                "    def __init__(self, repository):",
+                "        self.repository = repository",
+                "",
+                f"    def process_{n}(self, items):",
+                "        total = 0",
+                "        for item in items:",
+                "            total += item.price * item.quantity",
+                "        return self.repository.save(total)",
+                "",
+            ]
+        else:
+            lines += [
+                f"def helper_{i}_{n}(payload, retries={rng.randint(1, 5)}):",
+                f'    """Validate payload {n} and compute the shipping discount."""',
+                "    if not payload:",
+                "        raise ValueError('empty payload')",
+                "    return sum(len(str(v)) for v in payload.values()) * retries",
+                "",
+            ]
+        n += 1
+    return lines
+
+
+def generate_repo(root, files=100, fan_out=4, file_lines=60, seed=0):
+    """Write a Python repository of `files` modules, each importing `fan_out` others.
+
+    Imports prefer nearby modules (like real code, most imports stay within a package) and
+    everything is derived from `seed`, so the same parameters always give the same tree.
+    Returns the list of relative paths written.
+    """
+    rng = random.Random(seed)
+    written = []
+    for package in {_module(i)[0] for i in range(files)}:
+        os.makedirs(os.path.join(root, package), exist_ok=True)
+        with open(os.path.join(root, package, "__init__.py"), "w", encoding="utf-8") as f:
+            f.write("")
+        written.append(f"{package}/__init__.py")
+
+    for i in range(files):
+        package, module = _module(i)
+        targets = set()
+        while len(targets) < min(fan_out, files - 1):
+            j = min(files - 1, max(0, int(rng.gauss(i, PACKAGE_SIZE))))
+            if j != i: targets.add(j)
+        imports = []
+        for j in sorted(targets):
+            target_package, target_module = _module(j)
+            if target_package == package:
+                imports.append(f"from . import {target_module}")
+            else:
+                imports.append(f"from {target_package} import {target_module}")
+        imports += ["import os", "import json"]
+
+        rel_path = f"{package}/{module}.py"
+        with open(os.path.join(root, rel_path), "w", encoding="utf-8") as f:
+            f.write("\n".join(imports + [""] + _body(i, file_lines, rng)) + "\n")
+        written.append(rel_path)
+    return written
@@ -1,42 +1,165 @@
 import os
+import re
+import time
+import asyncio
+from collections import deque
 from langchain_nvidia_ai_endpoints import NVIDIAEmbeddings, ChatNVIDIA
 from langchain_community.vectorstores import FAISS
 from langchain_core.prompts import ChatPromptTemplate, MessagesPlaceholder
-from langchain_core.messages import HumanMessage, AIMessage
 from langchain_core.output_parsers import StrOutputParser
 from dotenv import load_dotenv
 
+from vector_store_cache import VectorStoreCache
+from chat_sessions import ChatSessionStore
+from caching import TTLCache, SingleFlight
+from context_packing import pack_context
+from lexical_index import LexicalIndex, extract_identifiers, identifiers_dominate, reciprocal_rank_fusion
+from metrics import track, record_llm_call, STAGE_SECONDS, VECTOR_SEARCH_SECONDS
+
 load_dotenv()
 
+FAISS_CACHE_MAX_BYTES = int(os.getenv("AURA_FAISS_CACHE_MAX_MB", "1024")) * 1024 * 1024
+LEXICAL_CACHE_MAX_BYTES = int(os.getenv("AURA_LEXICAL_CACHE_MAX_MB", "256")) * 1024 * 1024
+PREWARM_REPOS = [r.strip() for r in os.getenv("AURA_PREWARM_REPOS", "").split(",") if r.strip()]
+CHAT_HISTORY_TOKENS = int(os.getenv("AURA_CHAT_HISTORY_TOKENS", "2000"))
+CHAT_SESSION_TTL_SECONDS = int(os.getenv("AURA_CHAT_SESSION_TTL", "1800"))
+CHAT_MAX_TOTAL_TOKENS = int(os.getenv("AURA_CHAT_MAX_TOTAL_TOKENS", "5000000"))
+RETRIEVAL_CACHE_SIZE = int(os.getenv("AURA_RETRIEVAL_CACHE_SIZE", "1024"))
+RETRIEVAL_CACHE_TTL_SECONDS = int(os.getenv("AURA_RETRIEVAL_CACHE_TTL", "900"))
+RETRIEVAL_K = 10
+CHAT_CONTEXT_TOKENS = int(os.getenv("AURA_CHAT_CONTEXT_TOKENS", "4000"))
+
+def normalize_question(question):
+    """Case, whitespace and trailing punctuation don't change what a question retrieves."""
+    return re.sub(r"\s+", " ", question).strip().rstrip("?!. ").lower()
+
 class ChatAgent:
     def __init__(self):
         self.embeddings = NVIDIAEmbeddings(model="nvidia/nv-embed-v1", model_type="passage")
         self.llm = ChatNVIDIA(model="meta/llama-3.1-70b-instruct", temperature=0.1)
-        self.active_dbs = {}
-        self.chat_histories = {}
+        self.vector_dbs = VectorStoreCache(self._load_vector_db, FAISS_CACHE_MAX_BYTES, version_of=self._index_version)
+        self.lexical_indexes = VectorStoreCache(self._load_lexical_index, LEXICAL_CACHE_MAX_BYTES, version_of=self._index_version,
+                                                sizeof=lambda index: index.estimated_bytes(), label="lexical index")
+        self.sessions = ChatSessionStore(
+            history_token_budget=CHAT_HISTORY_TOKENS,
+            ttl_seconds=CHAT_SESSION_TTL_SECONDS,
+            max_total_tokens=CHAT_MAX_TOTAL_TOKENS,
+        )
+        # Query vectors don't depend on the index, so they survive rebuilds; retrievals don't.
+        self.query_vectors = TTLCache(RETRIEVAL_CACHE_SIZE, RETRIEVAL_CACHE_TTL_SECONDS)
+        self.retrievals = TTLCache(RETRIEVAL_CACHE_SIZE, RETRIEVAL_CACHE_TTL_SECONDS)
+        self._retrieval_flights = SingleFlight()
+        self.ttft_seconds = deque(maxlen=1000)
+
+    def _db_path(self, repo_name):
+        return os.path.join("faiss_dbs", f"faiss_db_{repo_name}")
+
+    def _index_version(self, repo_name):
+        # The index file's mtime changes whenever an analysis rewrites it.
+        try: return os.stat(os.path.join(self._db_path(repo_name), "index.faiss")).st_mtime_ns
+        except OSError: return None
+
+    def _load_vector_db(self, repo_name):
+        db_path = self._db_path(repo_name)
+        if not os.path.exists(db_path):
+            return None
+        version = self._index_version(repo_name)
+        return FAISS.load_local(db_path, self.embeddings, allow_dangerous_deserialization=True), version
+
+    def _load_lexical_index(self, repo_name):
+        db_path = self._db_path(repo_name)
+        if not os.path.exists(db_path):
+            return None
+        version = self._index_version(repo_name)
+        index = LexicalIndex.load(db_path)
+        if index is None:
+            # Analyzed before lexical indexes were written: build one from the docstore.
+            vector_db = self._get_vector_db(repo_name)
+            if not vector_db: return None
+            index = LexicalIndex.from_vector_store(vector_db)
+        return index, version
 
     def _get_vector_db(self, repo_name):
-        db_path = os.path.join("faiss_dbs", f"faiss_db_{repo_name}")
-        if repo_name not in self.active_dbs:
-            if not os.path.exists(db_path):
-                return None
-            self.active_dbs[repo_name] = FAISS.load_local(
-                db_path, self.embeddings, allow_dangerous_deserialization=True
-            )
-        return self.active_dbs[repo_name]
-
-    def ask_question(self, repo_name, question):
+        return self.vector_dbs.get(repo_name)
+
+    def prewarm(self, repo_names=None):
+        """Load hot repositories' indexes ahead of their first question."""
+        self.vector_dbs.prewarm(PREWARM_REPOS if repo_names is None else repo_names)
+
+    def invalidate_repo(self, repo_name):
+        """Forget the loaded index and cached retrievals after the repository is re-analyzed."""
+        self.vector_dbs.invalidate(repo_name)
+        self.lexical_indexes.invalidate(repo_name)
+        self.retrievals.discard_where(lambda key: key[0] == repo_name)
+
+    def _embed_query(self, normalized, question):
+        vector = self.query_vectors.get(normalized)
+        if vector is None:
+            vector = self.embeddings.embed_query(question.strip())
+            self.query_vectors.set(normalized, vector)
+        return vector
+
+    def _hybrid_search(self, repo_name, vector_db, question, normalized, k):
+        """Fuse dense, BM25 and symbol-table results.
+
+        Questions that are mostly known identifiers (or backticked ones) skip the embedding;
+        a symbol merely mentioned in prose only adds its definition to the fused ranking.
+        """
+        lexical = self.lexical_indexes.get(repo_name)
+        lexical_ids = [doc_id for doc_id, _ in lexical.search(question, k)] if lexical else []
+        identifiers = extract_identifiers(question)
+        symbol_ids = lexical.lookup_symbols(identifiers) if lexical and identifiers else []
+        if symbol_ids and identifiers_dominate(question, identifiers):
+            return vector_db.get_by_ids(reciprocal_rank_fusion([symbol_ids, lexical_ids])[:k])
+
+        query_vector = self._embed_query(normalized, question)
+        with VECTOR_SEARCH_SECONDS.time(component="chat"):
+            dense = vector_db.similarity_search_by_vector(query_vector, k=k)
+        sparse = [ranking for ranking in (symbol_ids, lexical_ids) if ranking]
+        if not sparse or not all(d.id for d in dense):
+            return dense
+        ids = reciprocal_rank_fusion([[d.id for d in dense], *sparse])[:k]
+        by_id = {d.id: d for d in dense}
+        by_id.update({d.id: d for d in vector_db.get_by_ids([i for i in ids if i not in by_id])})
+        return [by_id[i] for i in ids if i in by_id]
+
+    def _retrieve(self, repo_name, vector_db, question, k=RETRIEVAL_K):
+        normalized = normalize_question(question)
+        key = (repo_name, self.vector_dbs.version(repo_name), normalized, k)
+        doc_ids = self.retrievals.get(key)
+        if doc_ids is not None:
+            return vector_db.get_by_ids(doc_ids)
+
+        def search():
+            docs = self._hybrid_search(repo_name, vector_db, question, normalized, k)
+            # Indexes written before documents carried ids can't be re-fetched by id.
+            if all(d.id for d in docs):
+                self.retrievals.set(key, [d.id for d in docs])
+            return docs
+
+        # Concurrent identical questions wait for the first one's search instead of repeating it.
+        return self._retrieval_flights.do(key, search)
+
+    def ttft_stats(self):
+        """Time-to-first-token over recent answers, in seconds."""
+        samples = sorted(self.ttft_seconds)
+        if not samples: return {"count": 0, "p50": None, "p95": None}
+        return {"count": len(samples), "p50": samples[len(samples) // 2], "p95": samples[min(len(samples) - 1, int(len(samples) * 0.95))]}
+
+    async def ask_question(self, repo_name, question, session_id=None):
+        """Async generator streaming the answer; closing it cancels the upstream LLM call."""
+        start = time.perf_counter()
         try:
-            vector_db = self._get_vector_db(repo_name)
+            # Index loads and retrieval block, so they stay off the event loop.
+            vector_db = await asyncio.to_thread(self._get_vector_db, repo_name)
             if not vector_db:
                 raise FileNotFoundError("Database not found.")
 
-            docs = vector_db.similarity_search(question, k=10)
-            context = "\n\n".join([f"--- FILE: {d.metadata.get('source', 'unknown')} ---\n{d.page_content}" for d in docs])
+            with track("chat_retrieval"):
+                docs = await asyncio.to_thread(self._retrieve, repo_name, vector_db, question)
+            context = "\n\n".join([f"--- FILE: {d.metadata.get('source', 'unknown')} ---\n{d.page_content}" for d in pack_context(docs, CHAT_CONTEXT_TOKENS)])
 
-            if repo_name not in self.chat_histories:
-                self.chat_histories[repo_name] = []
-            history = self.chat_histories[repo_name]
+            history, summary = self.sessions.context(repo_name, session_id)
 
             # Your system instruction preserved with the compulsory suggestion rule added
             system_instruction = """You are AURA, an elite AI Codebase Assistant for '{repo_name}'. 
@@ -44,6 +167,9 @@ class ChatAgent:
 CONTEXT:
 {context}
 
+EARLIER IN THIS CONVERSATION (summary):
+{conversation_summary}
+
 CRITICAL OPERATING RULES:
 1. **Response Intent Detection (STRICT):**
     - **END-USER MODE:** If the user asks about usage, features, or benefits, provide a warm, user-friendly, non-technical explanation in Markdown.
@@ -81,24 +207,33 @@ CRITICAL OPERATING RULES:
             ])
 
             chain = prompt | self.llm | StrOutputParser()
+        except Exception as e:
+            yield f"⚠️ AURA Error: {str(e)}"
+            return
 
-            def stream_generator():
-                full_response = ""
-                for chunk in chain.stream({
-                    "repo_name": repo_name,
-                    "context": context,
-                    "history": history,
-                    "enhanced_question": enhanced_question
-                }):
-                    full_response += chunk
-                    yield chunk
-
-                history.append(HumanMessage(content=question))
-                history.append(AIMessage(content=full_response))
-
-            return stream_generator()
-
+        prompt_text = "\n".join([system_instruction, context, summary or "", *(str(m.content) for m in history), enhanced_question])
+        full_response = ""
+        llm_start = time.perf_counter()
+        try:
+            async for chunk in chain.astream({
+                "repo_name": repo_name,
+                "context": context,
+                "history": history,
+                "conversation_summary": summary or "(none)",
+                "enhanced_question": enhanced_question
+            }):
+                if not full_response and chunk:
+                    ttft = time.perf_counter() - start
+                    self.ttft_seconds.append(ttft)
+                    STAGE_SECONDS.observe(ttft, stage="chat_first_token")
+                    print(f"⚡ First token for '{repo_name}' after {ttft:.2f}s")
+                full_response += chunk
+                yield chunk
         except Exception as e:
-            def error_stream():
-                yield f"⚠️ AURA Error: {str(e)}"
-            return error_stream()
\ No newline at end of file
+            record_llm_call("chat", prompt_text, full_response, time.perf_counter() - llm_start, outcome="error")
+            yield f"⚠️ AURA Error: {str(e)}"
+            return
+
+        record_llm_call("chat", prompt_text, full_response, time.perf_counter() - llm_start)
+        STAGE_SECONDS.observe(time.perf_counter() - start, stage="chat_answer")
+        self.sessions.record_turn(repo_name, session_id, question, full_response)
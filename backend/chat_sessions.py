@@ -0,0 +1,111 @@
+import time
+import threading
+from collections import OrderedDict, deque
+
+from langchain_core.messages import HumanMessage, AIMessage
+
+from tokens import estimate_tokens, truncate_to_tokens
+
+
+class ChatSession:
+    """Recent turns verbatim inside a token budget, older turns folded into a rolling summary."""
+
+    def __init__(self):
+        self.turns = deque()
+        self.summary_lines = deque()
+        self.turn_tokens = 0
+        self.summary_tokens = 0
+        self.last_used = time.time()
+
+    @property
+    def tokens(self):
+        return self.turn_tokens + self.summary_tokens
+
+    @property
+    def summary(self):
+        return "\n".join(self.summary_lines)
+
+    def messages(self):
+        history = []
+        for question, answer, _ in self.turns:
+            history.append(HumanMessage(content=question))
+            history.append(AIMessage(content=answer))
+        return history
+
+
+class ChatSessionStore:
+    """Chat histories keyed by (repo, session id), bounded per session, by idle TTL and globally.
+
+    Folding is extractive (a clipped question/answer line per old turn) rather than an extra
+    LLM call, so keeping the prompt small never adds latency to the turn itself.
+    """
+
+    def __init__(self, history_token_budget=2000, summary_token_budget=400, ttl_seconds=1800,
+                 max_total_tokens=5_000_000):
+        self.history_token_budget = history_token_budget
+        self.summary_token_budget = summary_token_budget
+        self.ttl_seconds = ttl_seconds
+        self.max_total_tokens = max_total_tokens
+        self.sessions = OrderedDict()
+        self.total_tokens = 0
+        self._lock = threading.Lock()
+
+    def context(self, repo_name, session_id):
+        """Return (history messages, summary) to send with the next question."""
+        if not session_id: return [], ""
+        with self._lock:
+            self._expire()
+            session = self.sessions.get((repo_name, session_id))
+            if not session: return [], ""
+            session.last_used = time.time()
+            self.sessions.move_to_end((repo_name, session_id))
+            return session.messages(), session.summary
+
+    def record_turn(self, repo_name, session_id, question, answer):
+        if not session_id: return
+        key = (repo_name, session_id)
+        with self._lock:
+            session = self.sessions.get(key)
+            if session is None:
+                session = self.sessions[key] = ChatSession()
+            self.sessions.move_to_end(key)
+            session.last_used = time.time()
+
+            before = session.tokens
+            cost = estimate_tokens(question) + estimate_tokens(answer)
+            session.turns.append((question, answer, cost))
+            session.turn_tokens += cost
+            while session.turn_tokens > self.history_token_budget and len(session.turns) > 1:
+                self._fold_oldest(session)
+            self.total_tokens += session.tokens - before
+            self._enforce_global_cap()
+
+    def _fold_oldest(self, session):
+        question, answer, cost = session.turns.popleft()
+        session.turn_tokens -= cost
+        line = f"- User asked: {truncate_to_tokens(question, 40)} | AURA answered: {truncate_to_tokens(answer, 60)}"
+        session.summary_lines.append(line)
+        session.summary_tokens += estimate_tokens(line)
+        while session.summary_tokens > self.summary_token_budget and session.summary_lines:
+            session.summary_tokens -= estimate_tokens(session.summary_lines.popleft())
+
+    def _expire(self):
+        cutoff = time.time() - self.ttl_seconds
+        # Sessions are kept in least-recently-used order, so expired ones sit at the front.
+        while self.sessions:
+            key, session = next(iter(self.sessions.items()))
+            if session.last_used >= cutoff: break
+            self._remove(key)
+
+    def _enforce_global_cap(self):
+        self._expire()
+        while self.total_tokens > self.max_total_tokens and len(self.sessions) > 1:
+            self._remove(next(iter(self.sessions)))
+
+    def _remove(self, key):
+        session = self.sessions.pop(key)
+        self.total_tokens -= session.tokens
+
+    def stats(self):
+        with self._lock:
+            return {"sessions": len(self.sessions), "tokens": self.total_tokens}
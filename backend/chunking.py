@@ -0,0 +1,129 @@
+import os
+import re
+
+from langchain_core.documents import Document
+from langchain_text_splitters import Language, RecursiveCharacterTextSplitter
+
+CHUNK_MAX_CHARS = int(os.getenv("AURA_CHUNK_MAX_CHARS", "2000"))
+
+MODULE = "<module>"
+# ast ends a line at \r\n, \r or \n; chunk line numbers have to agree with it.
+_LINE_BREAK = re.compile(r"\r\n?|\n")
+
+
+class _Segment:
+    """A contiguous line range [start, end] (1-based, inclusive) owned by one or more symbols."""
+
+    def __init__(self, symbols, kind, start, end):
+        self.symbols = symbols
+        self.kind = kind
+        self.start = start
+        self.end = end
+
+
+def _leading_comments(lines, start, floor):
+    # Comments directly above a definition describe it, so they travel with it.
+    while start - 1 >= floor and lines[start - 2].lstrip().startswith("#"):
+        start -= 1
+    return start
+
+
+def _has_code(lines, start, end):
+    return any(line.strip() for line in lines[start - 1 : end])
+
+
+def _segments(lines, symbols, children, start, end, owner, kind, size, max_chars):
+    """Cut [start, end] at symbol boundaries; code between symbols belongs to `owner`."""
+    segments = []
+    pos = start
+    for sym in symbols:
+        sym_start = _leading_comments(lines, sym.get("start_lineno", sym["lineno"]), pos)
+        if _has_code(lines, pos, sym_start - 1):
+            segments.append(_Segment([owner], kind, pos, sym_start - 1))
+        methods = children.get(sym["qualname"], [])
+        if sym["kind"] == "class" and methods and size(sym_start, sym["end_lineno"]) > max_chars:
+            # An oversized class is split into its header and its methods.
+            segments.extend(_segments(lines, methods, children, sym_start, sym["end_lineno"],
+                                      sym["qualname"], "class", size, max_chars))
+        else:
+            segments.append(_Segment([sym["qualname"]], sym["kind"], sym_start, sym["end_lineno"]))
+        pos = sym["end_lineno"] + 1
+    if _has_code(lines, pos, end):
+        segments.append(_Segment([owner], kind, pos, end))
+    return segments
+
+
+def _merge(segments, size, max_chars):
+    """Greedily join neighbouring segments while they fit in one chunk."""
+    merged = []
+    for seg in segments:
+        last = merged[-1] if merged else None
+        if last and size(last.start, seg.end) <= max_chars:
+            last.symbols += [s for s in seg.symbols if s not in last.symbols]
+            if last.kind != seg.kind: last.kind = "group"
+            last.end = seg.end
+        else:
+            merged.append(_Segment(list(seg.symbols), seg.kind, seg.start, seg.end))
+    return merged
+
+
+def _split_text(text, first_line, max_chars):
+    """Character-split an oversized body; yields (text, lineno, end_lineno) without overlap."""
+    splitter = RecursiveCharacterTextSplitter.from_language(
+        Language.PYTHON, chunk_size=max_chars, chunk_overlap=0, add_start_index=True)
+    for doc in splitter.create_documents([text]):
+        lineno = first_line + len(_LINE_BREAK.findall(text, 0, doc.metadata["start_index"]))
+        yield doc.page_content, lineno, lineno + len(_LINE_BREAK.findall(doc.page_content))
+
+
+def chunk_record(record, max_chars=CHUNK_MAX_CHARS):
+    """Split one SourceRecord into Documents along class and function boundaries.
+
+    Small neighbouring definitions are merged up to `max_chars`; only a single
+    definition larger than that is character-split. Files that did not parse are
+    character-split as a whole.
+    """
+    def document(text, symbols, kind, lineno, end_lineno):
+        symbol = ", ".join(s for s in symbols if s != MODULE) or MODULE
+        return Document(page_content=text, metadata={
+            "source": record.path, "symbol": symbol, "symbols": symbols, "kind": kind,
+            "lineno": lineno, "end_lineno": end_lineno,
+        })
+
+    if not record.text.strip():
+        return []
+    if not record.parsed:
+        return [document(text, [MODULE], "text", lineno, end)
+                for text, lineno, end in _split_text(record.text, 1, max_chars)]
+
+    # Break lines exactly where ast does (splitlines also breaks on form feeds etc.).
+    lines = [line for line in re.split(r"(?<=\n)|(?<=\r)(?!\n)", record.text) if line]
+    offsets = [0]
+    for line in lines: offsets.append(offsets[-1] + len(line))
+    size = lambda start, end: offsets[end] - offsets[start - 1]
+
+    top = [s for s in record.symbols if s["kind"] in ("function", "class")]
+    children = {}
+    for sym in record.symbols:
+        if sym["kind"] == "method":
+            children.setdefault(sym["qualname"].rsplit(".", 1)[0], []).append(sym)
+
+    chunks = []
+    for seg in _merge(_segments(lines, top, children, 1, len(lines), MODULE, "module", size, max_chars), size, max_chars):
+        # Blank lines at either edge only cost tokens.
+        start, end = seg.start, seg.end
+        while start < end and not lines[start - 1].strip(): start += 1
+        while end > start and not lines[end - 1].strip(): end -= 1
+        text = record.text[offsets[start - 1] : offsets[end]].rstrip()
+        if not text.strip():
+            continue
+        if len(text) <= max_chars:
+            chunks.append(document(text, seg.symbols, seg.kind, start, end))
+        else:
+            chunks.extend(document(piece, seg.symbols, seg.kind, lineno, last)
+                          for piece, lineno, last in _split_text(text, start, max_chars))
+    return chunks
+
+
+def chunk_records(records, max_chars=CHUNK_MAX_CHARS):
+    return [chunk for record in records for chunk in chunk_record(record, max_chars)]
@@ -0,0 +1,95 @@
+import re
+
+from langchain_core.documents import Document
+
+from tokens import estimate_tokens, truncate_to_tokens
+
+# A chunk cut down to fewer tokens than this carries too little to be worth its header.
+MIN_PARTIAL_TOKENS = 64
+
+_WORD = re.compile(r"[A-Za-z_][A-Za-z0-9_]*")
+
+
+def _span(doc):
+    lineno, end = doc.metadata.get("lineno"), doc.metadata.get("end_lineno")
+    return (lineno, end) if isinstance(lineno, int) and isinstance(end, int) else None
+
+
+def _join(first, second):
+    """Merge two overlapping/adjacent chunks of one file into a single chunk without repeating lines."""
+    if _span(second)[0] < _span(first)[0]:
+        first, second = second, first
+    (a_start, a_end), (b_start, b_end) = _span(first), _span(second)
+    if b_end <= a_end:
+        return first
+    tail = second.page_content.split("\n")[a_end + 1 - b_start :]
+    metadata = dict(first.metadata, end_lineno=b_end)
+    return Document(page_content="\n".join([first.page_content, *tail]), metadata=metadata, id=first.id)
+
+
+def dedupe(docs):
+    """Drop repeated chunks and fuse overlapping or adjacent chunks of the same file, keeping rank order."""
+    kept = []
+    for doc in docs:
+        text = doc.page_content.strip()
+        if not text: continue
+        merged = False
+        for i, other in enumerate(kept):
+            if other.metadata.get("source") != doc.metadata.get("source"): continue
+            a, b = _span(other), _span(doc)
+            if a and b and b[0] <= a[1] + 1 and a[0] <= b[1] + 1:
+                kept[i] = _join(other, doc)
+                merged = True
+                break
+            if text in other.page_content:
+                merged = True
+                break
+            if other.page_content.strip() in text:
+                kept[i] = doc
+                merged = True
+                break
+        if not merged:
+            kept.append(doc)
+    return kept
+
+
+def _words(text):
+    return {w.lower() for w in _WORD.findall(text)}
+
+
+def _jaccard(a, b):
+    return len(a & b) / len(a | b) if a and b else 0.0
+
+
+def mmr(docs, lambda_mult=0.7):
+    """Reorder rank-ordered docs by maximal marginal relevance, using lexical overlap as similarity."""
+    if len(docs) < 3: return list(docs)
+    relevance = [1.0 - i / len(docs) for i in range(len(docs))]
+    words = [_words(d.page_content) for d in docs]
+    remaining = list(range(len(docs)))
+    selected = []
+    while remaining:
+        best = max(remaining, key=lambda i: lambda_mult * relevance[i] - (1 - lambda_mult) * max(
+            (_jaccard(words[i], words[j]) for j in selected), default=0.0))
+        selected.append(best)
+        remaining.remove(best)
+    return [docs[i] for i in selected]
+
+
+def pack_context(docs, token_budget, lambda_mult=0.7):
+    """Dedupe, diversify and trim retrieved chunks so they fit in `token_budget` tokens.
+
+    `docs` must be ordered best-first, as vector stores return them.
+    """
+    packed = []
+    remaining = token_budget
+    for doc in mmr(dedupe(docs), lambda_mult):
+        tokens = estimate_tokens(doc.page_content)
+        if tokens <= remaining:
+            packed.append(doc)
+            remaining -= tokens
+        elif remaining >= MIN_PARTIAL_TOKENS:
+            packed.append(Document(page_content=truncate_to_tokens(doc.page_content, remaining), metadata=doc.metadata, id=doc.id))
+            break
+        # Otherwise keep looking: a smaller chunk further down may still fit.
+    return packed
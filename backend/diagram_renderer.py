@@ -0,0 +1,138 @@
+import os
+import json
+import hashlib
+import threading
+import concurrent.futures
+from concurrent.futures.process import BrokenProcessPool
+
+from disk_cache import DiskCache
+from ingestion import _pool_context
+
+DIAGRAM_FORMAT = os.getenv("AURA_DIAGRAM_FORMAT", "png").lower()
+DIAGRAM_DPI = int(os.getenv("AURA_DIAGRAM_DPI", "150"))
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def graph_hash(graph, labels=None):
+    """Stable fingerprint of a graph's nodes, edges and labels."""
+    payload = json.dumps({
+        "nodes": sorted(graph.nodes),
+        "edges": sorted(graph.edges),
+        "labels": sorted((labels or {}).items()),
+    })
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def render_graph(nodes, edges, labels, positions, path, fmt, dpi):
+    """Lay out (unless positions are given) and draw the graph to `path`. Returns the positions used.
+
+    Runs in a worker process, so it imports matplotlib itself and only takes picklable arguments.
+    """
+    import matplotlib
+    matplotlib.use('Agg')
+    import matplotlib.pyplot as plt
+    import networkx as nx
+
+    graph = nx.DiGraph()
+    graph.add_nodes_from(nodes)
+    graph.add_edges_from(edges)
+    if positions is None:
+        layout = nx.spring_layout(graph, k=0.7, iterations=50, seed=42)
+        positions = {node: [float(x), float(y)] for node, (x, y) in layout.items()}
+
+    fig = plt.figure(figsize=(10, 8))
+    plt.gca().set_facecolor('#ffffff')
+    nx.draw_networkx_edges(graph, positions, edge_color='#94a3b8', alpha=0.8)
+    nx.draw_networkx_nodes(graph, positions, node_color='#3b82f6', node_size=150)
+    nx.draw_networkx_labels(graph, positions, labels, font_size=9, font_weight='bold')
+    plt.axis('off')
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    plt.savefig(tmp_path, format=fmt.upper(), bbox_inches='tight', dpi=dpi)
+    plt.close(fig)
+    os.replace(tmp_path, path)
+    return positions
+
+
+def _get_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = concurrent.futures.ProcessPoolExecutor(max_workers=1, mp_context=_pool_context())
+        return _executor
+
+
+def shutdown():
+    global _executor
+    with _executor_lock:
+        executor, _executor = _executor, None
+    if executor: executor.shutdown(wait=False, cancel_futures=True)
+
+
+class DiagramRenderer:
+    """Renders dependency diagrams in a separate process, reusing layouts of unchanged graphs.
+
+    Layout positions are cached on disk by graph hash, and an image whose graph, format
+    and DPI are unchanged since the last render is not drawn again at all.
+    """
+
+    def __init__(self, cache_path, output_dir="images", fmt=DIAGRAM_FORMAT, dpi=DIAGRAM_DPI, max_cache_bytes=64 * 1024 * 1024):
+        if fmt not in ("png", "svg"):
+            raise ValueError(f"Unsupported diagram format '{fmt}' (use 'png' or 'svg').")
+        self.cache = DiskCache(cache_path, max_cache_bytes)
+        self.output_dir = output_dir
+        self.fmt = fmt
+        self.dpi = dpi
+
+    def submit(self, graph, name, labels=None):
+        """Start rendering `graph` as `<name>.<fmt>`; the future resolves to (filename, version)."""
+        labels = labels or {node: str(node) for node in graph.nodes}
+        layout_key = f"layout:{graph_hash(graph, labels)}"
+        version = hashlib.sha256(f"{layout_key}:{self.fmt}:{self.dpi}".encode()).hexdigest()[:16]
+        filename = f"{name}.{self.fmt}"
+        # The worker keeps the working directory it started in, so it gets an absolute path.
+        path = os.path.abspath(os.path.join(self.output_dir, filename))
+
+        done = concurrent.futures.Future()
+        if os.path.exists(path) and self.cache.get(f"render:{filename}") == version.encode():
+            done.set_result((filename, version))
+            return done
+
+        cached = self.cache.get(layout_key)
+        positions = json.loads(cached) if cached else None
+        args = (list(graph.nodes), list(graph.edges), labels, positions, path, self.fmt, self.dpi)
+        try:
+            future = _get_executor().submit(render_graph, *args)
+        except (BrokenProcessPool, RuntimeError):
+            shutdown()
+            future = None
+
+        def finish(result_future):
+            try:
+                try:
+                    result = result_future.result() if result_future else render_graph(*args)
+                except BrokenProcessPool:
+                    shutdown()
+                    result = render_graph(*args)
+            except Exception as e:
+                if not done.cancelled(): done.set_exception(e)
+                return
+            # The image is already on disk; a cache failure only costs a re-render next time.
+            try:
+                if positions is None:
+                    self.cache.set(layout_key, json.dumps(result).encode("utf-8"))
+                self.cache.set(f"render:{filename}", version.encode())
+            except Exception as e:
+                print(f"   ⚠️ Could not cache diagram '{filename}': {e}")
+            if not done.cancelled(): done.set_result((filename, version))
+
+        if future is None:
+            finish(None)
+        else:
+            future.add_done_callback(finish)
+        return done
+
+    def render(self, graph, name, labels=None):
+        return self.submit(graph, name, labels).result()
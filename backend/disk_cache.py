@@ -0,0 +1,156 @@
+import os
+import time
+import sqlite3
+import hashlib
+import threading
+from array import array
+
+
+class DiskCache:
+    """Small persistent key/value store on SQLite, evicting least-recently-used entries by total size."""
+
+    def __init__(self, path, max_bytes):
+        self.path = path
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        with self._lock, self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS entries ("
+                "key TEXT PRIMARY KEY, value BLOB NOT NULL, size INTEGER NOT NULL, "
+                "accessed REAL NOT NULL, expires REAL)"
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS entries_accessed ON entries (accessed)")
+            self._conn.execute("CREATE INDEX IF NOT EXISTS entries_expires ON entries (expires)")
+            # The running total of entry sizes lives next to them and is kept current by triggers,
+            # so eviction checks stay O(1) and every connection to the file sees the same number.
+            self._conn.execute("CREATE TABLE IF NOT EXISTS meta (name TEXT PRIMARY KEY, value INTEGER NOT NULL)")
+            self._conn.execute("INSERT OR IGNORE INTO meta SELECT 'total_size', COALESCE(SUM(size), 0) FROM entries")
+            for name, event, change in (("insert", "INSERT", "+ NEW.size"), ("update", "UPDATE OF size", "- OLD.size + NEW.size"),
+                                        ("delete", "DELETE", "- OLD.size")):
+                self._conn.execute(
+                    f"CREATE TRIGGER IF NOT EXISTS entries_total_{name} AFTER {event} ON entries "
+                    f"BEGIN UPDATE meta SET value = value {change} WHERE name = 'total_size'; END"
+                )
+
+    def get_many(self, keys):
+        """Return {key: value} for every key present and not expired."""
+        found = {}
+        keys = list(dict.fromkeys(keys))
+        now = time.time()
+        with self._lock, self._conn:
+            # SQLite caps bound parameters per statement, so look keys up in slices.
+            for i in range(0, len(keys), 500):
+                batch = keys[i : i + 500]
+                placeholders = ",".join("?" * len(batch))
+                rows = self._conn.execute(
+                    f"SELECT key, value FROM entries WHERE key IN ({placeholders}) AND (expires IS NULL OR expires > ?)",
+                    (*batch, now),
+                ).fetchall()
+                found.update(rows)
+                if rows:
+                    self._conn.executemany("UPDATE entries SET accessed = ? WHERE key = ?", [(now, key) for key, _ in rows])
+        return found
+
+    def get(self, key):
+        return self.get_many([key]).get(key)
+
+    def set_many(self, items, ttl=None):
+        now = time.time()
+        expires = now + ttl if ttl else None
+        rows = [(key, value, len(value), now, expires) for key, value in items]
+        with self._lock, self._conn:
+            # An upsert rather than INSERT OR REPLACE, whose implicit delete wouldn't fire the size trigger.
+            self._conn.executemany(
+                "INSERT INTO entries VALUES (?, ?, ?, ?, ?) ON CONFLICT (key) DO UPDATE SET "
+                "value = excluded.value, size = excluded.size, accessed = excluded.accessed, expires = excluded.expires",
+                rows,
+            )
+            self._evict()
+
+    def set(self, key, value, ttl=None):
+        self.set_many([(key, value)], ttl=ttl)
+
+    def _evict(self):
+        self._conn.execute("DELETE FROM entries WHERE expires IS NOT NULL AND expires <= ?", (time.time(),))
+        total = self._total_size()
+        if total <= self.max_bytes: return
+        # Trim to 90% of the budget so a full cache doesn't evict on every single write.
+        target = total - int(self.max_bytes * 0.9)
+        freed = 0
+        stale = []
+        for key, size in self._conn.execute("SELECT key, size FROM entries ORDER BY accessed"):
+            stale.append((key,))
+            freed += size
+            if freed >= target: break
+        self._conn.executemany("DELETE FROM entries WHERE key = ?", stale)
+
+    def _total_size(self):
+        return self._conn.execute("SELECT value FROM meta WHERE name = 'total_size'").fetchone()[0]
+
+    def size_bytes(self):
+        with self._lock:
+            return self._total_size()
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+class EmbeddingCache:
+    """Content-addressed embedding vectors, keyed by hash of (model, model_type, chunk text)."""
+
+    def __init__(self, path, model, model_type, max_bytes):
+        self.model = model
+        self.model_type = model_type
+        self.store = DiskCache(path, max_bytes)
+        self.hits = 0
+        self.misses = 0
+
+    def key(self, text):
+        return hashlib.sha256(f"{self.model}\0{self.model_type}\0{text}".encode("utf-8")).hexdigest()
+
+    def embed_documents(self, texts, embed_fn):
+        """Return one vector per text, calling embed_fn only for texts never embedded before."""
+        keys = [self.key(t) for t in texts]
+        cached = {k: list(array("f", v)) for k, v in self.store.get_many(keys).items()}
+
+        # Identical chunks inside one run (vendored copies, license headers) are embedded once.
+        missing = {}
+        for k, text in zip(keys, texts):
+            if k not in cached and k not in missing:
+                missing[k] = text
+        self.hits += len(texts) - len(missing)
+        self.misses += len(missing)
+
+        if missing:
+            vectors = embed_fn(list(missing.values()))
+            fresh = dict(zip(missing.keys(), vectors))
+            self.store.set_many((k, array("f", v).tobytes()) for k, v in fresh.items())
+            cached.update(fresh)
+        return [cached[k] for k in keys]
+
+
+class LLMResponseCache:
+    """Completed LLM responses keyed by hash of (model, temperature, prompt), each kept for `ttl` seconds."""
+
+    def __init__(self, path, model, temperature, max_bytes, ttl=None):
+        self.model = model
+        self.temperature = temperature
+        self.ttl = ttl
+        self.store = DiskCache(path, max_bytes)
+
+    def key(self, prompt):
+        return hashlib.sha256(f"{self.model}\0{self.temperature}\0{prompt}".encode("utf-8")).hexdigest()
+
+    def get(self, prompt):
+        value = self.store.get(self.key(prompt))
+        return value.decode("utf-8") if value is not None else None
+
+    def set(self, prompt, response):
+        # Empty answers are usually a provider hiccup; retrying is better than replaying them.
+        if response:
+            self.store.set(self.key(prompt), response.encode("utf-8"), ttl=self.ttl)
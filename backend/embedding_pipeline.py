@@ -0,0 +1,107 @@
+import time
+import threading
+import concurrent.futures
+
+from throttling import TokenBucket, is_retryable_error, is_throttling_error, backoff_delay
+from metrics import EMBEDDING_BATCHES, EMBEDDED_TEXTS, EMBEDDING_PIPELINES
+
+
+class EmbeddingPipeline:
+    """Embeds texts with bounded parallelism, a token-bucket request limiter and an adaptive batch size.
+
+    The batch size grows while the provider keeps up and halves on every throttling
+    response; retryable failures back off with full jitter before being re-sent.
+    """
+
+    def __init__(self, embed_fn, max_concurrency=4, requests_per_second=8.0,
+                 batch_size=32, min_batch_size=4, max_batch_size=50, max_retries=5, name="documents"):
+        self.embed_fn = embed_fn
+        self.name = name
+        self.max_concurrency = max(1, max_concurrency)
+        self.limiter = TokenBucket(requests_per_second)
+        self.batch_size = batch_size
+        self.min_batch_size = min_batch_size
+        self.max_batch_size = max_batch_size
+        self.max_retries = max_retries
+
+        self._lock = threading.Lock()
+        self.in_flight = 0
+        self.texts_embedded = 0
+        self.batches = 0
+        self.retries = 0
+        self.throttled = 0
+        self.busy_seconds = 0.0
+        EMBEDDING_PIPELINES.add(self)
+
+    def _adapt(self, throttled):
+        with self._lock:
+            if throttled:
+                self.batch_size = max(self.min_batch_size, self.batch_size // 2)
+            else:
+                self.batch_size = min(self.max_batch_size, self.batch_size + max(1, self.batch_size // 4))
+
+    def _embed_batch(self, batch):
+        attempt = 0
+        while True:
+            self.limiter.acquire()
+            with self._lock: self.in_flight += 1
+            try:
+                vectors = self.embed_fn(batch)
+            except Exception as e:
+                if attempt >= self.max_retries or not is_retryable_error(e): raise
+                throttled = is_throttling_error(e)
+                with self._lock:
+                    self.retries += 1
+                    if throttled: self.throttled += 1
+                if throttled: self._adapt(throttled=True)
+                time.sleep(backoff_delay(attempt))
+                attempt += 1
+                continue
+            finally:
+                with self._lock: self.in_flight -= 1
+
+            if len(vectors) != len(batch):
+                raise ValueError(f"Embedding endpoint returned {len(vectors)} vectors for {len(batch)} texts.")
+            self._adapt(throttled=False)
+            with self._lock:
+                self.batches += 1
+                self.texts_embedded += len(batch)
+            EMBEDDING_BATCHES.inc()
+            EMBEDDED_TEXTS.inc(len(batch))
+            return vectors
+
+    def embed(self, texts):
+        """Return one vector per text, in input order."""
+        texts = list(texts)
+        results = [None] * len(texts)
+        start = time.perf_counter()
+        try:
+            with concurrent.futures.ThreadPoolExecutor(max_workers=self.max_concurrency) as executor:
+                pending = {}
+                pos = 0
+                while pos < len(texts) or pending:
+                    # Each new batch picks up the current (adapted) batch size.
+                    while pos < len(texts) and len(pending) < self.max_concurrency:
+                        size = self.batch_size
+                        pending[executor.submit(self._embed_batch, texts[pos : pos + size])] = pos
+                        pos += size
+                    done, _ = concurrent.futures.wait(pending, return_when=concurrent.futures.FIRST_COMPLETED)
+                    for future in done:
+                        offset = pending.pop(future)
+                        vectors = future.result()
+                        results[offset : offset + len(vectors)] = vectors
+        finally:
+            with self._lock: self.busy_seconds += time.perf_counter() - start
+        return results
+
+    def stats(self):
+        with self._lock:
+            return {
+                "texts_embedded": self.texts_embedded,
+                "batches": self.batches,
+                "retries": self.retries,
+                "throttled": self.throttled,
+                "in_flight": self.in_flight,
+                "batch_size": self.batch_size,
+                "texts_per_second": self.texts_embedded / self.busy_seconds if self.busy_seconds else 0.0,
+            }
@@ -0,0 +1,100 @@
+import json
+from collections import Counter
+from xml.sax.saxutils import escape, quoteattr
+
+EXPORT_FORMATS = {
+    "mermaid": ("text/plain", "mmd"),
+    "dot": ("text/vnd.graphviz", "dot"),
+    "graphml": ("application/xml", "graphml"),
+    "json": ("application/json", "json"),
+}
+
+# Per-node metrics carried into formats that have attributes (GraphML, JSON).
+_METRIC_KEYS = {
+    "pagerank": "double", "in_degree": "int", "out_degree": "int",
+    "betweenness": "double", "scc_size": "int", "in_cycle": "boolean",
+}
+
+
+def unique_labels(nodes):
+    """Shortest path suffix that tells nodes apart: `utils.py` unless two files share that name."""
+    parts = {n: n.split("/") for n in nodes}
+    depth = {n: 1 for n in nodes}
+    while True:
+        labels = {n: "/".join(parts[n][-depth[n]:]) for n in nodes}
+        counts = Counter(labels.values())
+        clashes = [n for n in nodes if counts[labels[n]] > 1 and depth[n] < len(parts[n])]
+        if not clashes:
+            return labels
+        for n in clashes:
+            depth[n] += 1
+
+
+def _selection(graph, nodes):
+    """Ordered node list and the edges among them, in one pass over the selected nodes' out-edges."""
+    if nodes is None:
+        return list(graph.nodes), graph.edges()
+    selected = [n for n in dict.fromkeys(nodes) if n in graph]
+    members = set(selected)
+    return selected, [(u, v) for u in selected for v in graph.successors(u) if v in members]
+
+
+def _mermaid(nodes, edges, labels, metrics):
+    ids = {n: f"n{i}" for i, n in enumerate(nodes)}
+    yield "graph TD\n"
+    for n in nodes:
+        label = labels[n].replace('"', "#quot;")
+        yield f'    {ids[n]}["{label}"]\n'
+    for u, v in edges:
+        yield f"    {ids[u]} --> {ids[v]}\n"
+
+
+def _dot(nodes, edges, labels, metrics):
+    # Graphviz reads UTF-8 as-is and only understands backslash escapes for quotes and newlines.
+    quote = lambda text: '"' + str(text).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") + '"'
+    yield "digraph dependencies {\n    node [shape=box];\n"
+    for n in nodes:
+        yield f"    {quote(n)} [label={quote(labels[n])}];\n"
+    for u, v in edges:
+        yield f"    {quote(u)} -> {quote(v)};\n"
+    yield "}\n"
+
+
+def _graphml(nodes, edges, labels, metrics):
+    yield '<?xml version="1.0" encoding="UTF-8"?>\n'
+    yield '<graphml xmlns="http://graphml.graphdrawing.org/xmlns">\n'
+    yield '  <key id="label" for="node" attr.name="label" attr.type="string"/>\n'
+    for key, kind in _METRIC_KEYS.items():
+        yield f'  <key id="{key}" for="node" attr.name="{key}" attr.type="{kind}"/>\n'
+    yield '  <graph id="dependencies" edgedefault="directed">\n'
+    for n in nodes:
+        yield f"    <node id={quoteattr(n)}><data key=\"label\">{escape(labels[n])}</data>"
+        for key, value in metrics.get(n, {}).items():
+            if key in _METRIC_KEYS:
+                yield f'<data key="{key}">{str(value).lower() if isinstance(value, bool) else value}</data>'
+        yield "</node>\n"
+    for u, v in edges:
+        yield f"    <edge source={quoteattr(u)} target={quoteattr(v)}/>\n"
+    yield "  </graph>\n</graphml>\n"
+
+
+def _node_link(nodes, edges, labels, metrics):
+    # Same shape as networkx's node_link_data, streamed instead of built in memory.
+    yield '{"directed": true, "multigraph": false, "graph": {}, "nodes": ['
+    for i, n in enumerate(nodes):
+        yield ("," if i else "") + json.dumps({"id": n, "label": labels[n], **metrics.get(n, {})})
+    yield '], "links": ['
+    for i, (u, v) in enumerate(edges):
+        yield ("," if i else "") + json.dumps({"source": u, "target": v})
+    yield "]}\n"
+
+
+_WRITERS = {"mermaid": _mermaid, "dot": _dot, "graphml": _graphml, "json": _node_link}
+
+
+def export_graph(graph, fmt, nodes=None, metrics=None):
+    """Yield the graph (or the subgraph induced by `nodes`) in `fmt` as text chunks."""
+    if fmt not in _WRITERS:
+        raise ValueError(f"Unsupported export format '{fmt}'. Use one of: {', '.join(EXPORT_FORMATS)}.")
+    selected, edges = _selection(graph, nodes)
+    return _WRITERS[fmt](selected, edges, unique_labels(selected), metrics or {})
@@ -0,0 +1,66 @@
+import os
+
+import numpy as np
+import networkx as nx
+
+# Exact betweenness is O(V·E); above this many files it is estimated from sampled sources.
+BETWEENNESS_EXACT_LIMIT = int(os.getenv("AURA_BETWEENNESS_EXACT_LIMIT", "500"))
+BETWEENNESS_SAMPLES = int(os.getenv("AURA_BETWEENNESS_SAMPLES", "128"))
+
+
+def pagerank(graph, alpha=0.85, max_iter=100, tol=1.0e-6):
+    """Power-iteration PageRank with networkx's conventions (dangling mass spread uniformly).
+
+    nx.pagerank needs scipy, which the backend doesn't install.
+    """
+    nodes = list(graph)
+    n = len(nodes)
+    if n == 0: return {}
+    index = {node: i for i, node in enumerate(nodes)}
+    src = np.array([index[s] for s, _ in graph.edges], dtype=np.int64)
+    dst = np.array([index[t] for _, t in graph.edges], dtype=np.int64)
+    out_degree = np.bincount(src, minlength=n).astype(float)
+    dangling = out_degree == 0
+    weights = 1.0 / out_degree[src] if len(src) else np.array([])
+
+    rank = np.full(n, 1.0 / n)
+    for _ in range(max_iter):
+        new = np.bincount(dst, weights=rank[src] * weights, minlength=n) * alpha
+        new += (1.0 - alpha + alpha * rank[dangling].sum()) / n
+        converged = np.abs(new - rank).sum() < n * tol
+        rank = new
+        if converged: break
+    return {node: float(rank[i]) for node, i in index.items()}
+
+
+def compute_metrics(graph):
+    """Per-file importance measures, computed once per build.
+
+    Returns {path: {pagerank, in_degree, out_degree, betweenness, scc_size, in_cycle}}.
+    """
+    if len(graph) == 0: return {}
+    ranks = pagerank(graph)
+    k = BETWEENNESS_SAMPLES if len(graph) > BETWEENNESS_EXACT_LIMIT else None
+    betweenness = nx.betweenness_centrality(graph, k=k, seed=0)
+    scc_size = {}
+    for component in nx.strongly_connected_components(graph):
+        for node in component:
+            scc_size[node] = len(component)
+
+    return {
+        node: {
+            "pagerank": ranks[node],
+            "in_degree": graph.in_degree(node),
+            "out_degree": graph.out_degree(node),
+            "betweenness": float(betweenness[node]),
+            "scc_size": scc_size[node],
+            "in_cycle": scc_size[node] > 1,
+        }
+        for node in graph
+    }
+
+
+def display_size(pagerank, max_pagerank):
+    """Node size for the force graph: 1 for the least important file up to 10 for the most."""
+    if not pagerank or not max_pagerank: return 1
+    return round(1 + 9 * pagerank / max_pagerank, 2)
@@ -0,0 +1,116 @@
+import os
+import ast
+import hashlib
+import multiprocessing
+import concurrent.futures
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import dataclass, field
+from itertools import repeat
+
+# Below this many files the cost of starting worker processes outweighs the parsing itself.
+INLINE_PARSE_THRESHOLD = 64
+
+
+@dataclass
+class SourceRecord:
+    """Everything the pipeline needs from one source file, produced by a single read."""
+    path: str
+    rel_path: str
+    text: str
+    sha256: str
+    imports: list = field(default_factory=list)
+    symbols: list = field(default_factory=list)
+    parsed: bool = False
+
+
+def extract_imports(tree):
+    """Return every import in the tree as (module, level, names)."""
+    found_imports = []
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Import):
+            for alias in node.names: found_imports.append((alias.name, 0, ()))
+        elif isinstance(node, ast.ImportFrom):
+            names = tuple(alias.name for alias in node.names if alias.name != "*")
+            found_imports.append((node.module or "", node.level, names))
+    return found_imports
+
+
+def _symbol(node, qualname, kind):
+    # start_lineno includes decorators, which sit above the def/class line.
+    start = min([d.lineno for d in node.decorator_list], default=node.lineno)
+    return {"name": node.name, "qualname": qualname, "kind": kind,
+            "lineno": node.lineno, "end_lineno": node.end_lineno, "start_lineno": start}
+
+
+def extract_symbols(tree):
+    """Return top-level classes/functions and class methods with their line spans."""
+    symbols = []
+    for node in tree.body:
+        if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)):
+            symbols.append(_symbol(node, node.name, "function"))
+        elif isinstance(node, ast.ClassDef):
+            symbols.append(_symbol(node, node.name, "class"))
+            for child in node.body:
+                if isinstance(child, (ast.FunctionDef, ast.AsyncFunctionDef)):
+                    symbols.append(_symbol(child, f"{node.name}.{child.name}", "method"))
+    return symbols
+
+
+def parse_source_file(file_path, root_path):
+    """Read, hash and parse one file. Runs inside worker processes, so it must stay picklable."""
+    try:
+        with open(file_path, "rb") as f:
+            raw = f.read()
+        text = raw.decode("utf-8")
+    except (OSError, UnicodeDecodeError):
+        return None
+
+    record = SourceRecord(
+        path=file_path,
+        rel_path=os.path.relpath(file_path, root_path).replace("\\", "/"),
+        text=text,
+        sha256=hashlib.sha256(raw).hexdigest(),
+    )
+    try:
+        tree = ast.parse(text, filename=file_path)
+        record.imports = extract_imports(tree)
+        record.symbols = extract_symbols(tree)
+        record.parsed = True
+    except (SyntaxError, ValueError):
+        pass
+    return record
+
+
+def _pool_context():
+    # forkserver avoids forking a process that already runs uvicorn/neo4j threads.
+    if "forkserver" in multiprocessing.get_all_start_methods():
+        return multiprocessing.get_context("forkserver")
+    return multiprocessing.get_context()
+
+
+def ingest_files(root_path, files, max_workers=None):
+    """Yield one SourceRecord per readable file, parsing ASTs across all cores."""
+    files = list(files)
+    max_workers = max_workers or os.cpu_count() or 1
+
+    if len(files) < INLINE_PARSE_THRESHOLD or max_workers == 1:
+        for file_path in files:
+            record = parse_source_file(file_path, root_path)
+            if record: yield record
+        return
+
+    chunksize = max(1, len(files) // (max_workers * 4))
+    done = 0
+    try:
+        with concurrent.futures.ProcessPoolExecutor(max_workers=max_workers, mp_context=_pool_context()) as executor:
+            for record in executor.map(parse_source_file, files, repeat(root_path), chunksize=chunksize):
+                done += 1
+                if record: yield record
+        return
+    except (BrokenProcessPool, OSError) as e:
+        print(f"   ⚠️ Process pool unavailable ({e}), parsing in-process...")
+
+    # map() yields in submission order, so resume right after the last delivered file.
+    for file_path in files[done:]:
+        record = parse_source_file(file_path, root_path)
+        if record: yield record
@@ -0,0 +1,123 @@
+import time
+import uuid
+import threading
+import concurrent.futures
+from collections import OrderedDict, defaultdict
+
+QUEUED, RUNNING, SUCCEEDED, FAILED = "queued", "running", "succeeded", "failed"
+
+
+class AnalysisJob:
+    """One analysis run: its status, result and an append-only list of progress events."""
+
+    def __init__(self, key, repo_name, params):
+        self.id = uuid.uuid4().hex
+        self.key = key
+        self.repo_name = repo_name
+        self.params = params
+        self.status = QUEUED
+        self.result = None
+        self.error = None
+        self.created_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+        self.events = []
+        self._lock = threading.Lock()
+
+    @property
+    def done(self):
+        return self.status in (SUCCEEDED, FAILED)
+
+    def emit(self, message, *args, **kwargs):
+        """Record a progress message. Signature-compatible with print() so it can replace it."""
+        message = " ".join(str(m) for m in (message, *args)).strip()
+        print(message)
+        if not message: return
+        with self._lock:
+            self.events.append({"seq": len(self.events) + 1, "time": time.time(), "message": message})
+
+    def events_after(self, seq):
+        with self._lock:
+            return self.events[seq:]
+
+    def snapshot(self):
+        return {
+            "job_id": self.id,
+            "repo_name": self.repo_name,
+            "status": self.status,
+            "params": self.params,
+            "result": self.result,
+            "error": self.error,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "last_message": self.events[-1]["message"] if self.events else None,
+        }
+
+
+class JobManager:
+    """Runs analysis jobs on a bounded worker pool.
+
+    Identical requests that arrive while a job is queued or running get that job back
+    instead of a new one, and jobs touching the same repository run one at a time
+    because they share its clone directory and FAISS index.
+    """
+
+    def __init__(self, runner, max_workers=2, max_finished=200):
+        self.runner = runner
+        self.max_workers = max_workers
+        self.max_finished = max_finished
+        self.executor = None
+        self.jobs = OrderedDict()
+        self.active = {}
+        self._repo_locks = defaultdict(threading.Lock)
+        self._lock = threading.Lock()
+
+    def submit(self, key, repo_name, **params):
+        """Return (job, created). created is False when an identical job was already in flight."""
+        with self._lock:
+            existing = self.active.get(key)
+            if existing and not existing.done:
+                return existing, False
+            job = AnalysisJob(key, repo_name, params)
+            self.jobs[job.id] = job
+            self.active[key] = job
+            self._prune()
+            if self.executor is None:
+                self.executor = concurrent.futures.ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="aura-job")
+            executor = self.executor
+        job.emit(f"📥 Queued analysis of '{repo_name}'.")
+        executor.submit(self._run, job)
+        return job, True
+
+    def get(self, job_id):
+        with self._lock:
+            return self.jobs.get(job_id)
+
+    def _run(self, job):
+        try:
+            with self._repo_locks[job.repo_name]:
+                job.started_at = time.time()
+                job.status = RUNNING
+                job.result = self.runner(job, **job.params)
+                job.status = SUCCEEDED
+        except Exception as e:
+            job.error = str(e)
+            job.status = FAILED
+            job.emit(f"❌ Analysis failed: {e}")
+        finally:
+            job.finished_at = time.time()
+            with self._lock:
+                if self.active.get(job.key) is job:
+                    del self.active[job.key]
+
+    def _prune(self):
+        finished = [job_id for job_id, job in self.jobs.items() if job.done]
+        for job_id in finished[: max(0, len(finished) - self.max_finished)]:
+            del self.jobs[job_id]
+
+    def shutdown(self, wait=False):
+        with self._lock:
+            executor, self.executor = self.executor, None
+        if executor:
+            executor.shutdown(wait=wait, cancel_futures=True)
@@ -0,0 +1,126 @@
+import os
+import re
+import json
+import math
+from collections import Counter, defaultdict
+
+LEXICAL_INDEX_FILENAME = "lexical_index.json"
+
+_WORD = re.compile(r"[A-Za-z_][A-Za-z0-9_]*")
+_CAMEL = re.compile(r"[A-Z]+(?=[A-Z][a-z])|[A-Z]?[a-z0-9]+|[A-Z]+")
+# Code-looking tokens in a question: `backticked`, dotted.paths, CamelCase and snake_case.
+_IDENTIFIER = re.compile(r"`([^`]+)`|\b([A-Za-z_]\w*(?:\.[A-Za-z_]\w*)+|[a-z]+[A-Z]\w*|[A-Z][a-z0-9]+[A-Z]\w*|\w+_\w+)\b")
+
+
+def tokenize(text):
+    """Lower-cased identifiers plus their snake_case / CamelCase parts, so `DependencyEngine` also matches 'engine'."""
+    tokens = []
+    for word in _WORD.findall(text):
+        lower = word.lower()
+        tokens.append(lower)
+        parts = [p.lower() for piece in word.split("_") for p in _CAMEL.findall(piece)]
+        if len(parts) > 1:
+            tokens.extend(parts)
+    return tokens
+
+
+def extract_identifiers(question):
+    found = []
+    for quoted, bare in _IDENTIFIER.findall(question):
+        ident = (quoted or bare).strip().strip("()")
+        if ident and ident not in found:
+            found.append(ident)
+    return found
+
+
+def identifiers_dominate(question, identifiers, min_ratio=0.5):
+    """True for `backticked` questions or when identifiers make up at least `min_ratio` of the words."""
+    if any(f"`{ident}" in question for ident in identifiers):
+        return True
+    words = len(_WORD.findall(question))
+    covered = sum(len(_WORD.findall(ident)) for ident in identifiers)
+    return bool(words) and covered / words >= min_ratio
+
+
+class LexicalIndex:
+    """BM25 over chunk tokens plus a symbol table (qualname and short name -> chunk ids).
+
+    Built from the same documents as the FAISS index and stored next to it, so
+    identifier lookups answer locally without an embedding request.
+    """
+
+    def __init__(self, doc_terms, symbols, k1=1.5, b=0.75):
+        self.doc_terms = doc_terms
+        self.symbols = symbols
+        self.k1 = k1
+        self.b = b
+        self.doc_lengths = {doc_id: sum(terms.values()) for doc_id, terms in doc_terms.items()}
+        self.avg_length = sum(self.doc_lengths.values()) / len(self.doc_lengths) if self.doc_lengths else 0.0
+        self.postings = defaultdict(dict)
+        for doc_id, terms in doc_terms.items():
+            for term, tf in terms.items():
+                self.postings[term][doc_id] = tf
+
+    @classmethod
+    def from_documents(cls, documents):
+        """Build from (doc_id, Document) pairs, e.g. a FAISS docstore's items."""
+        doc_terms = {}
+        symbols = defaultdict(list)
+        for doc_id, doc in documents:
+            doc_terms[doc_id] = dict(Counter(tokenize(doc.page_content)))
+            for qualname in doc.metadata.get("symbols") or []:
+                if qualname.startswith("<"): continue
+                for key in {qualname.lower(), qualname.rsplit(".", 1)[-1].lower()}:
+                    if doc_id not in symbols[key]: symbols[key].append(doc_id)
+        return cls(doc_terms, dict(symbols))
+
+    @classmethod
+    def from_vector_store(cls, vector_db):
+        return cls.from_documents(vector_db.docstore._dict.items())
+
+    def save(self, db_path):
+        with open(os.path.join(db_path, LEXICAL_INDEX_FILENAME), "w", encoding="utf-8") as f:
+            json.dump({"doc_terms": self.doc_terms, "symbols": self.symbols}, f)
+
+    @classmethod
+    def load(cls, db_path):
+        try:
+            with open(os.path.join(db_path, LEXICAL_INDEX_FILENAME), "r", encoding="utf-8") as f:
+                data = json.load(f)
+            return cls(data["doc_terms"], data["symbols"])
+        except (OSError, ValueError, KeyError):
+            return None
+
+    def estimated_bytes(self):
+        return sum(len(terms) for terms in self.doc_terms.values()) * 120 + len(self.symbols) * 100
+
+    def search(self, query, k=10):
+        """BM25-ranked [(doc_id, score)] for the query's tokens."""
+        scores = defaultdict(float)
+        n = len(self.doc_terms)
+        for term in set(tokenize(query)):
+            posting = self.postings.get(term)
+            if not posting: continue
+            idf = math.log(1 + (n - len(posting) + 0.5) / (len(posting) + 0.5))
+            for doc_id, tf in posting.items():
+                norm = self.k1 * (1 - self.b + self.b * self.doc_lengths[doc_id] / (self.avg_length or 1))
+                scores[doc_id] += idf * tf * (self.k1 + 1) / (tf + norm)
+        return sorted(scores.items(), key=lambda item: item[1], reverse=True)[:k]
+
+    def lookup_symbols(self, identifiers):
+        """Chunk ids defining any of the identifiers; `a.b` falls back to every `b` only without an exact match."""
+        ids = []
+        for ident in identifiers:
+            lower = ident.lower()
+            hits = self.symbols.get(lower) or self.symbols.get(lower.rsplit(".", 1)[-1], [])
+            ids.extend(doc_id for doc_id in hits if doc_id not in ids)
+        return ids
+
+
+def reciprocal_rank_fusion(rankings, k=60):
+    """Merge ranked id lists; ids ranked high in several lists win."""
+    scores = defaultdict(float)
+    for ranking in rankings:
+        for rank, doc_id in enumerate(ranking):
+            scores[doc_id] += 1.0 / (k + rank + 1)
+    return sorted(scores, key=scores.get, reverse=True)
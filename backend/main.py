@@ -1,15 +1,67 @@
 import os
-import glob  
-from fastapi import FastAPI, HTTPException
+import json
+import time
+import asyncio
+import threading
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, HTTPException, Query, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import FileResponse, StreamingResponse
+from fastapi.responses import FileResponse, Response, StreamingResponse
 from pydantic import BaseModel
 import uvicorn
 
-from aura_agent import ProductionAgent, DependencyEngine
+from aura_agent import (ProductionAgent, DependencyEngine, create_neo4j_driver, ensure_neo4j_schema, repo_name_from_url,
+                        GRAPH_PAGE_SIZE, GRAPH_MAX_PAGE_SIZE, GRAPH_MAX_DEPTH)
 from chat_agent import ChatAgent
+from jobs import JobManager
+from caching import TTLCache
+import diagram_renderer
+from graph_export import EXPORT_FORMATS
+from metrics import REGISTRY
+from artifact_cache import ArtifactCache, artifact_response, update_reports_manifest, ensure_reports_manifest
 
-app = FastAPI(title="AURA Backend API")
+NEO4J_URI = "bolt://127.0.0.1:7687"
+NEO4J_USER = "neo4j"
+NEO4J_PASSWORD = "harish@12" # Make sure this matches your Neo4j password!
+NEO4J_MAX_POOL_SIZE = int(os.getenv("NEO4J_MAX_POOL_SIZE", "50"))
+NEO4J_ACQUISITION_TIMEOUT = float(os.getenv("NEO4J_ACQUISITION_TIMEOUT", "30"))
+ANALYSIS_WORKERS = int(os.getenv("AURA_ANALYSIS_WORKERS", "2"))
+JOB_EVENT_POLL_SECONDS = 0.5
+JOB_EVENT_HEARTBEAT_SECONDS = 15
+ARTIFACT_CACHE_MAX_BYTES = int(os.getenv("AURA_ARTIFACT_CACHE_MAX_MB", "64")) * 1024 * 1024
+REPORTS_MANIFEST_PATH = os.path.join("reports", "manifest.json")
+GRAPH_CACHE_SIZE = int(os.getenv("AURA_GRAPH_CACHE_SIZE", "256"))
+GRAPH_CACHE_TTL_SECONDS = int(os.getenv("AURA_GRAPH_CACHE_TTL", "300"))
+
+# One pooled driver for the whole process; every request borrows warm connections from it.
+neo4j_driver = None
+_neo4j_driver_lock = threading.Lock()
+
+def get_neo4j_driver():
+    global neo4j_driver
+    with _neo4j_driver_lock:
+        if neo4j_driver is None:
+            neo4j_driver = create_neo4j_driver(
+                NEO4J_URI, NEO4J_USER, NEO4J_PASSWORD,
+                max_pool_size=NEO4J_MAX_POOL_SIZE,
+                acquisition_timeout=NEO4J_ACQUISITION_TIMEOUT,
+            )
+        return neo4j_driver
+
+@asynccontextmanager
+async def lifespan(app):
+    global neo4j_driver
+    ensure_neo4j_schema(get_neo4j_driver(), NEO4J_URI)
+    threading.Thread(target=global_chat_agent.prewarm, name="aura-prewarm", daemon=True).start()
+    yield
+    job_manager.shutdown(wait=False)
+    diagram_renderer.shutdown()
+    with _neo4j_driver_lock:
+        if neo4j_driver is not None:
+            neo4j_driver.close()
+            neo4j_driver = None
+
+app = FastAPI(title="AURA Backend API", lifespan=lifespan)
 
 app.add_middleware(
     CORSMiddleware,
@@ -19,97 +71,245 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-NEO4J_URI = "bolt://127.0.0.1:7687"
-NEO4J_USER = "neo4j"
-NEO4J_PASSWORD = "harish@12" # Make sure this matches your Neo4j password!
-
 global_chat_agent = ChatAgent()
+artifact_cache = ArtifactCache(ARTIFACT_CACHE_MAX_BYTES)
+graph_cache = TTLCache(GRAPH_CACHE_SIZE, GRAPH_CACHE_TTL_SECONDS)
+
+for cache_name, cache in {
+    "faiss_indexes": global_chat_agent.vector_dbs,
+    "lexical_indexes": global_chat_agent.lexical_indexes,
+    "query_vectors": global_chat_agent.query_vectors,
+    "retrievals": global_chat_agent.retrievals,
+    "artifacts": artifact_cache,
+    "graph_slices": graph_cache,
+}.items():
+    REGISTRY.register_cache(cache_name, cache)
 
 class AnalyzeRequest(BaseModel):
     url: str
     doc_type: str = "both" # 🔥 Now accepts 'technical', 'business', or 'both'
+    incremental: bool = True # Re-process only what changed since the last analyzed commit
+    fresh: bool = False # Ignore cached LLM responses and regenerate every section
 
 class ChatRequest(BaseModel):
     repo_name: str
     question: str
+    session_id: str | None = None # History is kept per session; omit it for a one-off question
 
-@app.post("/api/analyze")
-def api_analyze_repo(request: AnalyzeRequest):
+def run_analysis(job, url, doc_type, incremental, fresh=False):
+    """Job body: clone/refresh, build the graph and knowledge base, then write the requested documents."""
+    start = time.perf_counter()
+    agent = ProductionAgent()
+    # A no-op once startup succeeded; retries the schema here if Neo4j was down back then.
+    ensure_neo4j_schema(get_neo4j_driver(), NEO4J_URI)
+    agent.dep_engine = DependencyEngine("", driver=get_neo4j_driver())
+    agent.log = agent.dep_engine.log = job.emit
+    agent.dep_engine.timings = agent.timings
+    agent.use_llm_cache = not fresh
     try:
-        agent = ProductionAgent()
-        agent.dep_engine = DependencyEngine("", NEO4J_URI, NEO4J_USER, NEO4J_PASSWORD)
-        agent.initialize_repo(request.url)
-        
-        # 🔥 The Magic Logic: Generate whatever the user requested!
-        if request.doc_type in ["technical", "both"]:
-            agent.generate_aura_report(doc_type="technical")
-            
-        if request.doc_type in ["business", "both"]:
-            agent.generate_aura_report(doc_type="business")
-            
-        # Always generate release notes
-        agent.generate_business_manual()
-        
+        agent.initialize_repo(url, incremental=incremental)
+        # The FAISS index was just rewritten: drop chat's loaded copy and cached retrievals.
+        global_chat_agent.invalidate_repo(agent.current_repo_name)
+        graph_cache.discard_where(lambda key: key[0] == agent.current_repo_name)
+
+        # 🔥 The Magic Logic: Generate whatever the user requested, plus release notes, in one shared pass!
+        doc_types = [t for t in ("technical", "business") if doc_type in (t, "both")]
+        documents = agent.generate_documents(doc_types, release_notes=True)
+    finally:
         agent.dep_engine.close()
-        
-        return {"status": "success", "repo_name": agent.current_repo_name}
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+    
+    documents = [d for d in documents if d]
+    if documents:
+        update_reports_manifest(REPORTS_MANIFEST_PATH, agent.current_repo_name, documents)
+    else:
+        job.emit("⚠️ No documents were written; the reports list is unchanged.")
+    timings = {**agent.timings.breakdown(), "total": round(time.perf_counter() - start, 3)}
+    job.emit(f"⏱️ Stage timings: {agent.timings.summary()}")
+    job.emit("🏁 Analysis complete.")
+    return {"repo_name": agent.current_repo_name, "documents": documents, "timings": timings}
+
+job_manager = JobManager(run_analysis, max_workers=ANALYSIS_WORKERS)
+
+@app.post("/api/analyze", status_code=202)
+def api_analyze_repo(request: AnalyzeRequest):
+    repo_name = repo_name_from_url(request.url)
+    if not repo_name:
+        raise HTTPException(status_code=400, detail="A repository URL is required.")
+    if request.doc_type not in ["technical", "business", "both"]:
+        raise HTTPException(status_code=400, detail="doc_type must be 'technical', 'business' or 'both'.")
+    
+    job, created = job_manager.submit(
+        (repo_name, request.doc_type, request.incremental, request.fresh), repo_name,
+        url=request.url, doc_type=request.doc_type, incremental=request.incremental, fresh=request.fresh,
+    )
+    return {"job_id": job.id, "repo_name": repo_name, "status": job.status, "deduplicated": not created}
+
+@app.get("/api/jobs/{job_id}")
+def api_get_job(job_id: str):
+    job = job_manager.get(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found.")
+    return job.snapshot()
+
+@app.get("/api/jobs/{job_id}/events")
+async def api_job_events(job_id: str, request: Request):
+    """Server-sent events: one 'progress' event per message, then a final 'done' event with the job snapshot."""
+    job = job_manager.get(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found.")
+    try: last_seq = int(request.headers.get("last-event-id", 0))
+    except ValueError: last_seq = 0
+    
+    async def event_stream():
+        seq = last_seq
+        idle = 0.0
+        while True:
+            for event in job.events_after(seq):
+                seq = event["seq"]
+                idle = 0.0
+                yield f"id: {seq}\nevent: progress\ndata: {json.dumps(event)}\n\n"
+            if job.done and not job.events_after(seq):
+                yield f"event: done\ndata: {json.dumps(job.snapshot())}\n\n"
+                return
+            if await request.is_disconnected():
+                return
+            await asyncio.sleep(JOB_EVENT_POLL_SECONDS)
+            idle += JOB_EVENT_POLL_SECONDS
+            if idle >= JOB_EVENT_HEARTBEAT_SECONDS:
+                idle = 0.0
+                yield ": keep-alive\n\n"
+    
+    return StreamingResponse(event_stream(), media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
 
 @app.post("/api/chat")
-def api_chat(request: ChatRequest):
+async def api_chat(request: ChatRequest, http_request: Request):
     try:
-        response_generator = global_chat_agent.ask_question(request.repo_name, request.question)
-        return StreamingResponse(response_generator, media_type="text/plain")
+        answer = global_chat_agent.ask_question(request.repo_name, request.question, request.session_id)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+    async def stream():
+        # Closing the answer generator on disconnect cancels the in-flight LLM request.
+        try:
+            async for chunk in answer:
+                yield chunk
+                if await http_request.is_disconnected():
+                    print(f"🔌 Chat client for '{request.repo_name}' disconnected; cancelling the answer.")
+                    break
+        finally:
+            await answer.aclose()
+
+    return StreamingResponse(stream(), media_type="text/plain")
+
+def _report_body(raw):
+    return json.dumps({"content": raw.decode("utf-8")}).encode("utf-8")
+
 # 🔥 NEW ENDPOINT: Fetch Technical Report
 @app.get("/api/reports/technical/{repo_name}")
-def api_get_tech_report(repo_name: str):
+def api_get_tech_report(repo_name: str, request: Request):
     filepath = os.path.join("reports", f"AURA_TECHNICAL_REPORT_{repo_name}.md")
-    if not os.path.exists(filepath):
+    artifact = artifact_cache.get(filepath, _report_body)
+    if artifact is None:
         raise HTTPException(status_code=404, detail="Technical report not found.")
-    with open(filepath, "r", encoding="utf-8") as f:
-        return {"content": f.read()}
+    return artifact_response(request, artifact)
 
 # 🔥 NEW ENDPOINT: Fetch Business Report
 @app.get("/api/reports/business/{repo_name}")
-def api_get_biz_report(repo_name: str):
+def api_get_biz_report(repo_name: str, request: Request):
     filepath = os.path.join("reports", f"AURA_BUSINESS_REPORT_{repo_name}.md")
-    if not os.path.exists(filepath):
+    artifact = artifact_cache.get(filepath, _report_body)
+    if artifact is None:
         raise HTTPException(status_code=404, detail="Business report not found.")
-    with open(filepath, "r", encoding="utf-8") as f:
-        return {"content": f.read()}
+    return artifact_response(request, artifact)
 
 @app.get("/api/notes/{repo_name}")
-def api_get_notes(repo_name: str):
+def api_get_notes(repo_name: str, request: Request):
     filepath = os.path.join("reports", f"RELEASE_NOTES_{repo_name}.md")
-    if not os.path.exists(filepath):
+    render = lambda raw: json.dumps({"repo_name": repo_name, "content": raw.decode("utf-8")}).encode("utf-8")
+    artifact = artifact_cache.get(filepath, render)
+    if artifact is None:
         raise HTTPException(status_code=404, detail="Release notes not found. Generate them first.")
-    with open(filepath, "r", encoding="utf-8") as f:
-        content = f.read()
-    return {"repo_name": repo_name, "content": content}
+    return artifact_response(request, artifact)
 
 @app.get("/api/graph/{repo_name}")
-def api_get_graph(repo_name: str):
-    engine = DependencyEngine("", NEO4J_URI, NEO4J_USER, NEO4J_PASSWORD)
-    graph_data = engine.get_react_graph_data(repo_name)
-    engine.close()
-    return graph_data
+def api_get_graph(
+    repo_name: str,
+    node: str | None = None,
+    depth: int = Query(1, ge=1, le=GRAPH_MAX_DEPTH),
+    top_k: int | None = Query(None, ge=1, le=GRAPH_MAX_PAGE_SIZE),
+    prefix: str | None = None,
+    cursor: str | None = None,
+    limit: int | None = Query(None, ge=1, le=GRAPH_MAX_PAGE_SIZE),
+):
+    # The full dump shares the slice cache (all-None query fields); re-analysis discards the repo's entries.
+    key = (repo_name, node, depth if node else None, top_k, prefix, cursor, limit)
+    cached = graph_cache.get(key)
+    if cached is not None:
+        return cached
+    engine = DependencyEngine("", driver=get_neo4j_driver())
+    if not any([node, top_k, prefix, cursor, limit]):
+        data = engine.get_react_graph_data(repo_name)
+    else:
+        data = engine.query_graph(repo_name, node=node, depth=depth, top_k=top_k, prefix=prefix,
+                                  cursor=cursor, limit=limit or GRAPH_PAGE_SIZE)
+    # Empty answers aren't cached: they may just mean Neo4j was briefly unreachable.
+    if data["nodes"]:
+        graph_cache.set(key, data)
+    return data
+
+@app.get("/api/graph/{repo_name}/export")
+def api_export_graph(
+    repo_name: str,
+    format: str = "mermaid",
+    top_k: int | None = Query(None, ge=1, le=GRAPH_MAX_PAGE_SIZE),
+    prefix: str | None = None,
+):
+    if format not in EXPORT_FORMATS:
+        raise HTTPException(status_code=400, detail=f"format must be one of: {', '.join(EXPORT_FORMATS)}.")
+    engine = DependencyEngine("", driver=get_neo4j_driver())
+    try:
+        engine.load_from_neo4j(repo_name)
+    except Exception as e:
+        raise HTTPException(status_code=503, detail=f"Graph store unavailable: {e}")
+    if not engine.graph:
+        raise HTTPException(status_code=404, detail="Graph not found. Analyze the repository first.")
+
+    nodes = None
+    if prefix:
+        nodes = [n for n in engine.graph if n.startswith(prefix)]
+    if top_k:
+        allowed = set(nodes) if nodes is not None else None
+        nodes = [n for n in engine.ranked_nodes() if allowed is None or n in allowed][:top_k]
+    media_type, extension = EXPORT_FORMATS[format]
+    return StreamingResponse(engine.export(format, nodes), media_type=media_type,
+                             headers={"Content-Disposition": f'attachment; filename="{repo_name}.{extension}"'})
 
 @app.get("/api/images/{image_name}")
-def api_get_image(image_name: str):
+def api_get_image(image_name: str, request: Request, v: str | None = None):
     image_path = os.path.abspath(os.path.join("images", image_name))
     if os.path.exists(image_path):
-        return FileResponse(image_path)
+        # Reports link images with ?v=<render version>, so a versioned URL never changes content.
+        cache_control = "public, max-age=31536000, immutable" if v else "no-cache"
+        response = FileResponse(image_path, stat_result=os.stat(image_path), headers={"Cache-Control": cache_control})
+        if request.headers.get("if-none-match") == response.headers["etag"]:
+            return Response(status_code=304, headers={"ETag": response.headers["etag"], "Cache-Control": cache_control})
+        return response
     raise HTTPException(status_code=404, detail="Image not found")
 
 @app.get("/api/repos")
-def api_list_repos():
-    files = glob.glob(os.path.join("reports", "RELEASE_NOTES_*.md"))
-    repos = [os.path.basename(f).replace("RELEASE_NOTES_", "").replace(".md", "") for f in files]
-    return {"repos": list(set(repos))}
+def api_list_repos(request: Request):
+    ensure_reports_manifest(REPORTS_MANIFEST_PATH, "reports")
+    render = lambda raw: json.dumps({"repos": sorted(json.loads(raw)["repos"])}).encode("utf-8")
+    artifact = artifact_cache.get(REPORTS_MANIFEST_PATH, render)
+    if artifact is None:
+        return {"repos": []}
+    return artifact_response(request, artifact)
+
+@app.get("/metrics")
+def api_metrics():
+    """Prometheus scrape endpoint."""
+    return Response(content=REGISTRY.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
 
 if __name__ == "__main__":
     print("🚀 Starting AURA Backend API on http://localhost:8000")
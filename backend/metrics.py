@@ -0,0 +1,257 @@
+import math
+import time
+import weakref
+import threading
+import contextlib
+from collections import defaultdict
+
+from tokens import estimate_tokens
+
+# Stage durations run from milliseconds (a cached lookup) to many minutes (a full analysis).
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600, 1800)
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(pairs):
+    if not pairs: return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in pairs) + "}"
+
+
+def _number(value):
+    if value == math.inf: return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _Metric:
+    kind = None
+
+    def __init__(self, name, help, labelnames=()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _key(self, labels):
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}, got {tuple(labels)}")
+        return tuple(labels[name] for name in self.labelnames)
+
+    def _header(self):
+        return [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, name, help, labelnames=()):
+        super().__init__(name, help, labelnames)
+        self.values = defaultdict(float)
+
+    def inc(self, amount=1, **labels):
+        if amount < 0: raise ValueError("Counters only go up.")
+        key = self._key(labels)
+        with self._lock: self.values[key] += amount
+
+    def value(self, **labels):
+        with self._lock: return self.values.get(self._key(labels), 0.0)
+
+    def render(self):
+        with self._lock: values = sorted(self.values.items())
+        return self._header() + [f"{self.name}{_labels(zip(self.labelnames, key))} {_number(v)}" for key, v in values]
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name, help, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, help, labelnames)
+        self.buckets = tuple(sorted(buckets)) + (math.inf,)
+        self.series = {}
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            counts, total = self.series.get(key, ([0] * len(self.buckets), 0.0))
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    counts[i] += 1
+                    break
+            self.series[key] = (counts, total + value)
+
+    @contextlib.contextmanager
+    def time(self, **labels):
+        start = time.perf_counter()
+        try: yield
+        finally: self.observe(time.perf_counter() - start, **labels)
+
+    def count(self, **labels):
+        with self._lock:
+            counts, _ = self.series.get(self._key(labels), ([0], 0.0))
+            return sum(counts)
+
+    def render(self):
+        lines = self._header()
+        with self._lock: series = sorted((key, (list(c), s)) for key, (c, s) in self.series.items())
+        for key, (counts, total) in series:
+            pairs = list(zip(self.labelnames, key))
+            cumulative = 0
+            for bound, count in zip(self.buckets, counts):
+                cumulative += count
+                lines.append(f"{self.name}_bucket{_labels(pairs + [('le', _number(bound))])} {cumulative}")
+            lines.append(f"{self.name}_sum{_labels(pairs)} {_number(total)}")
+            lines.append(f"{self.name}_count{_labels(pairs)} {cumulative}")
+        return lines
+
+
+class Gauge(_Metric):
+    """A value read at scrape time: `read()` returns {label values tuple: number}."""
+    kind = "gauge"
+
+    def __init__(self, name, help, read, labelnames=()):
+        super().__init__(name, help, labelnames)
+        self.read = read
+
+    def render(self):
+        values = sorted(self.read().items())
+        return self._header() + [f"{self.name}{_labels(zip(self.labelnames, key))} {_number(v)}" for key, v in values]
+
+
+class CacheStats:
+    """Hit/miss counts for caches that are recreated per run (e.g. each analysis' embedding cache)."""
+
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    def record(self, hits, misses):
+        with self._lock:
+            self.hits += hits
+            self.misses += misses
+
+
+class Registry:
+    """Metrics in the Prometheus text exposition format, without the client library.
+
+    Caches are registered by name and read at scrape time: anything with `hits` and
+    `misses` attributes is exported as counters plus a hit ratio.
+    """
+
+    def __init__(self):
+        self.metrics = {}
+        self.caches = {}
+
+    def register(self, metric):
+        if metric.name in self.metrics:
+            raise ValueError(f"Metric '{metric.name}' is already registered.")
+        self.metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name, help, labelnames=()):
+        return self.register(Counter(name, help, labelnames))
+
+    def histogram(self, name, help, labelnames=(), buckets=DEFAULT_BUCKETS):
+        return self.register(Histogram(name, help, labelnames, buckets))
+
+    def gauge(self, name, help, read, labelnames=()):
+        return self.register(Gauge(name, help, read, labelnames))
+
+    def register_cache(self, name, cache):
+        self.caches[name] = cache
+
+    def _cache_lines(self):
+        if not self.caches: return []
+        stats = sorted((name, cache.hits, cache.misses) for name, cache in self.caches.items())
+        lines = []
+        for metric, kind, help, value in (
+            ("aura_cache_hits_total", "counter", "Cache lookups answered from the cache.", lambda h, m: h),
+            ("aura_cache_misses_total", "counter", "Cache lookups that had to compute or load the value.", lambda h, m: m),
+            ("aura_cache_hit_ratio", "gauge", "Hits over all lookups since start.", lambda h, m: h / (h + m) if h + m else 0.0),
+        ):
+            lines += [f"# HELP {metric} {help}", f"# TYPE {metric} {kind}"]
+            lines += [f"{metric}{_labels([('cache', name)])} {_number(value(hits, misses))}" for name, hits, misses in stats]
+        return lines
+
+    def render(self):
+        lines = []
+        for metric in self.metrics.values():
+            lines += metric.render()
+        lines += self._cache_lines()
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+STAGE_SECONDS = REGISTRY.histogram("aura_stage_duration_seconds", "Time spent in each pipeline stage.", ("stage",))
+LLM_CALLS = REGISTRY.counter("aura_llm_calls_total", "LLM requests by caller and outcome.", ("component", "outcome"))
+LLM_SECONDS = REGISTRY.histogram("aura_llm_call_duration_seconds", "LLM request latency.", ("component",))
+LLM_PROMPT_TOKENS = REGISTRY.counter("aura_llm_prompt_tokens_total", "Estimated prompt tokens sent to the LLM.", ("component",))
+LLM_COMPLETION_TOKENS = REGISTRY.counter("aura_llm_completion_tokens_total", "Estimated tokens received from the LLM.", ("component",))
+EMBEDDING_BATCHES = REGISTRY.counter("aura_embedding_batches_total", "Embedding requests sent to the endpoint.")
+EMBEDDED_TEXTS = REGISTRY.counter("aura_embedded_texts_total", "Texts embedded by the endpoint (cache misses only).")
+VECTOR_SEARCH_SECONDS = REGISTRY.histogram("aura_vector_search_duration_seconds", "FAISS similarity search latency.", ("component",))
+
+# Live EmbeddingPipeline instances; their in-flight requests and batch sizes are read at scrape time.
+EMBEDDING_PIPELINES = weakref.WeakSet()
+
+
+def _pipeline_gauge(attribute, combine):
+    def read():
+        values = defaultdict(list)
+        for pipeline in list(EMBEDDING_PIPELINES):
+            values[(pipeline.name,)].append(getattr(pipeline, attribute))
+        return {key: combine(found) for key, found in values.items()}
+    return read
+
+
+REGISTRY.gauge("aura_embedding_requests_in_flight", "Embedding requests currently waiting on the endpoint.",
+               _pipeline_gauge("in_flight", sum), ("pipeline",))
+REGISTRY.gauge("aura_embedding_batch_size", "Current adaptive embedding batch size (largest across running analyses).",
+               _pipeline_gauge("batch_size", max), ("pipeline",))
+
+EMBEDDING_CACHE_STATS = CacheStats()
+REGISTRY.register_cache("embeddings", EMBEDDING_CACHE_STATS)
+LLM_CACHE_STATS = CacheStats()
+REGISTRY.register_cache("llm_responses", LLM_CACHE_STATS)
+
+
+def record_llm_call(component, prompt, response, seconds, outcome="ok"):
+    LLM_CALLS.inc(component=component, outcome=outcome)
+    LLM_SECONDS.observe(seconds, component=component)
+    LLM_PROMPT_TOKENS.inc(estimate_tokens(str(prompt)), component=component)
+    LLM_COMPLETION_TOKENS.inc(estimate_tokens(response or ""), component=component)
+
+
+@contextlib.contextmanager
+def track(stage):
+    """Observe how long the block takes in the stage histogram."""
+    with STAGE_SECONDS.time(stage=stage):
+        yield
+
+
+class Timings:
+    """Per-run breakdown of stage wall times, also fed into the stage histogram."""
+
+    def __init__(self):
+        self.seconds = defaultdict(float)
+        self._lock = threading.Lock()
+
+    @contextlib.contextmanager
+    def stage(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            STAGE_SECONDS.observe(elapsed, stage=name)
+            with self._lock: self.seconds[name] += elapsed
+
+    def breakdown(self):
+        with self._lock:
+            return {name: round(seconds, 3) for name, seconds in self.seconds.items()}
+
+    def summary(self):
+        return ", ".join(f"{name} {seconds:.1f}s" for name, seconds in self.breakdown().items())
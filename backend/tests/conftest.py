@@ -0,0 +1,9 @@
+import pytest
+
+
+@pytest.fixture(autouse=True)
+def isolated_caches(tmp_path, monkeypatch):
+    """Keep on-disk caches written by tests (fake vectors, stub answers) out of the real ones."""
+    monkeypatch.setattr("aura_agent.EMBEDDING_CACHE_PATH", str(tmp_path / "embedding_cache.sqlite"))
+    monkeypatch.setattr("aura_agent.LAYOUT_CACHE_PATH", str(tmp_path / "layouts.sqlite"))
+    monkeypatch.setattr("aura_agent.LLM_CACHE_PATH", str(tmp_path / "llm_cache.sqlite"))
@@ -0,0 +1,167 @@
+import os
+import json
+import asyncio
+import concurrent.futures
+from unittest.mock import patch, MagicMock
+
+import networkx as nx
+from langchain_core.documents import Document
+
+import aura_agent
+from aura_agent import ProductionAgent
+
+
+class DummyAIResponse:
+    def __init__(self, text):
+        self.content = text
+
+
+# ---------------------------------------------------------
+# TESTS FOR: concurrent chapter generation
+# ---------------------------------------------------------
+@patch.object(aura_agent, "LLM_CONCURRENCY", 3)
+@patch("aura_agent.ChatNVIDIA.ainvoke")
+def test_chapters_run_concurrently_and_keep_plan_order(mock_ainvoke):
+    """Text and diagram calls of every chapter overlap (up to the cap); output keeps plan order."""
+    state = {"active": 0, "peak": 0}
+
+    async def slow_llm(prompt, *args, **kwargs):
+        state["active"] += 1
+        state["peak"] = max(state["peak"], state["active"])
+        await asyncio.sleep(0.02)
+        state["active"] -= 1
+        topic = prompt.split("'")[1]
+        return DummyAIResponse(f"text for {topic}")
+
+    mock_ainvoke.side_effect = slow_llm
+    agent = ProductionAgent()
+    agent.llm_limiter = aura_agent.TokenBucket(0)
+    agent.vector_db = MagicMock()
+    agent.vector_db.similarity_search.return_value = []
+
+    plan = [{"chapter_num": i, "title": f"Chapter {i}", "topic": f"topic {i}", "role": "Lead"} for i in range(1, 5)]
+    chapters = asyncio.run(agent._awrite_chapters(plan, "technical"))
+
+    assert [c.splitlines()[0] for c in chapters] == [f"# Chapter {i}" for i in range(1, 5)]
+    assert mock_ainvoke.call_count == 8
+    assert state["peak"] == 3
+
+
+@patch.object(aura_agent, "backoff_delay", return_value=0)
+@patch("aura_agent.ChatNVIDIA.ainvoke")
+def test_llm_call_retries_throttling(mock_ainvoke, mock_delay):
+    """A throttled LLM call is retried instead of failing the chapter."""
+    mock_ainvoke.side_effect = [Exception("[429] Too Many Requests"), DummyAIResponse("ok")]
+    agent = ProductionAgent()
+    agent.llm_limiter = aura_agent.TokenBucket(0)
+
+    assert asyncio.run(agent._allm("prompt")) == "ok"
+    assert mock_ainvoke.call_count == 2
+
+
+# ---------------------------------------------------------
+# TESTS FOR: LLM response cache
+# ---------------------------------------------------------
+@patch("aura_agent.ChatNVIDIA.ainvoke")
+def test_rerun_with_unchanged_context_costs_no_llm_calls(mock_ainvoke):
+    """A second agent (e.g. after a crash) replays cached answers; opting out regenerates them."""
+    async def answer(prompt, *args, **kwargs):
+        return DummyAIResponse(f"answer {len(prompt)}")
+    mock_ainvoke.side_effect = answer
+    plan = [{"chapter_num": 1, "title": "Chapter 1", "topic": "routing", "role": "Lead"}]
+
+    def run(use_cache=True):
+        agent = ProductionAgent()
+        agent.llm_limiter = aura_agent.TokenBucket(0)
+        agent.vector_db = MagicMock()
+        agent.vector_db.similarity_search.return_value = []
+        agent.use_llm_cache = use_cache
+        return asyncio.run(agent._awrite_chapters(plan, "technical")), asyncio.run(agent._allm("plan the report"))
+
+    first = run()
+    assert mock_ainvoke.call_count == 3
+    assert run() == first
+    assert mock_ainvoke.call_count == 3
+
+    run(use_cache=False)
+    assert mock_ainvoke.call_count == 6
+
+
+@patch("aura_agent.ChatNVIDIA.ainvoke")
+def test_rejected_plan_is_not_cached(mock_ainvoke):
+    """A planning reply that isn't a chapter list gets the fallback and is asked for again next run."""
+    good_plan = '[{"chapter_num": 1, "title": "Chapter 1: Routing", "topic": "api routes", "role": "Lead"}]'
+    mock_ainvoke.side_effect = [DummyAIResponse("Sorry, I can't outline this."), DummyAIResponse(good_plan)]
+
+    def plan():
+        agent = ProductionAgent()
+        agent.llm_limiter = aura_agent.TokenBucket(0)
+        return asyncio.run(agent._aplan_chapters("technical", ["app.py"], "context"))
+
+    assert plan()[0]["title"] == "Chapter 1: Core System Implementation"
+    assert plan() == json.loads(good_plan)
+    assert plan() == json.loads(good_plan)
+    assert mock_ainvoke.call_count == 2
+
+
+# ---------------------------------------------------------
+# TESTS FOR: shared multi-document generation
+# ---------------------------------------------------------
+@patch("aura_agent.ChatNVIDIA.ainvoke")
+def test_both_documents_share_rankings_searches_and_diagram(mock_ainvoke, tmp_path, monkeypatch):
+    """doc_type='both' ranks, draws and embeds queries once; identical chapter topics are searched once."""
+    monkeypatch.chdir(tmp_path)
+
+    async def answer(prompt, *args, **kwargs):
+        if "table of contents" in prompt:
+            return DummyAIResponse('[{"chapter_num": 1, "title": "Chapter 1: Routing", "topic": "api routes", "role": "Lead"}]')
+        return DummyAIResponse("Generated section.")
+    mock_ainvoke.side_effect = answer
+
+    agent = ProductionAgent()
+    agent.llm_limiter = aura_agent.TokenBucket(0)
+    agent.current_repo_name = "shared_repo"
+    agent.dep_engine = MagicMock()
+    agent.dep_engine.ranked_nodes.return_value = ["app.py", "routes.py"]
+    agent.dep_engine.graph = nx.DiGraph([("app.py", "routes.py")])
+    agent.dep_engine.export.return_value = ["graph TD\n"]
+    rendered = concurrent.futures.Future()
+    rendered.set_result(("architecture_shared_repo.png", "v1"))
+    agent.diagram_renderer = MagicMock()
+    agent.diagram_renderer.submit.return_value = rendered
+    agent.vector_db = MagicMock()
+    agent.vector_db.similarity_search_by_vector.return_value = [Document(page_content="def route(): pass", metadata={"source": "routes.py"})]
+
+    with patch("aura_agent.NVIDIAEmbeddings.embed_query", return_value=[0.1, 0.2]) as mock_embed:
+        documents = agent.generate_documents(["technical", "business"])
+
+    assert [os.path.basename(d) for d in documents] == [
+        "AURA_TECHNICAL_REPORT_shared_repo.md", "AURA_BUSINESS_REPORT_shared_repo.md", "RELEASE_NOTES_shared_repo.md"]
+    assert mock_embed.call_count == 3  # planning + notes, then the shared topic
+    assert agent.vector_db.similarity_search_by_vector.call_count == 3
+    agent.dep_engine.ranked_nodes.assert_called_once_with(40)
+    agent.diagram_renderer.submit.assert_called_once()
+    assert sum("table of contents" in c.args[0] for c in mock_ainvoke.call_args_list) == 2
+    with open(documents[0], encoding="utf-8") as f:
+        assert "architecture_shared_repo.png?v=v1" in f.read()
+    with open(documents[1], encoding="utf-8") as f:
+        assert "System Architecture Network" not in f.read()
+
+
+def test_failed_shared_search_falls_back_to_own_search():
+    """A topic whose shared search failed is left out, so its chapter runs its own search instead of using no docs."""
+    agent = ProductionAgent()
+    agent.llm_limiter = aura_agent.TokenBucket(0)
+    agent.query_pipeline = MagicMock()
+    agent.query_pipeline.embed.side_effect = lambda queries: [[0.1]] * len(queries)
+    agent.vector_db = MagicMock()
+    agent.vector_db.similarity_search_by_vector.side_effect = RuntimeError("index busy")
+
+    topic_docs = agent._search_many({"api routes": 20})
+    assert topic_docs == {}
+
+    plan = [{"chapter_num": 1, "title": "Chapter 1", "topic": "api routes", "role": "Lead"}]
+    with patch.object(agent, "_safe_search", return_value=[]) as mock_search, \
+         patch("aura_agent.ChatNVIDIA.ainvoke", return_value=DummyAIResponse("Generated section.")):
+        asyncio.run(agent._awrite_chapters(plan, "technical", topic_docs))
+    mock_search.assert_called_once_with("api routes", 20)
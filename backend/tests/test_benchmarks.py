@@ -0,0 +1,33 @@
+import json
+
+from benchmarks import run
+from benchmarks.synthetic_repo import generate_repo
+
+
+# ---------------------------------------------------------
+# TESTS FOR: generate_repo
+# ---------------------------------------------------------
+def test_synthetic_repo_is_deterministic(tmp_path):
+    """The same parameters always produce byte-identical trees."""
+    first = generate_repo(tmp_path / "a", files=30, fan_out=3, file_lines=20, seed=7)
+    second = generate_repo(tmp_path / "b", files=30, fan_out=3, file_lines=20, seed=7)
+    assert first == second
+    for rel in first:
+        assert (tmp_path / "a" / rel).read_bytes() == (tmp_path / "b" / rel).read_bytes()
+
+
+# ---------------------------------------------------------
+# TESTS FOR: benchmarks.run
+# ---------------------------------------------------------
+def test_benchmark_smoke(tmp_path):
+    """A tiny run goes through every stage offline and writes comparable JSON."""
+    output = tmp_path / "results.json"
+    results = run.main(["--files", "30", "--fan-out", "3", "--file-lines", "20", "--queries", "6", "--output", str(output)])
+
+    assert json.loads(output.read_text()) == results
+    result = results["runs"][0]
+    assert list(result["stages"]) == ["generate_repo", "ingest", "graph_build", "neo4j_persist",
+                                      "chunking", "faiss_build", "retrieval", "report"]
+    assert result["edges"] == 30 * 3
+    assert result["neo4j"]["rows"] == result["nodes"] + result["edges"]
+    assert result["retrieval"]["warm"]["count"] == 6
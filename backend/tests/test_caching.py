@@ -0,0 +1,114 @@
+import time
+import threading
+from unittest.mock import MagicMock
+
+from langchain_core.documents import Document
+
+from caching import TTLCache, SingleFlight
+from chat_agent import ChatAgent, normalize_question
+from vector_store_cache import VectorStoreCache
+
+
+# ---------------------------------------------------------
+# TESTS FOR: TTLCache / SingleFlight
+# ---------------------------------------------------------
+def test_ttl_cache_expires_and_evicts_lru():
+    """Entries vanish after their TTL and the least recently used one goes first when full."""
+    cache = TTLCache(maxsize=2, ttl=60)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+    cache.set("c", 3)
+    assert list(cache.entries) == ["a", "c"]
+
+    short = TTLCache(maxsize=2, ttl=0.01)
+    short.set("a", 1)
+    time.sleep(0.02)
+    assert short.get("a") is None and len(short) == 0
+
+    cache.discard_where(lambda key: key == "a")
+    assert cache.get("a") is None and cache.get("c") == 3
+
+
+def test_single_flight_shares_one_execution():
+    """Callers arriving while a call is in flight get its result rather than running it again."""
+    flights = SingleFlight()
+    started = threading.Event()
+    release = threading.Event()
+    calls = []
+
+    def slow():
+        calls.append(1)
+        started.set()
+        release.wait(2)
+        return "result"
+
+    results = []
+    leader = threading.Thread(target=lambda: results.append(flights.do("k", slow)))
+    leader.start()
+    started.wait(2)
+    followers = [threading.Thread(target=lambda: results.append(flights.do("k", slow))) for _ in range(3)]
+    for t in followers: t.start()
+    time.sleep(0.05)
+    release.set()
+    for t in [leader, *followers]: t.join(2)
+
+    assert results == ["result"] * 4
+    assert calls == [1]
+
+
+# ---------------------------------------------------------
+# TESTS FOR: ChatAgent retrieval cache
+# ---------------------------------------------------------
+def _agent(db, version):
+    agent = ChatAgent.__new__(ChatAgent)
+    agent.embeddings = MagicMock()
+    agent.embeddings.embed_query.return_value = [0.1, 0.2]
+    versions = {"demo": version}
+    agent.vector_dbs = VectorStoreCache(lambda key: (db, versions[key]), 1 << 30,
+                                        version_of=lambda key: versions[key], sizeof=lambda store: 1)
+    agent.lexical_indexes = VectorStoreCache(lambda key: None, 1 << 30)
+    agent.query_vectors = TTLCache(16, 60)
+    agent.retrievals = TTLCache(16, 60)
+    agent._retrieval_flights = SingleFlight()
+    return agent, versions
+
+
+def test_repeat_question_skips_embedding_and_search():
+    """A normalized repeat is answered from cached doc ids without an embedding round trip."""
+    docs = [Document(id="1", page_content="a"), Document(id="2", page_content="b")]
+    db = MagicMock()
+    db.similarity_search_by_vector.return_value = docs
+    db.get_by_ids.return_value = docs
+    agent, versions = _agent(db, version=1)
+
+    store = agent.vector_dbs.get("demo")
+    first = agent._retrieve("demo", store, "Explain the architecture?")
+    second = agent._retrieve("demo", store, "  explain   the ARCHITECTURE ")
+
+    assert normalize_question("Explain the architecture?") == "explain the architecture"
+    assert first == second == docs
+    agent.embeddings.embed_query.assert_called_once()
+    db.similarity_search_by_vector.assert_called_once()
+    db.get_by_ids.assert_called_once_with(["1", "2"])
+
+    # A rebuilt index searches again but reuses the query vector.
+    versions["demo"] = 2
+    store = agent.vector_dbs.get("demo")
+    agent._retrieve("demo", store, "Explain the architecture")
+    assert db.similarity_search_by_vector.call_count == 2
+    agent.embeddings.embed_query.assert_called_once()
+
+
+def test_invalidate_repo_drops_cached_retrievals():
+    """Re-analysis forgets the repo's retrievals even if the index version looks unchanged."""
+    docs = [Document(id="1", page_content="a")]
+    db = MagicMock()
+    db.similarity_search_by_vector.return_value = docs
+    agent, _ = _agent(db, version=1)
+
+    agent._retrieve("demo", agent.vector_dbs.get("demo"), "where is auth?")
+    agent.invalidate_repo("demo")
+    agent._retrieve("demo", agent.vector_dbs.get("demo"), "where is auth?")
+
+    assert db.similarity_search_by_vector.call_count == 2
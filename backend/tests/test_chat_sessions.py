@@ -0,0 +1,47 @@
+from unittest.mock import patch
+
+from chat_sessions import ChatSessionStore
+
+
+# ---------------------------------------------------------
+# TESTS FOR: ChatSessionStore (per-session, token-budgeted history)
+# ---------------------------------------------------------
+def test_sessions_are_isolated_per_repo_and_session():
+    """Two users of the same repo never see each other's turns."""
+    store = ChatSessionStore()
+    store.record_turn("repo", "alice", "What is main.py?", "The entry point.")
+    store.record_turn("repo", "bob", "Where is auth?", "In auth.py.")
+
+    alice_history, _ = store.context("repo", "alice")
+    assert [m.content for m in alice_history] == ["What is main.py?", "The entry point."]
+    assert store.context("other_repo", "alice") == ([], "")
+    assert store.context("repo", None) == ([], "")
+
+
+def test_old_turns_fold_into_a_bounded_summary():
+    """History stays inside its token budget no matter how long the conversation gets."""
+    store = ChatSessionStore(history_token_budget=100, summary_token_budget=150)
+    for i in range(50):
+        store.record_turn("repo", "s1", f"question {i} " + "q" * 80, f"answer {i} " + "a" * 200)
+
+    history, summary = store.context("repo", "s1")
+    assert len(history) == 2  # only the latest turn verbatim
+    assert history[0].content.startswith("question 49")
+    assert "question 48" in summary and "question 0 " not in summary
+    session = store.sessions[("repo", "s1")]
+    assert session.summary_tokens <= 150
+    assert store.total_tokens == session.tokens
+
+
+def test_idle_sessions_expire_and_global_cap_evicts_oldest():
+    """Idle sessions disappear after the TTL; the global cap drops least recently used sessions."""
+    store = ChatSessionStore(ttl_seconds=60, max_total_tokens=50)
+    with patch("chat_sessions.time.time", return_value=1000):
+        store.record_turn("repo", "old", "q" * 80, "a" * 80)
+    with patch("chat_sessions.time.time", return_value=1100):
+        assert store.context("repo", "old") == ([], "")
+        store.record_turn("repo", "a", "q" * 80, "a" * 80)
+        store.record_turn("repo", "b", "q" * 80, "a" * 80)
+
+    assert list(store.sessions) == [("repo", "b")]
+    assert store.total_tokens == 40
@@ -0,0 +1,91 @@
+from chunking import chunk_record
+from ingestion import parse_source_file
+
+SOURCE = '''import os
+
+CONSTANT = 1
+
+
+def small_a():
+    return 1
+
+
+def small_b():
+    return 2
+
+
+class Big:
+    """Docstring."""
+
+    def first(self):
+{first_body}
+
+    # Explains second.
+    @property
+    def second(self):
+        return 2
+'''
+
+
+def _record(tmp_path, text):
+    path = tmp_path / "mod.py"
+    path.write_text(text)
+    return parse_source_file(str(path), str(tmp_path))
+
+
+# ---------------------------------------------------------
+# TESTS FOR: AST-aware chunking
+# ---------------------------------------------------------
+def test_chunks_follow_definitions_and_merge_small_siblings(tmp_path):
+    """Module code and small functions share a chunk; an oversized class splits into header and methods."""
+    body = "\n".join(f"        x{i} = {i}" for i in range(20))
+    record = _record(tmp_path, SOURCE.replace("{first_body}", body))
+    chunks = chunk_record(record, max_chars=400)
+
+    meta = [(c.metadata["symbol"], c.metadata["kind"], c.metadata["lineno"], c.metadata["end_lineno"]) for c in chunks]
+    assert meta == [
+        ("small_a, small_b, Big", "group", 1, 15),
+        ("Big.first", "method", 17, 37),
+        ("Big.second", "method", 39, 42),
+    ]
+    assert chunks[2].page_content.startswith("    # Explains second.\n    @property")
+    assert all(c.metadata["source"] == record.path for c in chunks)
+    # No text is duplicated between chunks.
+    assert sum(len(c.page_content) for c in chunks) < len(record.text)
+
+
+def test_whole_file_fits_in_one_chunk(tmp_path):
+    record = _record(tmp_path, SOURCE.replace("{first_body}", "        return 1"))
+    chunks = chunk_record(record, max_chars=2000)
+
+    assert len(chunks) == 1
+    assert chunks[0].metadata["symbols"] == ["<module>", "small_a", "small_b", "Big"]
+    assert chunks[0].page_content == record.text.rstrip()
+
+
+def test_oversized_function_and_unparsed_file_fall_back_to_character_split(tmp_path):
+    """Only bodies larger than the budget are character-split, keeping their symbol and line spans."""
+    body = "\n".join(f"    value_{i} = {i}" for i in range(60))
+    record = _record(tmp_path, f"def huge():\n{body}\n")
+    chunks = chunk_record(record, max_chars=300)
+
+    assert len(chunks) > 1
+    assert all(c.metadata["symbol"] == "huge" and len(c.page_content) <= 300 for c in chunks)
+    assert chunks[0].metadata["lineno"] == 1
+    assert chunks[-1].metadata["end_lineno"] == 61
+    assert [c.metadata["lineno"] for c in chunks[1:]] == [c.metadata["end_lineno"] + 1 for c in chunks[:-1]]
+
+    broken = _record(tmp_path, "def broken(:\n    pass\n")
+    assert [c.metadata["kind"] for c in chunk_record(broken)] == ["text"]
+
+
+def test_cr_only_line_endings_match_ast_line_numbers(tmp_path):
+    """Old-Mac '\r' line breaks count as lines for ast, so chunk spans must count them too."""
+    path = tmp_path / "mac.py"
+    path.write_bytes(b"import os\rdef f():\r    return 1\r\rclass A:\r    def m(self):\r        pass\r")
+    chunks = chunk_record(parse_source_file(str(path), str(tmp_path)), max_chars=20)
+
+    spans = {c.page_content: (c.metadata["lineno"], c.metadata["end_lineno"]) for c in chunks}
+    assert spans["import os"] == (1, 1)
+    assert spans["class A:"] == (5, 5)
+    assert spans["pass"] == (7, 7)
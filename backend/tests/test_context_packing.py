@@ -0,0 +1,49 @@
+from langchain_core.documents import Document
+
+from context_packing import dedupe, mmr, pack_context
+from tokens import estimate_tokens
+
+
+def _doc(text, source="a.py", lineno=None, end_lineno=None):
+    metadata = {"source": source}
+    if lineno is not None: metadata.update(lineno=lineno, end_lineno=end_lineno)
+    return Document(page_content=text, metadata=metadata)
+
+
+# ---------------------------------------------------------
+# TESTS FOR: context packing
+# ---------------------------------------------------------
+def test_dedupe_fuses_overlapping_and_adjacent_chunks():
+    """Overlapping/adjacent line ranges of one file become one chunk; repeats and other files are kept apart."""
+    docs = [
+        _doc("line2\nline3", lineno=2, end_lineno=3),
+        _doc("line1\nline2", lineno=1, end_lineno=2),
+        _doc("line4", lineno=4, end_lineno=4),
+        _doc("line4", source="b.py", lineno=4, end_lineno=4),
+        _doc("line4"),
+    ]
+    packed = dedupe(docs)
+
+    assert [d.page_content for d in packed] == ["line1\nline2\nline3\nline4", "line4"]
+    assert packed[0].metadata["lineno"] == 1 and packed[0].metadata["end_lineno"] == 4
+    assert packed[1].metadata["source"] == "b.py"
+
+
+def test_mmr_pushes_near_duplicates_down():
+    docs = [
+        _doc("def login(user, password): check password hash", source="auth.py"),
+        _doc("def login(user, password): check password hash again", source="auth_copy.py"),
+        _doc("class Invoice: total amount currency", source="billing.py"),
+    ]
+    assert [d.metadata["source"] for d in mmr(docs, lambda_mult=0.5)] == ["auth.py", "billing.py", "auth_copy.py"]
+
+
+def test_pack_context_respects_token_budget():
+    """Whole chunks fill the budget; the first one that does not fit is trimmed to the remainder."""
+    docs = [_doc(f"chunk{i} " + "x" * 396, source=f"{i}.py") for i in range(10)]
+    packed = pack_context(docs, token_budget=380)
+
+    assert len(packed) == 4
+    assert sum(estimate_tokens(d.page_content) for d in packed) <= 380
+    assert len(packed[-1].page_content) == 80 * 4
+    assert pack_context([], 100) == []
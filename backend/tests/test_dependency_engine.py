@@ -0,0 +1,162 @@
+import os
+from unittest.mock import MagicMock, patch
+
+import networkx as nx
+
+from aura_agent import DependencyEngine
+from graph_metrics import pagerank
+
+
+def _write(root, rel_path, content=""):
+    path = os.path.join(root, rel_path)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(content)
+
+
+@patch("aura_agent.GraphDatabase.driver")
+def _engine(root, mock_driver):
+    return DependencyEngine(str(root), "bolt://fake", "user", "pass")
+
+
+# ---------------------------------------------------------
+# TESTS FOR: DependencyEngine import resolution
+# ---------------------------------------------------------
+def test_build_resolves_relative_and_submodule_imports(tmp_path):
+    """Relative imports use ImportFrom.level and `from pkg import mod` points at the submodule."""
+    _write(tmp_path, "app/__init__.py", "from . import models\n")
+    _write(tmp_path, "app/models.py", "from .db import session\n")
+    _write(tmp_path, "app/db.py", "session = None\n")
+    _write(tmp_path, "app/api/routes.py", "from ..models import User\nfrom app import db\n")
+    _write(tmp_path, "main.py", "import app.api.routes\n")
+
+    engine = _engine(tmp_path)
+    engine.build("demo")
+
+    edges = set(engine.graph.edges)
+    assert ("app/__init__.py", "app/models.py") in edges
+    assert ("app/models.py", "app/db.py") in edges
+    assert ("app/api/routes.py", "app/models.py") in edges
+    assert ("app/api/routes.py", "app/db.py") in edges
+    assert ("main.py", "app/api/routes.py") in edges
+
+
+def test_suffix_index_prefers_sibling_module(tmp_path):
+    """Partial (src-layout) imports resolve through the suffix index, nearest package first."""
+    _write(tmp_path, "src/shop/utils.py")
+    _write(tmp_path, "src/shop/cart.py", "from shop import utils\nimport shop.utils\n")
+    _write(tmp_path, "src/blog/utils.py")
+    _write(tmp_path, "src/blog/views.py", "import utils\n")
+
+    engine = _engine(tmp_path)
+    engine.build("demo")
+
+    assert set(engine.graph.successors("src/shop/cart.py")) == {"src/shop/utils.py"}
+    assert set(engine.graph.successors("src/blog/views.py")) == {"src/blog/utils.py"}
+
+
+def test_unresolvable_imports_add_no_edges(tmp_path):
+    """Stdlib / third-party imports and out-of-tree relative imports are ignored."""
+    _write(tmp_path, "solo.py", "import os\nfrom .... import nothing\nfrom requests import get\n")
+
+    engine = _engine(tmp_path)
+    engine.build("demo")
+
+    assert list(engine.graph.nodes) == ["solo.py"]
+    assert len(engine.graph.edges) == 0
+
+
+# ---------------------------------------------------------
+# TESTS FOR: batched Neo4j persistence
+# ---------------------------------------------------------
+@patch("aura_agent.GraphDatabase.driver")
+def test_save_to_neo4j_uses_batched_transactions(mock_driver):
+    """Nodes and edges are written with one UNWIND transaction per batch, not one query per row."""
+    engine = DependencyEngine("", "bolt://batched", "user", "pass", batch_size=2)
+    session = mock_driver.return_value.session.return_value.__enter__.return_value
+
+    nodes = [f"mod_{i}.py" for i in range(5)]
+    edges = [(nodes[i], nodes[i + 1]) for i in range(4)]
+    engine._save_to_neo4j(nodes, edges, "demo")
+
+    calls = session.execute_write.call_args_list
+    file_batches = [c.args[1] for c in calls if c.args[0] == DependencyEngine._write_file_batch]
+    import_batches = [c.args[1] for c in calls if c.args[0] == DependencyEngine._write_import_batch]
+    assert [len(b) for b in file_batches] == [2, 2, 1]
+    assert [len(b) for b in import_batches] == [2, 2]
+    assert file_batches[0][0] == {"path": "mod_0.py", "name": "mod_0.py"}
+    assert session.run.call_count == 3  # schema statements only
+
+
+# ---------------------------------------------------------
+# TESTS FOR: graph slices (DependencyEngine.query_graph)
+# ---------------------------------------------------------
+def _row(path, pagerank=0.1):
+    return {"id": path, "name": path, "pagerank": pagerank, "in_degree": 1, "out_degree": 1,
+            "betweenness": 0.0, "in_cycle": False}
+
+
+def _graph_session(rows):
+    session = MagicMock()
+    driver = MagicMock()
+    driver.session.return_value.__enter__.return_value = session
+    engine = DependencyEngine("", driver=driver)
+    session.run.reset_mock()
+    session.run.side_effect = [rows, [{"source": "a.py", "target": "b.py"}]]
+    return engine, session
+
+
+def test_query_graph_pages_by_path_cursor():
+    """Prefix/cursor pages are keyset-paginated on the (repo, path) index."""
+    rows = [_row("a.py", 0.2), _row("b.py", 0.1)]
+    engine, session = _graph_session(rows)
+    data = engine.query_graph("demo", prefix="", cursor="0.py", limit=2)
+
+    query, kwargs = session.run.call_args_list[0].args[0], session.run.call_args_list[0].kwargs
+    assert "STARTS WITH $prefix AND f.path > $cursor" in query
+    assert kwargs == {"repo": "demo", "prefix": "", "cursor": "0.py", "limit": 2}
+    assert data["next_cursor"] == "b.py"
+    assert [n["val"] for n in data["nodes"]] == [10, 5.5]
+    assert data["links"] == [{"source": "a.py", "target": "b.py"}]
+    assert session.run.call_args_list[1].kwargs["paths"] == ["a.py", "b.py"]
+
+
+def test_query_graph_neighbourhood_clamps_depth():
+    engine, session = _graph_session([_row("a.py")])
+    data = engine.query_graph("demo", node="a.py", depth=99)
+
+    assert [n["id"] for n in data["nodes"]] == ["a.py"]
+    assert "-[:IMPORTS*0..4]-" in session.run.call_args_list[0].args[0]
+    assert data["next_cursor"] is None
+
+
+# ---------------------------------------------------------
+# TESTS FOR: centrality metrics computed at build time
+# ---------------------------------------------------------
+def test_pagerank_matches_reference_values():
+    graph = nx.DiGraph([("a", "b"), ("b", "c"), ("c", "a")])
+    assert all(abs(r - 1 / 3) < 1e-6 for r in pagerank(graph).values())
+
+    star = nx.DiGraph([("a", "hub"), ("b", "hub"), ("c", "hub")])
+    ranks = pagerank(star)
+    assert abs(sum(ranks.values()) - 1) < 1e-6
+    assert max(ranks, key=ranks.get) == "hub"
+
+
+@patch("aura_agent.GraphDatabase.driver")
+def test_build_persists_metrics_in_file_rows(mock_driver, tmp_path):
+    """Metrics ride along in the batched File write, and ranked_nodes orders by PageRank."""
+    _write(tmp_path, "core.py", "import a\n")
+    _write(tmp_path, "a.py", "import core\n")
+    _write(tmp_path, "leaf.py", "import core\n")
+    engine = DependencyEngine(str(tmp_path), "bolt://metrics", "user", "pass")
+    session = mock_driver.return_value.session.return_value.__enter__.return_value
+    engine.build("demo")
+
+    assert engine.ranked_nodes(1) == ["core.py"]
+    assert engine.metrics["core.py"]["in_degree"] == 2
+    assert engine.metrics["a.py"]["in_cycle"] and not engine.metrics["leaf.py"]["in_cycle"]
+    rows = [row for c in session.execute_write.call_args_list
+            if c.args[0] == DependencyEngine._write_file_batch for row in c.args[1]]
+    assert {row["path"]: row["scc_size"] for row in rows} == {"core.py": 2, "a.py": 2, "leaf.py": 1}
+    assert all("pagerank" in row and "betweenness" in row for row in rows)
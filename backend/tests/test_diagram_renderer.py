@@ -0,0 +1,55 @@
+import os
+import sqlite3
+from unittest.mock import patch
+
+import networkx as nx
+
+import diagram_renderer
+from diagram_renderer import DiagramRenderer
+
+
+def _graph():
+    return nx.DiGraph([("pkg/a.py", "pkg/b.py"), ("pkg/b.py", "pkg/c.py")])
+
+
+# ---------------------------------------------------------
+# TESTS FOR: DiagramRenderer
+# ---------------------------------------------------------
+def test_unchanged_graph_is_not_redrawn(tmp_path):
+    """The first render runs in the worker process; an identical second request reuses the file."""
+    renderer = DiagramRenderer(str(tmp_path / "layouts.sqlite"), output_dir=str(tmp_path / "images"))
+    filename, version = renderer.render(_graph(), "architecture_demo")
+    path = tmp_path / "images" / filename
+    assert filename == "architecture_demo.png" and path.read_bytes().startswith(b"\x89PNG")
+    mtime = path.stat().st_mtime_ns
+
+    with patch.object(diagram_renderer, "render_graph") as mock_render:
+        assert renderer.render(_graph(), "architecture_demo") == (filename, version)
+        mock_render.assert_not_called()
+    assert path.stat().st_mtime_ns == mtime
+
+
+def test_layout_cache_reused_across_formats(tmp_path):
+    """Another format re-draws the image but takes the cached layout instead of recomputing it."""
+    cache_path = str(tmp_path / "layouts.sqlite")
+    DiagramRenderer(cache_path, output_dir=str(tmp_path)).render(_graph(), "arch")
+
+    svg = DiagramRenderer(cache_path, output_dir=str(tmp_path), fmt="svg", dpi=72)
+    with patch.object(diagram_renderer, "_get_executor", side_effect=RuntimeError("no pool")), \
+         patch.object(diagram_renderer, "render_graph", wraps=diagram_renderer.render_graph) as spy:
+        filename, _ = svg.render(_graph(), "arch")
+    assert filename == "arch.svg"
+    assert b"<svg" in (tmp_path / "arch.svg").read_bytes()
+    assert spy.call_args.args[3] is not None  # positions came from the layout cache
+    assert os.path.exists(tmp_path / "arch.png")
+
+
+def test_cache_write_failure_still_resolves(tmp_path):
+    """A failing cache write is logged; the render future still completes with the drawn image."""
+    renderer = DiagramRenderer(str(tmp_path / "layouts.sqlite"), output_dir=str(tmp_path))
+    with patch.object(diagram_renderer, "_get_executor", side_effect=RuntimeError("no pool")), \
+         patch.object(renderer.cache, "set", side_effect=sqlite3.OperationalError("database is locked")):
+        future = renderer.submit(_graph(), "arch")
+    filename, _ = future.result(timeout=30)
+    assert filename == "arch.png"
+    assert os.path.exists(tmp_path / "arch.png")
@@ -0,0 +1,88 @@
+from disk_cache import DiskCache, EmbeddingCache, LLMResponseCache
+
+
+# ---------------------------------------------------------
+# TESTS FOR: DiskCache (SQLite store with size-based eviction)
+# ---------------------------------------------------------
+def test_disk_cache_evicts_least_recently_used(tmp_path):
+    """Once the byte budget is exceeded the least recently read entries go first."""
+    cache = DiskCache(str(tmp_path / "cache.sqlite"), max_bytes=300)
+    cache.set("a", b"x" * 100)
+    cache.set("b", b"x" * 100)
+    cache.get("a")  # 'b' is now the coldest entry
+    cache.set("c", b"x" * 150)
+
+    assert cache.get("b") is None
+    assert cache.get("a") == b"x" * 100
+    assert cache.get("c") == b"x" * 150
+    assert cache.size_bytes() <= 300
+
+
+def test_disk_cache_running_total_tracks_writes(tmp_path):
+    """Replacing, expiring and evicting entries keep the stored size total equal to the real one."""
+    path = str(tmp_path / "cache.sqlite")
+    cache = DiskCache(path, max_bytes=300)
+    cache.set("a", b"x" * 100)
+    cache.set("a", b"x" * 40)
+    cache.set("b", b"x" * 50, ttl=-1)
+    cache.set("c", b"x" * 100)
+    cache.set("d", b"x" * 200)  # expires 'b', then evicts 'a' and 'c'
+    actual = cache._conn.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+
+    assert cache.size_bytes() == actual == 200
+    assert DiskCache(path, max_bytes=300).size_bytes() == 200
+
+
+def test_disk_cache_ttl_expiry(tmp_path):
+    """Entries written with a TTL disappear once it has passed."""
+    cache = DiskCache(str(tmp_path / "cache.sqlite"), max_bytes=10_000)
+    cache.set("fresh", b"1", ttl=60)
+    cache.set("stale", b"2", ttl=-1)
+
+    assert cache.get("fresh") == b"1"
+    assert cache.get("stale") is None
+
+
+# ---------------------------------------------------------
+# TESTS FOR: EmbeddingCache
+# ---------------------------------------------------------
+def test_embedding_cache_only_embeds_misses(tmp_path):
+    """Known chunks are served from disk (even in a new process); duplicates are embedded once."""
+    path = str(tmp_path / "emb.sqlite")
+    calls = []
+    def fake_embed(texts):
+        calls.append(list(texts))
+        return [[float(len(t)), 0.5] for t in texts]
+
+    first = EmbeddingCache(path, "model-a", "passage", max_bytes=1_000_000)
+    assert first.embed_documents(["alpha", "beta", "alpha"], fake_embed) == [[5.0, 0.5], [4.0, 0.5], [5.0, 0.5]]
+    assert calls == [["alpha", "beta"]]
+
+    reopened = EmbeddingCache(path, "model-a", "passage", max_bytes=1_000_000)
+    assert reopened.embed_documents(["beta", "gamma"], fake_embed) == [[4.0, 0.5], [5.0, 0.5]]
+    assert calls[-1] == ["gamma"]
+    assert (reopened.hits, reopened.misses) == (1, 1)
+
+    other_model = EmbeddingCache(path, "model-b", "passage", max_bytes=1_000_000)
+    other_model.embed_documents(["alpha"], fake_embed)
+    assert calls[-1] == ["alpha"]
+
+
+# ---------------------------------------------------------
+# TESTS FOR: LLMResponseCache
+# ---------------------------------------------------------
+def test_llm_cache_is_keyed_by_model_and_temperature(tmp_path):
+    """The same prompt to another model or temperature is a miss; expired answers are misses too."""
+    path = str(tmp_path / "llm.sqlite")
+    cache = LLMResponseCache(path, "model-a", 0.1, max_bytes=1_000_000, ttl=60)
+    cache.set("Explain the router", "It routes.")
+    cache.set("Empty", "")
+
+    assert LLMResponseCache(path, "model-a", 0.1, max_bytes=1_000_000).get("Explain the router") == "It routes."
+    assert LLMResponseCache(path, "model-b", 0.1, max_bytes=1_000_000).get("Explain the router") is None
+    assert LLMResponseCache(path, "model-a", 0.7, max_bytes=1_000_000).get("Explain the router") is None
+    assert cache.get("Empty") is None
+
+    expired = LLMResponseCache(path, "model-a", 0.1, max_bytes=1_000_000, ttl=-1)
+    expired.set("Old prompt", "Old answer")
+    assert expired.get("Old prompt") is None
@@ -0,0 +1,104 @@
+import time
+import threading
+from unittest.mock import patch
+
+import pytest
+
+from embedding_pipeline import EmbeddingPipeline
+from metrics import REGISTRY
+from throttling import TokenBucket, is_retryable_error
+
+
+# ---------------------------------------------------------
+# TESTS FOR: TokenBucket / retry classification
+# ---------------------------------------------------------
+def test_token_bucket_paces_requests_after_burst():
+    """A 20 req/s bucket with burst 2 spaces the third request ~50ms out."""
+    bucket = TokenBucket(rate=20, capacity=2)
+    start = time.monotonic()
+    for _ in range(3):
+        bucket.acquire()
+    assert time.monotonic() - start >= 0.04
+
+
+def test_retryable_errors():
+    """NVIDIA-style '[429]' messages and network timeouts are retried; auth errors are not."""
+    assert is_retryable_error(Exception("[429] Too Many Requests"))
+    assert is_retryable_error(TimeoutError("read timed out"))
+    assert not is_retryable_error(Exception("[401] Unauthorized"))
+
+
+# ---------------------------------------------------------
+# TESTS FOR: EmbeddingPipeline
+# ---------------------------------------------------------
+def test_pipeline_preserves_order_and_bounds_concurrency():
+    """Batches run in parallel up to the cap and vectors come back in input order."""
+    lock = threading.Lock()
+    active = {"now": 0, "peak": 0}
+
+    def fake_embed(batch):
+        with lock:
+            active["now"] += 1
+            active["peak"] = max(active["peak"], active["now"])
+        time.sleep(0.01)
+        with lock:
+            active["now"] -= 1
+        return [[float(int(t))] for t in batch]
+
+    pipeline = EmbeddingPipeline(fake_embed, max_concurrency=3, requests_per_second=0, batch_size=4, max_batch_size=8)
+    texts = [str(i) for i in range(100)]
+
+    assert pipeline.embed(texts) == [[float(i)] for i in range(100)]
+    assert 1 < active["peak"] <= 3
+    stats = pipeline.stats()
+    assert stats["texts_embedded"] == 100 and stats["in_flight"] == 0
+    assert stats["batch_size"] == 8  # grew while the endpoint kept up
+
+
+@patch("embedding_pipeline.backoff_delay", return_value=0)
+def test_pipeline_retries_throttling_and_shrinks_batches(mock_delay):
+    """A 429 is retried with backoff and halves the batch size."""
+    calls = []
+
+    def flaky_embed(batch):
+        calls.append(len(batch))
+        if len(calls) == 1:
+            raise Exception("[429] Too Many Requests")
+        return [[1.0]] * len(batch)
+
+    pipeline = EmbeddingPipeline(flaky_embed, max_concurrency=1, requests_per_second=0, batch_size=16, min_batch_size=4)
+    assert len(pipeline.embed(["x"] * 40)) == 40
+    assert calls[:2] == [16, 16]
+    assert pipeline.stats()["throttled"] == 1
+    assert calls[2] == 10  # halved to 8, then grew by a quarter after the successful retry
+
+
+def test_pipeline_raises_non_retryable_errors():
+    """Errors that retrying can't fix surface immediately."""
+    def broken(batch):
+        raise Exception("[401] Unauthorized")
+
+    pipeline = EmbeddingPipeline(broken, requests_per_second=0)
+    with pytest.raises(Exception, match="401"):
+        pipeline.embed(["x"])
+
+
+def test_in_flight_requests_are_visible_while_running():
+    """/metrics reads live pipelines, so a slow request shows up as in flight before it finishes."""
+    started, release = threading.Event(), threading.Event()
+
+    def slow_embed(batch):
+        started.set()
+        release.wait(5)
+        return [[0.0]] * len(batch)
+
+    pipeline = EmbeddingPipeline(slow_embed, max_concurrency=1, requests_per_second=0, batch_size=2, name="gauge_test")
+    worker = threading.Thread(target=pipeline.embed, args=(["a", "b"],))
+    worker.start()
+    started.wait(5)
+    assert 'aura_embedding_requests_in_flight{pipeline="gauge_test"} 1' in REGISTRY.render()
+    release.set()
+    worker.join(5)
+    text = REGISTRY.render()
+    assert 'aura_embedding_requests_in_flight{pipeline="gauge_test"} 0' in text
+    assert 'aura_embedding_batch_size{pipeline="gauge_test"} 3' in text
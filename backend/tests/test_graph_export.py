@@ -0,0 +1,72 @@
+import json
+import xml.etree.ElementTree as ET
+
+import networkx as nx
+import pytest
+
+from graph_export import export_graph, unique_labels
+
+
+def _graph():
+    return nx.DiGraph([
+        ("pkg/utils.py", "core/utils.py"),
+        ("core/utils.py", "core/db.py"),
+        ("app.py", "pkg/utils.py"),
+    ])
+
+
+# ---------------------------------------------------------
+# TESTS FOR: unique_labels
+# ---------------------------------------------------------
+def test_labels_grow_only_where_names_collide():
+    """Files sharing a basename get a parent directory; unique basenames stay short."""
+    labels = unique_labels(list(_graph().nodes))
+    assert labels["pkg/utils.py"] == "pkg/utils.py"
+    assert labels["core/utils.py"] == "core/utils.py"
+    assert labels["core/db.py"] == "db.py"
+    assert labels["app.py"] == "app.py"
+
+
+# ---------------------------------------------------------
+# TESTS FOR: export_graph
+# ---------------------------------------------------------
+def test_every_format_parses():
+    """Each writer's streamed chunks join into a document its own format accepts."""
+    graph = _graph()
+    metrics = {n: {"pagerank": 0.25, "in_cycle": False} for n in graph}
+
+    data = json.loads("".join(export_graph(graph, "json", metrics=metrics)))
+    assert {n["id"] for n in data["nodes"]} == set(graph.nodes)
+    assert len(data["links"]) == 3
+    assert nx.node_link_graph(data, edges="links").number_of_edges() == 3
+
+    graphml = "".join(export_graph(graph, "graphml", metrics=metrics))
+    ET.fromstring(graphml)
+    parsed = nx.parse_graphml(graphml)
+    assert parsed.has_edge("pkg/utils.py", "core/utils.py")
+    assert parsed.nodes["core/db.py"]["pagerank"] == 0.25
+
+    dot = "".join(export_graph(graph, "dot"))
+    assert dot.startswith("digraph") and '"app.py" -> "pkg/utils.py";' in dot
+
+    mermaid = "".join(export_graph(graph, "mermaid"))
+    assert mermaid.startswith("graph TD\n")
+    assert 'n0["pkg/utils.py"]' in mermaid and "n0 --> n1" in mermaid
+
+
+def test_subset_keeps_only_internal_edges():
+    """With a node list, only edges between selected nodes are emitted, in the given order."""
+    mermaid = "".join(export_graph(_graph(), "mermaid", nodes=["core/utils.py", "core/db.py", "missing.py"]))
+    assert mermaid == 'graph TD\n    n0["utils.py"]\n    n1["db.py"]\n    n0 --> n1\n'
+
+
+def test_dot_keeps_non_ascii_and_escapes_quotes():
+    """Graphviz takes UTF-8 verbatim, so names are not \\u-escaped; quotes still are."""
+    dot = "".join(export_graph(nx.DiGraph([("données/café.py", 'odd"name.py')]), "dot"))
+    assert '"données/café.py" -> "odd\\"name.py";' in dot
+    assert "\\u" not in dot
+
+
+def test_unknown_format_is_rejected():
+    with pytest.raises(ValueError):
+        export_graph(_graph(), "svg")
@@ -0,0 +1,60 @@
+import os
+import hashlib
+from unittest.mock import patch
+
+import ingestion
+from ingestion import ingest_files, parse_source_file
+
+
+def _write(root, rel_path, content):
+    path = os.path.join(root, rel_path)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(content)
+    return path
+
+
+# ---------------------------------------------------------
+# TESTS FOR: single-pass source ingestion
+# ---------------------------------------------------------
+def test_parse_source_file_builds_full_record(tmp_path):
+    """One read yields text, hash, imports and symbols with line spans."""
+    source = "from .db import session\n\nclass Repo:\n    def save(self):\n        pass\n\ndef helper():\n    pass\n"
+    path = _write(tmp_path, "pkg/models.py", source)
+
+    record = parse_source_file(path, str(tmp_path))
+
+    assert record.rel_path == "pkg/models.py"
+    assert record.text == source
+    assert record.sha256 == hashlib.sha256(source.encode("utf-8")).hexdigest()
+    assert record.imports == [("db", 1, ("session",))]
+    assert [(s["qualname"], s["kind"], s["lineno"], s["end_lineno"]) for s in record.symbols] == [
+        ("Repo", "class", 3, 5), ("Repo.save", "method", 4, 5), ("helper", "function", 7, 8)
+    ]
+    assert record.parsed
+
+
+def test_unparseable_and_binary_files(tmp_path):
+    """Syntax errors keep the text for the knowledge base; undecodable files are skipped."""
+    broken = _write(tmp_path, "broken.py", "def oops(:\n")
+    binary = os.path.join(tmp_path, "blob.py")
+    with open(binary, "wb") as f:
+        f.write(b"\xff\xfe\x00bad")
+
+    records = list(ingest_files(str(tmp_path), [broken, binary]))
+
+    assert len(records) == 1
+    assert records[0].text == "def oops(:\n"
+    assert not records[0].parsed
+
+
+@patch.object(ingestion, "INLINE_PARSE_THRESHOLD", 0)
+def test_process_pool_matches_inline_parsing(tmp_path):
+    """The process-pool path yields the same records, in the same order, as inline parsing."""
+    files = [_write(tmp_path, f"mod_{i}.py", f"import mod_{i + 1}\n") for i in range(6)]
+
+    pooled = list(ingest_files(str(tmp_path), files, max_workers=2))
+    inline = list(ingest_files(str(tmp_path), files, max_workers=1))
+
+    assert pooled == inline
+    assert [r.rel_path for r in pooled] == [f"mod_{i}.py" for i in range(6)]
@@ -1,5 +1,6 @@
 import os
 import shutil
+import subprocess
 import pytest
 from unittest.mock import patch, MagicMock
 
@@ -13,9 +14,10 @@ from aura_agent import ProductionAgent
 @patch("aura_agent.GraphDatabase.driver") # Fake the Neo4j Database connection
 @patch("aura_agent.NVIDIAEmbeddings.embed_documents") # Fake the NVIDIA FAISS embedding math
 @patch("aura_agent.NVIDIAEmbeddings.embed_query")
+@patch("aura_agent.ChatNVIDIA.ainvoke") # Fake the async NVIDIA LLM calls (chapters run concurrently)
 @patch("aura_agent.ChatNVIDIA.invoke") # Fake the NVIDIA LLM chat responses
 @patch.object(ProductionAgent, "_mcp_clone") # Fake the GitHub download
-def test_full_agent_integration(mock_clone, mock_invoke, mock_embed_query, mock_embed_docs, mock_neo4j):
+def test_full_agent_integration(mock_clone, mock_invoke, mock_ainvoke, mock_embed_query, mock_embed_docs, mock_neo4j):
     """
     INTEGRATION TEST:
     We fake the internet (GitHub & NVIDIA), but we let the code actually build 
@@ -55,6 +57,11 @@ def test_full_agent_integration(mock_clone, mock_invoke, mock_embed_query, mock_
         
     mock_invoke.side_effect = smart_ai_mock
 
+    async def smart_ai_mock_async(prompt, *args, **kwargs):
+        return smart_ai_mock(prompt, *args, **kwargs)
+
+    mock_ainvoke.side_effect = smart_ai_mock_async
+
     # ---------------------------------------------------------
     # 3. EXECUTE THE REAL CODE
     # ---------------------------------------------------------
@@ -96,4 +103,73 @@ def test_full_agent_integration(mock_clone, mock_invoke, mock_embed_query, mock_
     shutil.rmtree(os.path.join("cloned_repos", "demo_integration_repo"), ignore_errors=True)
     if os.path.exists(report_path): os.remove(report_path)
     if os.path.exists(manual_path): os.remove(manual_path)
-    if os.path.exists(expected_image_path): os.remove(expected_image_path)
\ No newline at end of file
+    if os.path.exists(expected_image_path): os.remove(expected_image_path)
+
+# =========================================================
+# INCREMENTAL RE-ANALYSIS (Only the diff is re-processed)
+# =========================================================
+
+def _git(repo, *args):
+    subprocess.run(["git", "-C", str(repo), "-c", "user.name=aura", "-c", "user.email=aura@test", *args],
+                   check=True, capture_output=True)
+
+
+@patch("aura_agent.GraphDatabase.driver")
+@patch("aura_agent.NVIDIAEmbeddings.embed_documents")
+@patch("aura_agent.NVIDIAEmbeddings.embed_query")
+@patch.object(ProductionAgent, "_mcp_clone")
+def test_incremental_reanalysis(mock_clone, mock_embed_query, mock_embed_docs, mock_neo4j, tmp_path, monkeypatch):
+    """A second run re-embeds only added/modified files and drops vectors + graph records of removed files."""
+    from aura_agent import DependencyEngine
+
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr("aura_agent.BASE_REPOS_DIR", str(tmp_path / "cloned_repos"))
+
+    origin = tmp_path / "origin" / "incremental_repo"
+    origin.mkdir(parents=True)
+    (origin / "main.py").write_text("import utils\nimport models\n")
+    (origin / "utils.py").write_text("def helper(): pass\n")
+    (origin / "models.py").write_text("class User: pass\n")
+    _git(origin, "init", "-q")
+    _git(origin, "add", "-A")
+    _git(origin, "commit", "-q", "-m", "initial")
+
+    async def real_local_clone(url, target_path):
+        subprocess.run(["git", "clone", "-q", url, target_path], check=True)
+    mock_clone.side_effect = real_local_clone
+
+    embedded = []
+    def fake_embed(texts):
+        embedded.extend(texts)
+        return [[float(len(t)), 0.2, 0.3] for t in texts]
+    mock_embed_docs.side_effect = fake_embed
+    mock_embed_query.return_value = [0.1, 0.2, 0.3]
+
+    def run():
+        agent = ProductionAgent()
+        agent.dep_engine = DependencyEngine("", "bolt://fake", "user", "pass")
+        agent.initialize_repo(str(origin))
+        return agent
+
+    run()
+    assert mock_clone.call_count == 1
+    assert len(embedded) == 3
+
+    (origin / "utils.py").write_text("def helper(): return 42\n")
+    (origin / "models.py").unlink()
+    (origin / "views.py").write_text("import utils\n")
+    _git(origin, "add", "-A")
+    _git(origin, "commit", "-q", "-m", "change")
+    embedded.clear()
+
+    agent = run()
+
+    assert mock_clone.call_count == 1  # fetched, not re-cloned
+    assert sorted(embedded) == ["def helper(): return 42", "import utils"]
+    sources = sorted(os.path.basename(d.metadata["source"]) for d in agent.vector_db.docstore._dict.values())
+    assert sources == ["main.py", "utils.py", "views.py"]
+    assert set(agent.dep_engine.graph.edges) == {("main.py", "utils.py"), ("views.py", "utils.py")}
+
+    session = mock_neo4j.return_value.session.return_value.__enter__.return_value
+    deleted = [c.args[1] for c in session.execute_write.call_args_list if c.args[0] == DependencyEngine._delete_file_batch]
+    assert deleted == [["models.py"]]
@@ -0,0 +1,89 @@
+from unittest.mock import MagicMock
+
+from langchain_core.documents import Document
+
+from caching import TTLCache, SingleFlight
+from chat_agent import ChatAgent
+from lexical_index import LexicalIndex, extract_identifiers, identifiers_dominate, reciprocal_rank_fusion, tokenize
+from vector_store_cache import VectorStoreCache
+
+DOCS = {
+    "engine": Document(id="engine", page_content="class DependencyEngine:\n    def build(self, repo_name): ...",
+                       metadata={"symbols": ["DependencyEngine", "DependencyEngine.build"]}),
+    "caller": Document(id="caller", page_content="agent.dep_engine.build(self.current_repo_name)",
+                       metadata={"symbols": ["ProductionAgent.initialize_repo"]}),
+    "other": Document(id="other", page_content="def render_report(): write markdown to disk",
+                      metadata={"symbols": ["render_report"]}),
+}
+
+
+# ---------------------------------------------------------
+# TESTS FOR: LexicalIndex (BM25 + symbol table)
+# ---------------------------------------------------------
+def test_tokenize_and_identifier_extraction():
+    assert tokenize("DependencyEngine.build_graph") == [
+        "dependencyengine", "dependency", "engine", "build_graph", "build", "graph"]
+    assert extract_identifiers("where is `DependencyEngine.build` called from run_analysis?") == [
+        "DependencyEngine.build", "run_analysis"]
+    assert extract_identifiers("how does login work?") == []
+
+
+def test_bm25_and_symbols_survive_save_and_load(tmp_path):
+    """The index written at ingestion answers the same lookups after being reloaded."""
+    LexicalIndex.from_documents(DOCS.items()).save(str(tmp_path))
+    index = LexicalIndex.load(str(tmp_path))
+
+    assert [doc_id for doc_id, _ in index.search("markdown report")] == ["other"]
+    assert {doc_id for doc_id, _ in index.search("dep_engine build")} == {"engine", "caller"}
+    assert index.lookup_symbols(["DependencyEngine.build"]) == ["engine"]
+    assert index.lookup_symbols(["build"]) == ["engine"]
+    assert LexicalIndex.load(str(tmp_path / "missing")) is None
+    assert reciprocal_rank_fusion([["a", "b"], ["b", "c"]]) == ["b", "a", "c"]
+
+
+# ---------------------------------------------------------
+# TESTS FOR: ChatAgent hybrid retrieval
+# ---------------------------------------------------------
+def _agent():
+    db = MagicMock()
+    db.get_by_ids.side_effect = lambda ids: [DOCS[i] for i in ids if i in DOCS]
+    db.similarity_search_by_vector.return_value = [DOCS["other"], DOCS["engine"]]
+    agent = ChatAgent.__new__(ChatAgent)
+    agent.embeddings = MagicMock()
+    agent.embeddings.embed_query.return_value = [0.1]
+    agent.vector_dbs = VectorStoreCache(lambda key: (db, 1), 1 << 30, sizeof=lambda store: 1)
+    agent.lexical_indexes = VectorStoreCache(lambda key: (LexicalIndex.from_documents(DOCS.items()), 1), 1 << 30,
+                                             sizeof=lambda index: 1, label="lexical index")
+    agent.query_vectors = TTLCache(16, 60)
+    agent.retrievals = TTLCache(16, 60)
+    agent._retrieval_flights = SingleFlight()
+    return agent, db
+
+
+def test_identifier_question_skips_embedding():
+    agent, db = _agent()
+    docs = agent._retrieve("demo", agent.vector_dbs.get("demo"), "Where is `DependencyEngine.build` called?")
+
+    assert [d.id for d in docs][:2] == ["engine", "caller"]
+    agent.embeddings.embed_query.assert_not_called()
+    db.similarity_search_by_vector.assert_not_called()
+
+
+def test_prose_question_fuses_dense_and_lexical_results():
+    agent, db = _agent()
+    docs = agent._retrieve("demo", agent.vector_dbs.get("demo"), "how are markdown reports written to disk")
+
+    assert [d.id for d in docs] == ["other", "engine"]
+    agent.embeddings.embed_query.assert_called_once()
+
+
+def test_symbol_mentioned_in_prose_is_fused_with_dense_results():
+    """One identifier in a longer question doesn't bypass dense retrieval; its definition is ranked in."""
+    agent, db = _agent()
+    question = "how does DependencyEngine decide which markdown reports get written to disk"
+    assert not identifiers_dominate(question, extract_identifiers(question))
+    docs = agent._retrieve("demo", agent.vector_dbs.get("demo"), question)
+
+    agent.embeddings.embed_query.assert_called_once()
+    assert [d.id for d in docs][:2] == ["engine", "other"]
+    assert identifiers_dominate("DependencyEngine.build?", ["DependencyEngine.build"])
@@ -0,0 +1,65 @@
+import pytest
+
+from metrics import Registry, Timings, STAGE_SECONDS
+
+
+# ---------------------------------------------------------
+# TESTS FOR: Registry (Prometheus text format)
+# ---------------------------------------------------------
+def test_counter_and_histogram_exposition():
+    """Counters render one sample per label set; histogram buckets are cumulative with +Inf."""
+    registry = Registry()
+    calls = registry.counter("demo_calls_total", "Calls.", ("component",))
+    latency = registry.histogram("demo_seconds", "Latency.", ("component",), buckets=(0.1, 1))
+    calls.inc(component='say "hi"')
+    calls.inc(2, component="chat")
+    for value in (0.05, 0.5, 5):
+        latency.observe(value, component="chat")
+
+    text = registry.render()
+    assert "# TYPE demo_calls_total counter" in text
+    assert 'demo_calls_total{component="chat"} 2.0' in text
+    assert 'demo_calls_total{component="say \\"hi\\""} 1.0' in text
+    assert 'demo_seconds_bucket{component="chat",le="0.1"} 1' in text
+    assert 'demo_seconds_bucket{component="chat",le="1"} 2' in text
+    assert 'demo_seconds_bucket{component="chat",le="+Inf"} 3' in text
+    assert 'demo_seconds_sum{component="chat"} 5.55' in text
+    assert 'demo_seconds_count{component="chat"} 3' in text
+
+    with pytest.raises(ValueError):
+        calls.inc(stage="wrong label")
+    with pytest.raises(ValueError):
+        registry.counter("demo_calls_total", "Duplicate.")
+
+
+def test_registered_caches_report_hit_ratio():
+    """Caches are read at scrape time, so their counters are always current."""
+    class FakeCache:
+        hits, misses = 3, 1
+
+    registry = Registry()
+    cache = FakeCache()
+    registry.register_cache("retrievals", cache)
+    assert 'aura_cache_hit_ratio{cache="retrievals"} 0.75' in registry.render()
+    cache.hits = 7
+    text = registry.render()
+    assert 'aura_cache_hits_total{cache="retrievals"} 7' in text
+    assert 'aura_cache_hit_ratio{cache="retrievals"} 0.875' in text
+
+
+# ---------------------------------------------------------
+# TESTS FOR: Timings
+# ---------------------------------------------------------
+def test_timings_accumulate_and_feed_histogram():
+    """Repeated stages add up in the breakdown and each run is one histogram observation."""
+    timings = Timings()
+    before = STAGE_SECONDS.count(stage="unit_test_stage")
+    for _ in range(2):
+        with timings.stage("unit_test_stage"):
+            pass
+    with pytest.raises(RuntimeError):
+        with timings.stage("unit_test_stage"):
+            raise RuntimeError("failed stages are still timed")
+
+    assert list(timings.breakdown()) == ["unit_test_stage"]
+    assert STAGE_SECONDS.count(stage="unit_test_stage") == before + 3
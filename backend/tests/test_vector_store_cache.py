@@ -0,0 +1,63 @@
+from vector_store_cache import VectorStoreCache
+
+
+class FakeStore:
+    def __init__(self, name, size):
+        self.name = name
+        self.size = size
+
+
+def _cache(sizes, max_bytes, versions=None):
+    loads = []
+    versions = versions if versions is not None else {}
+
+    def loader(key):
+        if key not in sizes: return None
+        loads.append(key)
+        return FakeStore(key, sizes[key]), versions.get(key)
+
+    cache = VectorStoreCache(loader, max_bytes, version_of=lambda key: versions.get(key), sizeof=lambda store: store.size)
+    return cache, loads
+
+
+# ---------------------------------------------------------
+# TESTS FOR: VectorStoreCache (memory-bounded FAISS LRU)
+# ---------------------------------------------------------
+def test_cache_evicts_least_recently_used_by_bytes():
+    """The byte budget, not the entry count, decides how many indexes stay resident."""
+    cache, loads = _cache({"a": 40, "b": 40, "c": 40}, max_bytes=100)
+    cache.get("a")
+    cache.get("b")
+    cache.get("a")  # 'b' becomes least recently used
+    cache.get("c")
+
+    assert list(cache.entries) == ["a", "c"]
+    assert cache.total_bytes == 80
+    assert cache.get("a").name == "a" and loads == ["a", "b", "c"]
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["evictions"]) == (2, 3, 1)
+    assert set(stats["load_seconds"]) == {"a", "b", "c"}
+
+
+def test_cache_reloads_rebuilt_index_and_skips_missing():
+    """A new on-disk version triggers a reload; unknown repos are not cached."""
+    versions = {"a": 1}
+    cache, loads = _cache({"a": 10}, max_bytes=100, versions=versions)
+    cache.get("a")
+    versions["a"] = 2
+    cache.get("a")
+
+    assert loads == ["a", "a"]
+    assert cache.version("a") == 2
+    assert cache.total_bytes == 10
+    assert cache.get("missing") is None
+
+
+def test_prewarm_loads_ahead_of_first_request():
+    """Pre-warmed repos are served as hits from the very first question."""
+    cache, loads = _cache({"hot": 5}, max_bytes=100)
+    cache.prewarm(["hot", "missing"])
+
+    assert loads == ["hot"]
+    cache.get("hot")
+    assert cache.hits == 1
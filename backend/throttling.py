@@ -0,0 +1,60 @@
+import re
+import time
+import random
+import asyncio
+import threading
+
+# NVIDIA endpoint errors are plain Exceptions formatted as "[<status>] <title>".
+_RETRYABLE_STATUS = re.compile(r"\[(429|500|502|503|504)\]")
+_RETRYABLE_TEXT = ("too many requests", "rate limit", "throttl", "temporarily unavailable", "timed out")
+
+
+class TokenBucket:
+    """Token-bucket rate limiter: `rate` tokens per second with bursts of up to `capacity`."""
+
+    def __init__(self, rate, capacity=None):
+        self.rate = float(rate)
+        self.capacity = float(capacity or max(1.0, rate))
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _reserve(self, tokens):
+        """Take `tokens` now and return how long the caller must wait before using them."""
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            self._tokens -= tokens
+            if self._tokens >= 0: return 0.0
+            return -self._tokens / self.rate
+
+    def acquire(self, tokens=1):
+        if self.rate <= 0: return
+        delay = self._reserve(tokens)
+        if delay: time.sleep(delay)
+
+    async def acquire_async(self, tokens=1):
+        if self.rate <= 0: return
+        delay = self._reserve(tokens)
+        if delay: await asyncio.sleep(delay)
+
+
+def is_retryable_error(exc):
+    """True for throttling / transient upstream failures that are worth retrying."""
+    if isinstance(exc, (TimeoutError, ConnectionError)): return True
+    status = getattr(exc, "status_code", None) or getattr(getattr(exc, "response", None), "status_code", None)
+    if status in (429, 500, 502, 503, 504): return True
+    message = str(exc)
+    return bool(_RETRYABLE_STATUS.search(message)) or any(t in message.lower() for t in _RETRYABLE_TEXT)
+
+
+def is_throttling_error(exc):
+    message = str(exc).lower()
+    status = getattr(exc, "status_code", None) or getattr(getattr(exc, "response", None), "status_code", None)
+    return status == 429 or "[429]" in message or "too many requests" in message or "rate limit" in message
+
+
+def backoff_delay(attempt, base=0.5, cap=30.0):
+    """Full-jitter exponential backoff for the given (0-based) retry attempt."""
+    return random.uniform(0, min(cap, base * (2 ** attempt)))
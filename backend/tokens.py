@@ -0,0 +1,11 @@
+# Without the model's tokenizer at hand, ~4 characters per token is close enough for budgeting prompts.
+CHARS_PER_TOKEN = 4
+
+
+def estimate_tokens(text):
+    if not text: return 0
+    return max(1, len(text) // CHARS_PER_TOKEN)
+
+
+def truncate_to_tokens(text, max_tokens):
+    return text[: max_tokens * CHARS_PER_TOKEN]
@@ -0,0 +1,115 @@
+import sys
+import time
+import threading
+from collections import OrderedDict, defaultdict
+
+# Rough per-document overhead of a docstore entry (Document object, metadata dict, id) beyond its text.
+_DOC_OVERHEAD_BYTES = 400
+
+
+def estimate_vector_store_bytes(vector_db):
+    """Approximate resident size of a loaded FAISS store: raw vectors plus docstore texts."""
+    try:
+        index = vector_db.index
+        total = index.ntotal * index.d * 4
+        for doc in vector_db.docstore._dict.values():
+            total += sys.getsizeof(doc.page_content) + _DOC_OVERHEAD_BYTES
+        return int(total)
+    except Exception:
+        return 0
+
+
+class VectorStoreCache:
+    """LRU cache of loaded vector stores bounded by an estimated memory budget in bytes.
+
+    `loader(key)` returns (store, version) or None; `version_of(key)` reports the version
+    currently on disk so a rebuilt index is reloaded instead of served stale.
+    """
+
+    def __init__(self, loader, max_bytes, version_of=None, sizeof=estimate_vector_store_bytes, label="FAISS index"):
+        self.loader = loader
+        self.label = label
+        self.max_bytes = max_bytes
+        self.version_of = version_of or (lambda key: None)
+        self.sizeof = sizeof
+        self.entries = OrderedDict()
+        self.total_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.load_seconds = {}
+        self._lock = threading.Lock()
+        self._load_locks = defaultdict(threading.Lock)
+
+    def get(self, key):
+        version = self.version_of(key)
+        with self._lock:
+            entry = self.entries.get(key)
+            if entry and entry["version"] == version:
+                self.entries.move_to_end(key)
+                self.hits += 1
+                return entry["store"]
+
+        # One load per key at a time: concurrent first questions wait for the same deserialization.
+        with self._load_locks[key]:
+            with self._lock:
+                entry = self.entries.get(key)
+                if entry and entry["version"] == version:
+                    self.entries.move_to_end(key)
+                    self.hits += 1
+                    return entry["store"]
+                self.misses += 1
+
+            start = time.perf_counter()
+            loaded = self.loader(key)
+            if loaded is None: return None
+            store, version = loaded
+            elapsed = time.perf_counter() - start
+            size = self.sizeof(store)
+
+            with self._lock:
+                self.load_seconds[key] = elapsed
+                self._drop(key)
+                self.entries[key] = {"store": store, "version": version, "bytes": size}
+                self.total_bytes += size
+                self._evict()
+            print(f"📦 Loaded {self.label} '{key}' in {elapsed:.2f}s (~{size / 1024 / 1024:.1f} MB, cache {self.total_bytes / 1024 / 1024:.1f}/{self.max_bytes / 1024 / 1024:.0f} MB)")
+            return store
+
+    def version(self, key):
+        with self._lock:
+            entry = self.entries.get(key)
+            return entry["version"] if entry else None
+
+    def invalidate(self, key):
+        with self._lock:
+            self._drop(key)
+
+    def prewarm(self, keys):
+        for key in keys:
+            try: self.get(key)
+            except Exception as e: print(f"⚠️ Failed to pre-warm '{key}': {e}")
+
+    def _drop(self, key):
+        entry = self.entries.pop(key, None)
+        if entry: self.total_bytes -= entry["bytes"]
+
+    def _evict(self):
+        # The most recent entry always stays, even if it alone exceeds the budget.
+        while self.total_bytes > self.max_bytes and len(self.entries) > 1:
+            key, entry = self.entries.popitem(last=False)
+            self.total_bytes -= entry["bytes"]
+            self.evictions += 1
+            print(f"♻️  Evicted {self.label} '{key}' from memory.")
+
+    def stats(self):
+        with self._lock:
+            return {
+                "repos": list(self.entries),
+                "bytes": self.total_bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "load_seconds": dict(self.load_seconds),
+            }